@@ -10,17 +10,38 @@ from database_connection import mysql
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# On-disk Jinja bytecode cache shared by all workers (before anything touches app.jinja_env)
+from rendering import init_templates
+init_templates(app)
+
 # 2. INITIALIZE MySQL using the shared object's init_app method
-# This registers the instance for use in your routes and models.
+# This registers the pooled instance for use in your routes and models.
 mysql.init_app(app) 
 
+# Per-request query timing, Server-Timing headers and endpoint latency metrics
+from instrumentation import init_instrumentation
+init_instrumentation(app)
+
+# gzip/brotli for HTML/JSON/CSV responses (never the SSE stream)
+from compression import init_compression
+init_compression(app)
+
+# Content-hashed, precompressed static files (after `flask assets build`)
+from assets import init_assets, assets_cli
+init_assets(app)
+app.cli.add_command(assets_cli)
+
+# Size the per-student portal cache from config
+from models.portal_cache import configure_portal_cache
+configure_portal_cache(app)
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
 
 # Import routes
-from routes import auth, student, admin, room, mess, fees, visitor
+from routes import auth, student, admin, room, mess, fees, visitor, health
 
 # Register blueprints
 app.register_blueprint(auth.bp)
@@ -30,6 +51,11 @@ app.register_blueprint(room.bp)
 app.register_blueprint(mess.bp)
 app.register_blueprint(fees.bp)
 app.register_blueprint(visitor.bp)
+app.register_blueprint(health.bp)
+
+# `flask db upgrade|status|check-plans`
+from models.migrations import db_cli
+app.cli.add_command(db_cli)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -55,4 +81,6 @@ def server_error(e):
     return render_template('500.html'), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (wsgi.py / gunicorn.conf.py).
+    # Debug (reloader + debugger) is opt-in with FLASK_DEBUG=1.
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=int(os.getenv('PORT', 5000)), threaded=True)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz variants are built
+    brotli = None
+
+ASSET_DIR = 'dist'               # under the static folder, so the static route serves it
+MANIFEST = 'manifest.json'
+ASSET_MAX_AGE = 365 * 24 * 3600
+PRECOMPRESSED_TYPES = ('.css', '.js', '.svg', '.json', '.txt')
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_assets(static_folder):
+    """Copy every static file to dist/ under a content-hashed name, with .gz/.br variants.
+
+    Returns the manifest ({'css/style.css': 'dist/css/style.3f2a9c81d04e.css'})
+    and writes it to dist/manifest.json. Files from earlier builds are kept,
+    so pages rendered by workers still on the old release keep working
+    during a rolling restart.
+    """
+    out_dir = os.path.join(static_folder, ASSET_DIR)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != ASSET_DIR]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{ASSET_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+            manifest[logical] = hashed
+
+            target = os.path.join(static_folder, *hashed.split('/'))
+            if os.path.exists(target):
+                continue  # same content, already built
+            _write(target, data)
+            if ext in PRECOMPRESSED_TYPES:
+                _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write(target + '.br', brotli.compress(data, quality=11))
+
+    _write(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, ASSET_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_assets(app):
+    """Point url_for('static', ...) at the fingerprinted build and serve it cacheable forever.
+
+    Without a build (``flask assets build``) URLs and caching stay as they are.
+    """
+    app.config.setdefault('ASSET_MAX_AGE', ASSET_MAX_AGE)
+    manifest = load_manifest(app.static_folder)
+    app.extensions['assets'] = manifest
+    plain_static = app.view_functions['static']
+
+    @app.url_defaults
+    def _fingerprint(endpoint, values):
+        if endpoint == 'static':
+            hashed = manifest.get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+
+    def static(filename):
+        if not filename.startswith(ASSET_DIR + '/'):
+            return plain_static(filename=filename)
+
+        # Serve the precompressed variant the browser takes, if the build made one
+        available = [encoding for encoding, suffix in _ENCODINGS
+                     if (path := safe_join(app.static_folder, filename + suffix)) and os.path.isfile(path)]
+        encoding = request.accept_encodings.best_match(available) if available else None
+        suffix = dict(_ENCODINGS)[encoding] if encoding else ''
+
+        max_age = app.config['ASSET_MAX_AGE']
+        response = send_from_directory(app.static_folder, filename + suffix,
+                                       mimetype=mimetypes.guess_type(filename)[0], max_age=max_age)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        # The name changes whenever the content does, so browsers never need to revalidate
+        response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+        return response
+
+    app.view_functions['static'] = static
+
+
+assets_cli = AppGroup('assets', help='Build fingerprinted static assets.')
+
+
+@assets_cli.command('build')
+def build():
+    """Write hashed copies (plus .gz/.br) of static/ to static/dist and its manifest."""
+    manifest = build_assets(current_app.static_folder)
+    click.echo(f'Built {len(manifest)} asset(s) into {os.path.join(current_app.static_folder, ASSET_DIR)}'
+               + ('' if brotli is not None else ' (no brotli module: .gz only)'))
+    click.echo('Restart the workers to serve them.')
@@ -0,0 +1,222 @@
+"""Fill hostel_db with a reproducible synthetic dataset.
+
+    python -m benchmarks.datagen --students 20000 --years 3 --seed 42
+
+Everything is generated from ``--seed`` and dated relative to ``--as-of``
+(a fixed day, not today) so two runs produce identical data whenever they run.
+Rows are written with chunked ``executemany`` batches against the database
+configured in config.py (use a local MySQL instance, never production).
+IDs continue after the existing maxima unless ``--wipe`` is given.
+"""
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan',
+               'Ananya', 'Diya', 'Priya', 'Sneha', 'Kavya', 'Aadhya', 'Isha', 'Meera', 'Neha', 'Pooja',
+               'Rahul', 'Rohan', 'Karan', 'Amit', 'Vikram', 'Divya', 'Anjali', 'Nisha', 'Riya', 'Tanvi']
+LAST_NAMES = ['Sharma', 'Verma', 'Patel', 'Reddy', 'Nair', 'Iyer', 'Menon', 'Gupta', 'Singh', 'Das',
+              'Mehta', 'Patil', 'Deshmukh', 'Rao', 'Kumar', 'Joshi', 'Kulkarni', 'Shetty', 'Pillai', 'Bose']
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL', 'IT']
+MESS_TYPES = ['Vegetarian', 'Non-Vegetarian', 'Mixed']
+GATES = ['Main', 'East']
+RELATIONS = ['Father', 'Mother', 'Brother', 'Sister', 'Uncle', 'Aunt', 'Cousin', 'Friend']
+
+# Allocation, fee and visit dates count back from this day, so saved baselines stay comparable
+DEFAULT_AS_OF = date(2025, 6, 30)
+
+# Child tables first so a wipe respects the foreign keys
+WIPE_ORDER = ['messmonthly', 'messdaily', 'visitlog', 'visitedby', 'visitor', 'studentphone', 'roomallocation',
+              'fees', 'feebalance', 'student', 'room', 'mess', 'warden']
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert(conn, sql, rows, chunk_size, label):
+    started = time.perf_counter()
+    cur = conn.cursor()
+    for chunk in _chunks(rows, chunk_size):
+        cur.executemany(sql, chunk)
+        conn.commit()
+    cur.close()
+    print(f'  {label:<16} {len(rows):>10,} rows  {time.perf_counter() - started:6.1f}s')
+
+
+def _next_id(cur, table, column, floor):
+    cur.execute(f"SELECT COALESCE(MAX({column}), 0) as m FROM {table}")
+    return max(cur.fetchone()['m'], floor) + 1
+
+
+def generate(conn, students=10000, years=2, visits_per_student=2, seed=42, chunk_size=5000, wipe=False,
+             as_of=DEFAULT_AS_OF):
+    rng = random.Random(seed)
+    cur = conn.cursor()
+
+    if wipe:
+        for table in WIPE_ORDER:
+            cur.execute(f"DELETE FROM {table}")
+        cur.execute("UPDATE feetotals SET PendingAmount = 0, OverdueAmount = 0")
+        conn.commit()
+
+    first_staff = _next_id(cur, 'warden', 'Staff_ID', 1000)
+    first_mess = _next_id(cur, 'mess', 'Mess_ID', 100)
+    first_room = _next_id(cur, 'room', 'Room_ID', 1000)
+    first_student = _next_id(cur, 'student', 'Student_ID', 100000)
+    first_payment = _next_id(cur, 'fees', 'Payment_ID', 100000)
+    cur.close()
+
+    n_wardens = max(10, students // 200)
+    n_mess = max(5, students // 500)
+    print(f'Generating {students:,} students, {n_wardens:,} wardens, {n_mess:,} messes, {years} year(s) of history')
+
+    wardens = [(first_staff + i, f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                f'9{rng.randrange(10 ** 9):09d}') for i in range(n_wardens)]
+    staff_ids = [w[0] for w in wardens]
+
+    mess_capacity = math.ceil(students / n_mess * 1.25)
+    messes = [(first_mess + i, f'Mess {i + 1}', rng.choice(MESS_TYPES), mess_capacity,
+               float(rng.choice([2200, 2300, 2400, 2500, 2600, 2700, 2800, 3000])), rng.choice(staff_ids))
+              for i in range(n_mess)]
+    mess_ids = [m[0] for m in messes]
+
+    # ~10% spare beds so allocation and move-in benchmarks have room to work
+    rooms, beds = [], 0
+    while beds < students * 1.1:
+        room_id = first_room + len(rooms)
+        capacity = rng.choice([1, 2, 2, 3, 3, 4])
+        block = chr(ord('A') + (len(rooms) // 500) % 26)
+        rooms.append([room_id, f'{block}{len(rooms) % 500 + 100}', capacity, 'Available', rng.choice(staff_ids)])
+        beds += capacity
+    for room in rng.sample(rooms, max(1, len(rooms) // 50)):
+        room[3] = 'Under Maintenance'
+
+    student_rows, phone_rows = [], []
+    for i in range(students):
+        sid = first_student + i
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        student_rows.append((sid, first, last, rng.choice(DEPARTMENTS), rng.choice('MF'),
+                             f'{first.lower()}.{last.lower()}{sid}@univ.edu', None, rng.choice(mess_ids)))
+        for _ in range(rng.choice([0, 1, 1, 2])):
+            phone_rows.append((f'{rng.choice("6789")}{rng.randrange(10 ** 9):09d}', sid))
+    phone_rows = list(dict.fromkeys(phone_rows))
+
+    # Allocation history: vacated rooms in earlier years, then one active room
+    open_rooms = [r for r in rooms if r[3] != 'Under Maintenance']
+    free = {r[0]: r[2] for r in open_rooms}
+    room_order = [r[0] for r in open_rooms]
+    history_rows, active_rows = [], []
+    cursor = 0
+    for sid, *_ in student_rows:
+        used = set()
+        for year in range(years, 0, -1):
+            if rng.random() < 0.7:
+                room_id = rng.choice(room_order)
+                if room_id in used:
+                    continue
+                used.add(room_id)
+                start = date(as_of.year - year, 7, 1)
+                history_rows.append((start, date(as_of.year - year + 1, 6, 30), sid, room_id))
+        if rng.random() < 0.95:
+            # Walk the rooms in order so active allocations never exceed capacity
+            for _ in range(len(room_order)):
+                room_id = room_order[cursor % len(room_order)]
+                if free[room_id] > 0 and room_id not in used:
+                    free[room_id] -= 1
+                    active_rows.append((date(as_of.year, 7, 1), None, sid, room_id))
+                    break
+                cursor += 1
+
+    fee_rows = []
+    payment_id = first_payment
+    mess_fee = {m[0]: m[4] for m in messes}
+    for sid, *_rest, mess_id in student_rows:
+        for month_back in range(years * 12, 0, -1):
+            due = (as_of.replace(day=1) - timedelta(days=30 * month_back)).replace(day=1)
+            recent = month_back <= 2
+            status = rng.choice(['Pending', 'Overdue', 'Paid']) if recent else ('Paid' if rng.random() < 0.97 else 'Overdue')
+            fee_rows.append((payment_id, status, mess_fee[mess_id], due, 'Mess', sid))
+            payment_id += 1
+            if due.month in (1, 7):
+                fee_rows.append((payment_id, status, 5000.0 + rng.choice([0, 200, 500]), due, 'Hostel', sid))
+                payment_id += 1
+
+    visitor_rows, visitedby_rows, visitlog_rows = [], [], []
+    for sid, *_ in student_rows:
+        for _ in range(rng.randint(0, visits_per_student * 2)):
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {len(visitor_rows)}'
+            day = as_of - timedelta(days=rng.randrange(365 * years))
+            visitor_rows.append((name, f'9{rng.randrange(10 ** 9):09d}', rng.choice(RELATIONS), day,
+                                 day + timedelta(days=rng.choice([0, 0, 0, 1]))))
+            visitedby_rows.append((name, sid))
+            # Repeat visits by the same person land in the gate log as separate rows
+            for _ in range(rng.choice([1, 1, 2, 3])):
+                check_in = datetime.combine(as_of - timedelta(days=rng.randrange(365 * years)), datetime.min.time()) \
+                    + timedelta(minutes=rng.randrange(8 * 60, 20 * 60))
+                visitlog_rows.append((sid, name, visitor_rows[-1][1], visitor_rows[-1][2], rng.choice(GATES),
+                                      check_in, check_in + timedelta(minutes=rng.randrange(15, 240))))
+
+    started = time.perf_counter()
+    _insert(conn, "INSERT INTO warden (Staff_ID, Name, Ph_no) VALUES (%s, %s, %s)", wardens, chunk_size, 'warden')
+    _insert(conn, "INSERT INTO mess (Mess_ID, Name, Type, Capacity, Fees, Staff_ID) VALUES (%s, %s, %s, %s, %s, %s)",
+            messes, chunk_size, 'mess')
+    _insert(conn, "INSERT INTO room (Room_ID, Room_no, Capacity, Status, Staff_ID) VALUES (%s, %s, %s, %s, %s)",
+            [tuple(r) for r in rooms], chunk_size, 'room')
+    _insert(conn, """INSERT INTO student (Student_ID, FirstName, LastName, Department, Sex, Email, Room_ID, Mess_ID)
+                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""", student_rows, chunk_size, 'student')
+    _insert(conn, "INSERT INTO studentphone (Ph_no, Student_ID) VALUES (%s, %s)", phone_rows, chunk_size, 'studentphone')
+    # History first: the capacity trigger checks every insert, vacated rows don't count
+    _insert(conn, "INSERT INTO roomallocation (AllocationDate, VacateDate, Student_ID, Room_ID) VALUES (%s, %s, %s, %s)",
+            history_rows, chunk_size, 'allocation hist')
+    _insert(conn, "INSERT INTO roomallocation (AllocationDate, VacateDate, Student_ID, Room_ID) VALUES (%s, %s, %s, %s)",
+            active_rows, chunk_size, 'allocation now')
+    _insert(conn, """INSERT INTO fees (Payment_ID, Status, FeesAmount, PaymentDate, Type, Student_ID)
+                     VALUES (%s, %s, %s, %s, %s, %s)""", fee_rows, chunk_size, 'fees')
+    _insert(conn, """INSERT INTO visitor (Visitor_Name, Ph_no, Relation_to_student, VisitDate, OutDate)
+                     VALUES (%s, %s, %s, %s, %s)""", visitor_rows, chunk_size, 'visitor')
+    _insert(conn, "INSERT INTO visitedby (Visitor_Name, Student_ID) VALUES (%s, %s)", visitedby_rows, chunk_size, 'visitedby')
+    _insert(conn, """INSERT INTO visitlog (Student_ID, Visitor_Name, Ph_no, Relation_to_student, Gate, CheckIn, CheckOut)
+                     VALUES (%s, %s, %s, %s, %s, %s, %s)""", visitlog_rows, chunk_size, 'visitlog')
+
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE student s
+        JOIN roomallocation ra ON ra.Student_ID = s.Student_ID AND ra.VacateDate IS NULL
+        SET s.Room_ID = ra.Room_ID
+        WHERE s.Student_ID >= %s
+    """, (first_student,))
+    cur.execute("UPDATE room SET Status = 'Occupied' WHERE Room_ID >= %s AND Occupancy > 0", (first_room,))
+    conn.commit()
+    cur.close()
+    print(f'Done in {time.perf_counter() - started:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=2, help='Years of fee and allocation history.')
+    parser.add_argument('--visits', type=int, default=2, help='Average visitors per student.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--wipe', action='store_true', help='Delete ALL existing rows first.')
+    parser.add_argument('--as-of', type=date.fromisoformat, default=DEFAULT_AS_OF,
+                        help=f'Date the history counts back from (default {DEFAULT_AS_OF}).')
+    args = parser.parse_args()
+
+    from app import app
+    from database_connection import mysql
+    from models.changes import tables_changed, TRACKED_TABLES
+
+    with app.app_context():
+        generate(mysql.connection, students=args.students, years=args.years, visits_per_student=args.visits,
+                 seed=args.seed, chunk_size=args.chunk_size, wipe=args.wipe, as_of=args.as_of)
+        # So ETags and live dashboards of a running server pick up the new data
+        tables_changed(*TRACKED_TABLES)
+
+
+if __name__ == '__main__':
+    main()
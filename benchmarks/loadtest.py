@@ -0,0 +1,179 @@
+"""Drive the real Flask routes with concurrent logged-in sessions.
+
+    python -m benchmarks.loadtest --sessions 16 --duration 30
+    python -m benchmarks.loadtest --save-baseline benchmarks/baseline.json
+    python -m benchmarks.loadtest --baseline benchmarks/baseline.json --max-regression 15
+
+Each session is a Flask test client (no network) that logs in as a random
+student or warden from the database and walks that role's pages. Latency is
+recorded per route and reported as throughput and p50/p95/p99; with
+``--baseline`` the run is compared against a stored result and exits
+non-zero if p95 latency regresses by more than ``--max-regression`` percent.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+STUDENT_ROUTES = ['/student/dashboard', '/student/profile', '/student/room', '/student/mess',
+                  '/student/fees', '/student/visitors']
+ADMIN_ROUTES = ['/admin/dashboard', '/admin/students', '/admin/students?search=sharma', '/admin/rooms',
+                '/admin/mess', '/admin/fees', '/admin/fees?status=Pending']
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(1, math.ceil(pct / 100 * len(sorted_values))) - 1]
+
+
+def _sample_ids(app, mysql, limit=2000):
+    with app.app_context():
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT Student_ID FROM student ORDER BY RAND() LIMIT %s", (limit,))
+        students = [row['Student_ID'] for row in cur.fetchall()]
+        cur.execute("SELECT Staff_ID FROM warden")
+        wardens = [row['Staff_ID'] for row in cur.fetchall()]
+        cur.close()
+    return students, wardens
+
+
+def _session(app, role, user_id, routes, deadline, results, errors, lock, rng):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'user_type': role, 'user_id': user_id, 'password': str(user_id)})
+    if response.status_code >= 400:
+        with lock:
+            errors['login'] += 1
+        return
+
+    samples = defaultdict(list)
+    failures = defaultdict(int)
+    while time.perf_counter() < deadline:
+        route = rng.choice(routes)
+        started = time.perf_counter()
+        response = client.get(route)
+        response.get_data()  # include streaming/rendering in the timing
+        samples[route].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            failures[route] += 1
+
+    with lock:
+        for route, values in samples.items():
+            results[route].extend(values)
+        for route, count in failures.items():
+            errors[route] += count
+
+
+def run(sessions=8, duration=20.0, admin_ratio=0.25, seed=1):
+    from app import app
+    from database_connection import mysql
+
+    # One pooled connection per concurrent session
+    app.config['MYSQL_POOL_MAX_SIZE'] = max(app.config.get('MYSQL_POOL_MAX_SIZE', 10), sessions + 2)
+
+    students, wardens = _sample_ids(app, mysql)
+    if not students or not wardens:
+        raise SystemExit('No students/wardens found; run python -m benchmarks.datagen first.')
+
+    rng = random.Random(seed)
+    results, errors = defaultdict(list), defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    threads = []
+    for i in range(sessions):
+        if rng.random() < admin_ratio:
+            role, user_id, routes = 'admin', rng.choice(wardens), ADMIN_ROUTES
+        else:
+            role, user_id, routes = 'student', rng.choice(students), STUDENT_ROUTES
+        thread = threading.Thread(target=_session, args=(app, role, user_id, routes, deadline, results, errors,
+                                                         lock, random.Random(seed + i)), daemon=True)
+        threads.append(thread)
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {'sessions': sessions, 'duration': round(elapsed, 2), 'routes': {}}
+    for route, values in sorted(results.items()):
+        values.sort()
+        report['routes'][route] = {
+            'requests': len(values),
+            'errors': errors.get(route, 0),
+            'rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(_percentile(values, 50) * 1000, 2),
+            'p95_ms': round(_percentile(values, 95) * 1000, 2),
+            'p99_ms': round(_percentile(values, 99) * 1000, 2),
+        }
+    report['login_errors'] = errors.get('login', 0)
+    return report
+
+
+def print_report(report, baseline=None):
+    print(f"{report['sessions']} sessions, {report['duration']}s")
+    header = f"{'route':<34}{'req':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    if baseline:
+        header += f"{'Δp95':>9}{'Δrps':>9}"
+    print(header)
+    for route, m in report['routes'].items():
+        line = (f"{route:<34}{m['requests']:>8}{m['errors']:>6}{m['rps']:>9}"
+                f"{m['p50_ms']:>9}{m['p95_ms']:>9}{m['p99_ms']:>9}")
+        base = (baseline or {}).get('routes', {}).get(route)
+        if base:
+            line += f"{_delta(m['p95_ms'], base['p95_ms']):>9}{_delta(m['rps'], base['rps']):>9}"
+        print(line)
+
+
+def _delta(now, before):
+    if not before:
+        return 'n/a'
+    return f'{(now - before) / before * 100:+.0f}%'
+
+
+def regressions(report, baseline, max_regression):
+    found = []
+    for route, base in baseline.get('routes', {}).items():
+        now = report['routes'].get(route)
+        if now and base['p95_ms'] and (now['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100 > max_regression:
+            found.append(route)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run.')
+    parser.add_argument('--admin-ratio', type=float, default=0.25, help='Share of sessions logged in as wardens.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--baseline', help='Compare against this stored report.')
+    parser.add_argument('--save-baseline', help='Write this run to a JSON file.')
+    parser.add_argument('--max-regression', type=float, default=20.0, help='Allowed p95 increase in percent.')
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.duration, args.admin_ratio, args.seed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Saved baseline to {args.save_baseline}')
+
+    if baseline:
+        slower = regressions(report, baseline, args.max_regression)
+        if slower:
+            print(f"p95 regressed more than {args.max_regression}% on: {', '.join(slower)}")
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
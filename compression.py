@@ -0,0 +1,86 @@
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are gzip only
+    brotli = None
+
+# text/event-stream is deliberately absent: SSE messages must reach the browser unbuffered
+COMPRESSIBLE_TYPES = {'text/html', 'text/css', 'text/plain', 'text/csv', 'application/json',
+                      'application/javascript', 'application/x-ndjson', 'image/svg+xml'}
+
+
+def _encode(chunk):
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    try:
+        for chunk in chunks:
+            # Sync-flush every chunk so the browser can start on what it has
+            data = compressor.compress(_encode(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _brotli_stream(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    try:
+        for chunk in chunks:
+            data = compressor.process(_encode(chunk)) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def init_compression(app):
+    """gzip/brotli for HTML, JSON and CSV responses, streamed ones included."""
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI_QUALITY', 5)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def _compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        encoding = request.accept_encodings.best_match(offered)
+        if encoding is None:
+            return response
+
+        config = app.config
+        if response.is_streamed:
+            if encoding == 'br':
+                response.response = _brotli_stream(response.response, config['COMPRESS_BROTLI_QUALITY'])
+            else:
+                response.response = _gzip_stream(response.response, config['COMPRESS_LEVEL'])
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(_compress(data, encoding, config))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -5,11 +5,75 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    DEBUG = os.getenv('FLASK_DEBUG', 'false').lower() in ('1', 'true')  # never on in production
     MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'Karthik@2903')
     MYSQL_DB = os.getenv('MYSQL_DB', 'hostel_db')
+    MYSQL_PORT = int(os.getenv('MYSQL_PORT', 3306))
     MYSQL_CURSORCLASS = 'DictCursor'
+
+    # Connection pool (per worker process)
+    MYSQL_POOL_MIN_SIZE = int(os.getenv('MYSQL_POOL_MIN_SIZE', 1))
+    MYSQL_POOL_MAX_SIZE = int(os.getenv('MYSQL_POOL_MAX_SIZE', 10))
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', 5))  # seconds to wait for a free connection
+    MYSQL_POOL_MAX_LIFETIME = int(os.getenv('MYSQL_POOL_MAX_LIFETIME', 1800))  # recycle connections after N seconds
+    MYSQL_POOL_PING = os.getenv('MYSQL_POOL_PING', 'true').lower() == 'true'
+    MYSQL_POOL_RESET = os.getenv('MYSQL_POOL_RESET', 'true').lower() == 'true'
+    # Extra pooled connections one request may borrow to run independent reads side by side
+    # (mysql.fetch_concurrently); only taken when the pool has them idle
+    MYSQL_FANOUT_WORKERS = int(os.getenv('MYSQL_FANOUT_WORKERS', 4))
+
+    # Read replicas for GET requests, as "host[:port],host[:port]" (empty = primary only).
+    # The MySQL user needs REPLICATION CLIENT on them for the lag check.
+    MYSQL_REPLICAS = os.getenv('MYSQL_REPLICAS', '')
+    MYSQL_REPLICA_MAX_LAG = int(os.getenv('MYSQL_REPLICA_MAX_LAG', 5))  # seconds behind before falling back
+    MYSQL_REPLICA_CHECK_INTERVAL = int(os.getenv('MYSQL_REPLICA_CHECK_INTERVAL', 5))
+    MYSQL_REPLICA_RETRY = int(os.getenv('MYSQL_REPLICA_RETRY', 30))  # seconds a failed replica is skipped
+    MYSQL_READ_YOUR_WRITES_SECONDS = int(os.getenv('MYSQL_READ_YOUR_WRITES_SECONDS', 5))
+
+    # Seconds the admin dashboard headline numbers may be served from cache
+    DASHBOARD_STATS_TTL = int(os.getenv('DASHBOARD_STATS_TTL', 30))
+
+    # Seconds a loaded Flask-Login user stays cached per worker. Kept short: User.invalidate
+    # only reaches the worker that ran it, so a deleted account lives this long elsewhere
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 5))
+
+    # Per-worker cache of student portal pages (query results); invalidated through the shared cacheversions table
+    PORTAL_CACHE_MAX_BYTES = int(os.getenv('PORTAL_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    PORTAL_CACHE_TTL = int(os.getenv('PORTAL_CACHE_TTL', 120))
+
+    # Statements slower than this (ms) are logged with their parameters redacted
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 200))
+
+    # Monthly billing run (`flask fees bill`): hostel charge per resident per month, days until due
+    HOSTEL_MONTHLY_FEE = float(os.getenv('HOSTEL_MONTHLY_FEE', 5000.00))
+    FEE_DUE_DAYS = int(os.getenv('FEE_DUE_DAYS', 10))
+
+    # Live dashboard updates (/admin/live): cross-worker change poll and SSE keepalive, in seconds
+    LIVE_POLL_SECONDS = int(os.getenv('LIVE_POLL_SECONDS', 2))
+    LIVE_HEARTBEAT_SECONDS = int(os.getenv('LIVE_HEARTBEAT_SECONDS', 15))
+    # Streams are meant for the gevent server in gunicorn.live.conf.py, which raises this to
+    # its connection limit. On the threaded server each one holds a thread, so the default
+    # caps them at a quarter of GUNICORN_THREADS; extras retry in ~LIVE_BUSY_RETRY_SECONDS
+    LIVE_MAX_SUBSCRIBERS = int(os.getenv('LIVE_MAX_SUBSCRIBERS', max(1, int(os.getenv('GUNICORN_THREADS', 8)) // 4)))
+    LIVE_BUSY_RETRY_SECONDS = int(os.getenv('LIVE_BUSY_RETRY_SECONDS', 10))
+
+    # Gate kiosks posting to /visitor/api/gate/batch, as "gate:token,gate:token"
+    GATE_KIOSK_TOKENS = os.getenv('GATE_KIOSK_TOKENS', '')
+
+    # Mess kitchens reading /mess/api/*, as "mess_id:token,mess_id:token"
+    MESS_KITCHEN_TOKENS = os.getenv('MESS_KITCHEN_TOKENS', '')
+
+    # Compiled templates shared by every worker and kept across restarts (empty = in-memory only)
+    JINJA_BYTECODE_CACHE_DIR = os.getenv('JINJA_BYTECODE_CACHE_DIR',
+                                         os.path.join(os.path.dirname(os.path.abspath(__file__)), '.jinja_cache'))
+
+    # Response compression (brotli is used when the package is installed and the browser accepts it)
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))  # bytes; smaller bodies are sent as-is
+
     SESSION_COOKIE_SECURE = False
     SESSION_COOKIE_HTTPONLY = True
     PERMANENT_SESSION_LIFETIME = 3600
\ No newline at end of file
@@ -1,4 +1,536 @@
-from flask_mysqldb import MySQL
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import MySQLdb
+import MySQLdb.cursors
+from flask import g, has_request_context, request, session
+
+from instrumentation import InstrumentedConnection, record_query
+
+
+class PoolTimeout(MySQLdb.OperationalError):
+    """Raised when no connection could be checked out within MYSQL_POOL_TIMEOUT."""
+
+
+class ConnectionPool:
+    """A small thread-safe pool of MySQLdb connections.
+
+    Connections are handed out per app context and returned at teardown, so a
+    worker keeps at most ``max_size`` sockets open instead of doing a TCP
+    handshake + auth on every request.
+    """
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10, timeout=5.0,
+                 max_lifetime=1800, ping_on_checkout=True, reset_on_return=True):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_on_checkout = ping_on_checkout
+        self.reset_on_return = reset_on_return
+
+        self._idle = deque()          # (connection, created_at)
+        self._created_at = {}         # id(connection) -> created_at, for checked out ones
+        self._size = 0
+        self._cond = threading.Condition()
+
+        # Counters for pool_stats()
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, time.monotonic()))
+            self._size += 1
+
+    def _open(self):
+        conn = MySQLdb.connect(**self.connect_kwargs)
+        self._opened += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._discarded += 1
+
+    def _expired(self, created_at):
+        return self.max_lifetime and time.monotonic() - created_at > self.max_lifetime
+
+    def checkout(self, block=True):
+        # With block=False, returns None instead of waiting when the pool is exhausted
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot, open the socket outside the lock
+                    self._size += 1
+                    conn, created_at = None, None
+                    break
+                if not block:
+                    return None
+
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(2013, f'Timed out after {self.timeout}s waiting for a MySQL connection '
+                                            f'(pool max_size={self.max_size})')
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and self._expired(created_at):
+                self._discard(conn)
+                conn = None
+            if conn is not None and self.ping_on_checkout:
+                try:
+                    conn.ping()
+                except MySQLdb.Error:
+                    self._discard(conn)
+                    conn = None
+            if conn is None:
+                conn = self._open()
+                created_at = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        wait_time = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+            self._created_at[id(conn)] = created_at
+
+        return conn
+
+    def checkin(self, conn, broken=False):
+        with self._cond:
+            created_at = self._created_at.pop(id(conn), time.monotonic())
+
+        if not broken and self.reset_on_return:
+            # Never hand an open transaction (or its locks) to the next request
+            try:
+                conn.rollback()
+            except MySQLdb.Error:
+                broken = True
+
+        with self._cond:
+            if broken or self._expired(created_at):
+                self._size -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at))
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'in_use': self._size - idle,
+                'idle': idle,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_total': round(self._wait_time_total, 6),
+                'wait_time_avg': round(self._wait_time_total / self._checkouts, 6) if self._checkouts else 0.0,
+                'wait_time_max': round(self._wait_time_max, 6),
+                'opened': self._opened,
+                'discarded': self._discarded,
+            }
+
+
+READ_METHODS = ('GET', 'HEAD')
+PRIMARY = 'primary'
+_LAST_WRITE_KEY = '_db_last_write'
+
+
+def _parse_endpoints(value, default_port):
+    # "host[:port],host[:port]" or a list of those -> [(host, port)]
+    if isinstance(value, str):
+        value = value.split(',')
+    endpoints = []
+    for item in value or ():
+        item = str(item).strip()
+        if not item:
+            continue
+        host, sep, port = item.rpartition(':')
+        if not sep:
+            host, port = item, ''
+        endpoints.append((host, int(port) if port else default_port))
+    return endpoints
+
+
+def _fetch(conn, query, params, one):
+    cur = conn.cursor()
+    try:
+        cur.execute(query, params)
+        return cur.fetchone() if one else cur.fetchall()
+    finally:
+        cur.close()
+
+
+def _fetch_timed(conn, query, params, one):
+    started = time.perf_counter()
+    result = _fetch(conn, query, params, one)
+    return result, time.perf_counter() - started
+
+
+class PooledMySQL:
+    """Drop-in replacement for flask_mysqldb.MySQL backed by a ConnectionPool.
+
+    Routes keep using ``mysql.connection``; the first access in an app context
+    checks a connection out of the pool and teardown hands it back.
+
+    With ``MYSQL_REPLICAS`` set, GET/HEAD requests read from a replica pool
+    (round robin) and everything else goes to the primary. A session that
+    just wrote keeps reading from the primary for
+    ``MYSQL_READ_YOUR_WRITES_SECONDS``, and a replica that is unreachable,
+    not replicating or more than ``MYSQL_REPLICA_MAX_LAG`` seconds behind is
+    skipped for ``MYSQL_REPLICA_RETRY`` seconds, falling back to the primary.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._pools = {}
+        self._pools_pid = None
+        self._replicas = []
+        self._health = {}     # replica name -> {'down_until', 'checked_at', 'lag', 'reason'}
+        self._next_replica = 0
+        self._fanout = None
+        self._fanout_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_USER', None)
+        app.config.setdefault('MYSQL_PASSWORD', None)
+        app.config.setdefault('MYSQL_DB', None)
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_CHARSET', 'utf8mb4')
+        app.config.setdefault('MYSQL_CONNECT_TIMEOUT', 10)
+        app.config.setdefault('MYSQL_CURSORCLASS', None)
+        app.config.setdefault('MYSQL_POOL_MIN_SIZE', 1)
+        app.config.setdefault('MYSQL_POOL_MAX_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5.0)
+        app.config.setdefault('MYSQL_POOL_MAX_LIFETIME', 1800)
+        app.config.setdefault('MYSQL_POOL_PING', True)
+        app.config.setdefault('MYSQL_POOL_RESET', True)
+        app.config.setdefault('MYSQL_REPLICAS', [])
+        app.config.setdefault('MYSQL_REPLICA_MAX_LAG', 5)
+        app.config.setdefault('MYSQL_REPLICA_CHECK_INTERVAL', 5)
+        app.config.setdefault('MYSQL_REPLICA_RETRY', 30)
+        app.config.setdefault('MYSQL_READ_YOUR_WRITES_SECONDS', 5)
+        app.config.setdefault('MYSQL_FANOUT_WORKERS', 4)
+
+        self._replicas = [f'{host}:{port}' for host, port in
+                          _parse_endpoints(app.config['MYSQL_REPLICAS'], app.config['MYSQL_PORT'])]
+
+        app.extensions['mysql'] = self
+        app.teardown_appcontext(self.teardown)
+        if self._replicas:
+            app.after_request(self._remember_write)
+
+    def _connect_kwargs(self, endpoint=None):
+        config = self.app.config
+        host, port = endpoint or (config['MYSQL_HOST'], config['MYSQL_PORT'])
+        kwargs = {
+            'host': host,
+            'port': port,
+            'charset': config['MYSQL_CHARSET'],
+            'connect_timeout': config['MYSQL_CONNECT_TIMEOUT'],
+            'autocommit': False,
+        }
+        if config['MYSQL_USER']:
+            kwargs['user'] = config['MYSQL_USER']
+        if config['MYSQL_PASSWORD']:
+            kwargs['passwd'] = config['MYSQL_PASSWORD']
+        if config['MYSQL_DB']:
+            kwargs['db'] = config['MYSQL_DB']
+        if config['MYSQL_CURSORCLASS']:
+            kwargs['cursorclass'] = getattr(MySQLdb.cursors, config['MYSQL_CURSORCLASS'])
+        if endpoint is not None:
+            # A handler that writes on a GET fails loudly instead of diverging the replica
+            kwargs['init_command'] = 'SET SESSION TRANSACTION READ ONLY'
+        return kwargs
+
+    def _pool_for(self, name):
+        # Sockets must not be shared across fork(), so each worker process
+        # lazily builds its own pools.
+        pid = os.getpid()
+        if self._pools_pid != pid:
+            with self._lock:
+                if self._pools_pid != pid:
+                    self._pools = {}
+                    self._health = {}
+                    self._pools_pid = pid
+
+        pool = self._pools.get(name)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(name)
+                if pool is None:
+                    config = self.app.config
+                    endpoint = None if name == PRIMARY else _parse_endpoints(name, config['MYSQL_PORT'])[0]
+                    pool = ConnectionPool(
+                        self._connect_kwargs(endpoint),
+                        min_size=config['MYSQL_POOL_MIN_SIZE'],
+                        max_size=config['MYSQL_POOL_MAX_SIZE'],
+                        timeout=config['MYSQL_POOL_TIMEOUT'],
+                        max_lifetime=config['MYSQL_POOL_MAX_LIFETIME'],
+                        ping_on_checkout=config['MYSQL_POOL_PING'],
+                        reset_on_return=config['MYSQL_POOL_RESET'],
+                    )
+                    self._pools[name] = pool
+        return pool
+
+    @property
+    def pool(self):
+        return self._pool_for(PRIMARY)
+
+    def use_primary(self):
+        # For GET handlers that must see their own or just-committed writes;
+        # call before the first use of ``connection`` in the request
+        g._mysql_use_primary = True
+
+    def _wants_replica(self):
+        if not self._replicas or not has_request_context():
+            return False
+        if request.method not in READ_METHODS or g.get('_mysql_use_primary'):
+            return False
+        last_write = session.get(_LAST_WRITE_KEY)
+        return not (last_write and time.time() - last_write < self.app.config['MYSQL_READ_YOUR_WRITES_SECONDS'])
+
+    def _replica_health(self, name):
+        return self._health.setdefault(name, {'down_until': 0.0, 'checked_at': 0.0, 'lag': None, 'reason': None})
+
+    def _mark_down(self, name, reason):
+        health = self._replica_health(name)
+        health['down_until'] = time.monotonic() + self.app.config['MYSQL_REPLICA_RETRY']
+        health['checked_at'] = 0.0
+        health['reason'] = reason
+        self.app.logger.warning('MySQL replica %s skipped for %ss: %s',
+                                   name, self.app.config['MYSQL_REPLICA_RETRY'], reason)
+
+    def _replication_lag(self, conn):
+        """Seconds behind the source; None when replication is not running."""
+        cur = conn.cursor(MySQLdb.cursors.DictCursor)
+        try:
+            try:
+                cur.execute("SHOW REPLICA STATUS")
+                key = 'Seconds_Behind_Source'
+            except MySQLdb.ProgrammingError:
+                # Servers older than 8.0.22
+                cur.execute("SHOW SLAVE STATUS")
+                key = 'Seconds_Behind_Master'
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        if row is None:
+            # Not configured as a replica (e.g. a second local instance loaded
+            # from the same dump): nothing to measure
+            return 0
+        return row.get(key)
+
+    def _replica_usable(self, name, conn):
+        config = self.app.config
+        health = self._replica_health(name)
+        now = time.monotonic()
+        if now - health['checked_at'] < config['MYSQL_REPLICA_CHECK_INTERVAL']:
+            return True
+
+        lag = self._replication_lag(conn)
+        health['lag'] = lag
+        if lag is None:
+            self._mark_down(name, 'replication stopped')
+            return False
+        if lag > config['MYSQL_REPLICA_MAX_LAG']:
+            self._mark_down(name, f'{lag}s behind')
+            return False
+        health['checked_at'] = now
+        health['reason'] = None
+        return True
+
+    def _checkout_replica(self):
+        now = time.monotonic()
+        healthy = [name for name in self._replicas if self._replica_health(name)['down_until'] <= now]
+        if not healthy:
+            return None
+
+        with self._lock:
+            start = self._next_replica
+            self._next_replica += 1
+        for offset in range(len(healthy)):
+            name = healthy[(start + offset) % len(healthy)]
+            try:
+                pool = self._pool_for(name)
+                conn = pool.checkout()
+            except MySQLdb.Error as e:
+                self._mark_down(name, f'unreachable ({e})')
+                continue
+            try:
+                usable = self._replica_usable(name, conn)
+            except MySQLdb.Error as e:
+                pool.checkin(conn, broken=True)
+                self._mark_down(name, f'status check failed ({e})')
+                continue
+            if usable:
+                return name, pool, conn
+            pool.checkin(conn)
+        return None
+
+    @property
+    def connection(self):
+        if '_mysql_conn' not in g:
+            checked_out = self._checkout_replica() if self._wants_replica() else None
+            if checked_out is None:
+                checked_out = (PRIMARY, self.pool, self.pool.checkout())
+            g._mysql_target, g._mysql_pool, g._mysql_conn = checked_out
+            # Cursors from this proxy are timed per request (see instrumentation.py)
+            g._mysql_conn_proxy = InstrumentedConnection(g._mysql_conn)
+        return g._mysql_conn_proxy
+
+    @property
+    def target(self):
+        # 'primary' or the replica serving this context (None before first use)
+        return g.get('_mysql_target')
+
+    def _remember_write(self, response):
+        # Reads after a write in this session stay on the primary for a while
+        if request.method not in READ_METHODS and g.get('_mysql_target') == PRIMARY:
+            session[_LAST_WRITE_KEY] = time.time()
+        return response
+
+    def discard_connection(self):
+        # Drop this context's connection instead of returning it to the pool
+        # (e.g. an unbuffered result set was abandoned half-way through)
+        if '_mysql_conn' in g:
+            g._mysql_conn_broken = True
+
+    def teardown(self, exception):
+        conn = g.pop('_mysql_conn', None)
+        pool = g.pop('_mysql_pool', None)
+        g.pop('_mysql_conn_proxy', None)
+        g.pop('_mysql_target', None)
+        broken = g.pop('_mysql_conn_broken', False)
+        if conn is not None:
+            pool.checkin(conn, broken=broken)
+
+    def _fanout_executor(self):
+        # Threads don't survive fork(), so like the pools this is per process
+        pid = os.getpid()
+        if self._fanout_pid != pid:
+            with self._lock:
+                if self._fanout_pid != pid:
+                    self._fanout = ThreadPoolExecutor(max_workers=self.app.config['MYSQL_FANOUT_WORKERS'],
+                                                      thread_name_prefix='mysql-fanout')
+                    self._fanout_pid = pid
+        return self._fanout
+
+    def fetch_concurrently(self, *queries):
+        """Run independent read queries at the same time; returns their results in order.
+
+        Each query is ``(sql,)``, ``(sql, params)`` or ``(sql, params, 'one')``
+        (fetchone instead of fetchall). The first runs on this context's
+        connection while the others run on a small thread pool, each on an
+        extra connection borrowed from the same pool (primary, or the replica
+        serving this request). Extra connections are only taken when the pool
+        has one to spare right away; queries left without one run here after
+        the first, so a busy worker just falls back to running them in turn.
+        The queries see separate snapshots, so only batch reads that do not
+        depend on each other.
+        """
+        queries = [(query[0], tuple(query[1]) if len(query) > 1 else (), len(query) > 2 and query[2] == 'one')
+                   for query in queries]
+        main = self.connection
+        pool = g._mysql_pool
+
+        extras = []
+        while len(extras) < min(len(queries) - 1, self.app.config['MYSQL_FANOUT_WORKERS']):
+            try:
+                conn = pool.checkout(block=False)
+            except MySQLdb.Error:
+                conn = None
+            if conn is None:
+                break
+            extras.append(conn)
+
+        executor = self._fanout_executor() if extras else None
+        futures = [executor.submit(_fetch_timed, conn, *query) for conn, query in zip(extras, queries[1:])]
+        results = [None] * len(queries)
+        try:
+            for index in [0] + list(range(len(extras) + 1, len(queries))):
+                results[index] = _fetch(main, *queries[index])
+            for index, future in enumerate(futures, start=1):
+                results[index], elapsed = future.result()
+                # Timed in the worker thread, recorded here where the request context is
+                record_query(queries[index][0], queries[index][1], elapsed)
+        finally:
+            wait(futures)
+            for conn, future in zip(extras, futures):
+                pool.checkin(conn, broken=future.exception() is not None)
+        return results
+
+    def warm_up(self):
+        # Build this process's pools (MYSQL_POOL_MIN_SIZE connections each) now
+        # rather than on the first request; an unreachable replica is just skipped
+        stats = self.pool.stats()
+        for name in self._replicas:
+            try:
+                self._pool_for(name)
+            except MySQLdb.Error as e:
+                self._mark_down(name, str(e))
+        return stats
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    def replica_stats(self):
+        now = time.monotonic()
+        stats = {}
+        for name in self._replicas:
+            health = self._replica_health(name)
+            pool = self._pools.get(name)
+            stats[name] = {
+                'healthy': health['down_until'] <= now,
+                'lag': health['lag'],
+                'reason': health['reason'],
+                'pool': pool.stats() if pool is not None else None,
+            }
+        return stats
+
 
 # Initialize MySQL globally, but without the app yet.
-mysql = MySQL()
\ No newline at end of file
+mysql = PooledMySQL()
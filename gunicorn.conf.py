@@ -0,0 +1,31 @@
+# gunicorn settings for production (see README "Running the Server").
+# Every value can be overridden from the environment.
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+wsgi_app = 'wsgi:app'
+
+# Prefork workers, each with a thread pool; the app is loaded in the master first
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))   # /admin/live belongs on gunicorn.live.conf.py
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))   # in-flight requests finish on restart
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers one at a time so a slow leak never needs a full restart
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Connection pools are per process, so they can only be opened after the fork
+    from warmup import warm_worker
+    from wsgi import app
+    warm_worker(app)
@@ -0,0 +1,33 @@
+# gunicorn settings for the /admin/live event streams (see README "Running the Server").
+# Route /admin/live to LIVE_BIND at the load balancer; everything else stays on
+# gunicorn.conf.py. Every value can be overridden from the environment.
+import os
+
+bind = os.getenv('LIVE_BIND', '0.0.0.0:8001')
+wsgi_app = 'wsgi:app'
+
+# An open dashboard is a greenlet here, not one of the main server's threads, so a
+# couple of workers hold hundreds of streams; each runs one tablechanges poll
+workers = int(os.getenv('LIVE_WORKERS', 2))
+worker_class = 'gevent'
+worker_connections = int(os.getenv('LIVE_WORKER_CONNECTIONS', 1000))
+# gevent patches threading and sockets when the worker starts; the app (with its
+# locks and queues) must be imported after that, so no preloading in the master
+preload_app = False
+
+# Read by config.py when the workers load the app; leaves connections for /readyz etc.
+os.environ.setdefault('LIVE_MAX_SUBSCRIBERS', str(max(1, worker_connections - 50)))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # Runs after gevent has patched the worker and loaded the app
+    from warmup import warm_worker
+    from wsgi import app
+    warm_worker(app)
@@ -4,6 +4,9 @@
 -- and the custom functions, procedures, and triggers.
 -- ============================================================
 
+-- Fresh installs only; existing databases are upgraded with
+-- `flask db upgrade` (see migrations/).
+
 -- 1. DATABASE CREATION
 CREATE DATABASE IF NOT EXISTS hostel_db;
 USE hostel_db;
@@ -26,6 +29,7 @@ CREATE TABLE mess (
     Capacity INT DEFAULT NULL,
     Fees DECIMAL(10,2) DEFAULT NULL,
     Staff_ID INT DEFAULT NULL,
+    Headcount INT NOT NULL DEFAULT 0, -- students on this mess, maintained by the student triggers
     PRIMARY KEY (Mess_ID),
     KEY Staff_ID (Staff_ID),
     CONSTRAINT mess_ibfk_1 FOREIGN KEY (Staff_ID) 
@@ -39,8 +43,10 @@ CREATE TABLE room (
     Capacity INT DEFAULT NULL,
     Status VARCHAR(20) DEFAULT NULL,
     Staff_ID INT DEFAULT NULL,
+    Occupancy INT NOT NULL DEFAULT 0, -- active allocations, maintained by the roomallocation triggers
     PRIMARY KEY (Room_ID),
     KEY Staff_ID (Staff_ID),
+    KEY Room_no (Room_no), -- room number prefix search
     CONSTRAINT room_ibfk_1 FOREIGN KEY (Staff_ID) 
         REFERENCES warden (Staff_ID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -58,6 +64,8 @@ CREATE TABLE student (
     PRIMARY KEY (Student_ID),
     KEY Room_ID (Room_ID),
     KEY Mess_ID (Mess_ID),
+    -- Admin student search (n-gram so partial names like 'ami' still match)
+    FULLTEXT KEY ft_student_search (FirstName, LastName, Department, Email) WITH PARSER ngram,
     CONSTRAINT student_ibfk_1 FOREIGN KEY (Room_ID) 
         REFERENCES room (Room_ID),
     CONSTRAINT student_ibfk_2 FOREIGN KEY (Mess_ID) 
@@ -72,12 +80,50 @@ CREATE TABLE fees (
     PaymentDate DATE DEFAULT NULL,
     Type VARCHAR(20) DEFAULT NULL,
     Student_ID INT DEFAULT NULL,
+    BillingPeriod DATE DEFAULT NULL, -- first day of the month for charges created by the billing run
     PRIMARY KEY (Payment_ID),
+    UNIQUE KEY Student_Type_Period (Student_ID, Type, BillingPeriod),
     KEY Student_ID (Student_ID),
+    KEY Student_Status (Student_ID, Status),
+    KEY Student_PaymentDate (Student_ID, PaymentDate),
+    KEY Status_PaymentDate (Status, PaymentDate),
+    KEY Status_Payment (Status, Payment_ID),
+    KEY PaymentDate (PaymentDate),
     CONSTRAINT fees_ibfk_1 FOREIGN KEY (Student_ID) 
         REFERENCES student (Student_ID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- BILLINGRUN Table (one row per billed month, see `flask fees bill`)
+CREATE TABLE billingrun (
+    Period DATE NOT NULL,
+    Runs INT NOT NULL DEFAULT 0,
+    MessCharges INT NOT NULL DEFAULT 0,
+    HostelCharges INT NOT NULL DEFAULT 0,
+    OverdueFlipped INT NOT NULL DEFAULT 0,
+    DurationMs INT DEFAULT NULL,
+    LastRunAt DATETIME DEFAULT NULL,
+    PRIMARY KEY (Period)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- FEEBALANCE Table (running per-student totals, maintained by the fees triggers)
+CREATE TABLE feebalance (
+    Student_ID INT NOT NULL,
+    PendingAmount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    OverdueAmount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    LastPaymentDate DATE DEFAULT NULL,
+    PRIMARY KEY (Student_ID),
+    CONSTRAINT feebalance_ibfk_1 FOREIGN KEY (Student_ID) 
+        REFERENCES student (Student_ID) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- FEETOTALS Table (single row of hostel-wide totals for the admin dashboard)
+CREATE TABLE feetotals (
+    Totals_ID TINYINT NOT NULL,
+    PendingAmount DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    OverdueAmount DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Totals_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- VISITOR Table
 CREATE TABLE visitor (
     Visitor_Name VARCHAR(50) NOT NULL,
@@ -85,7 +131,8 @@ CREATE TABLE visitor (
     Relation_to_student VARCHAR(50) DEFAULT NULL,
     VisitDate DATE DEFAULT NULL,
     OutDate DATE DEFAULT NULL,
-    PRIMARY KEY (Visitor_Name, Ph_no)
+    PRIMARY KEY (Visitor_Name, Ph_no),
+    KEY VisitDate (VisitDate)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- VISITEDBY Table
@@ -94,12 +141,34 @@ CREATE TABLE visitedby (
     Student_ID INT NOT NULL,
     PRIMARY KEY (Visitor_Name, Student_ID),
     KEY Student_ID (Student_ID),
+    KEY Student_Visitor (Student_ID, Visitor_Name),
     CONSTRAINT visitedby_ibfk_1 FOREIGN KEY (Visitor_Name) 
         REFERENCES visitor (Visitor_Name),
     CONSTRAINT visitedby_ibfk_2 FOREIGN KEY (Student_ID) 
         REFERENCES student (Student_ID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- VISITLOG Table (append-only gate log, one row per visit)
+CREATE TABLE visitlog (
+    Visit_ID BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    Student_ID INT NOT NULL,
+    Visitor_Name VARCHAR(50) NOT NULL,
+    Ph_no VARCHAR(15) NOT NULL,
+    Relation_to_student VARCHAR(50) DEFAULT NULL,
+    Gate VARCHAR(20) DEFAULT NULL,
+    Client_Ref VARCHAR(64) DEFAULT NULL,
+    CheckIn DATETIME NOT NULL,
+    CheckOut DATETIME DEFAULT NULL,
+    PRIMARY KEY (Visit_ID),
+    UNIQUE KEY Gate_ClientRef (Gate, Client_Ref),
+    KEY Student_CheckIn (Student_ID, CheckIn),
+    KEY CheckIn (CheckIn),
+    KEY Inside (CheckOut, CheckIn, Gate),
+    KEY ClientRef_Open (Client_Ref, CheckOut),
+    CONSTRAINT visitlog_ibfk_1 FOREIGN KEY (Student_ID) 
+        REFERENCES student (Student_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- STUDENTPHONE Table
 CREATE TABLE studentphone (
     Ph_no VARCHAR(15) NOT NULL,
@@ -118,28 +187,140 @@ CREATE TABLE roomallocation (
     Room_ID INT NOT NULL,
     PRIMARY KEY (Student_ID, Room_ID),
     KEY Room_ID (Room_ID),
+    KEY Room_Vacate (Room_ID, VacateDate),
     CONSTRAINT roomallocation_ibfk_1 FOREIGN KEY (Student_ID) 
         REFERENCES student (Student_ID),
     CONSTRAINT roomallocation_ibfk_2 FOREIGN KEY (Room_ID) 
         REFERENCES room (Room_ID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- STUDENT_ARCHIVE Table (graduated/inactive students moved out by `flask admin archive-students`)
+CREATE TABLE student_archive (
+    Student_ID INT NOT NULL,
+    FirstName VARCHAR(50) DEFAULT NULL,
+    LastName VARCHAR(50) DEFAULT NULL,
+    Department VARCHAR(50) DEFAULT NULL,
+    Sex CHAR(1) DEFAULT NULL,
+    Email VARCHAR(100) DEFAULT NULL,
+    Mess_ID INT DEFAULT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Student_ID),
+    KEY ArchivedAt (ArchivedAt),
+    FULLTEXT KEY ft_student_archive_search (FirstName, LastName, Department, Email) WITH PARSER ngram
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- FEES_ARCHIVE Table
+CREATE TABLE fees_archive (
+    Payment_ID INT NOT NULL,
+    Status VARCHAR(20) DEFAULT NULL,
+    FeesAmount DECIMAL(10,2) DEFAULT NULL,
+    PaymentDate DATE DEFAULT NULL,
+    Type VARCHAR(20) DEFAULT NULL,
+    Student_ID INT DEFAULT NULL,
+    BillingPeriod DATE DEFAULT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Payment_ID),
+    KEY Student_PaymentDate (Student_ID, PaymentDate)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ROOMALLOCATION_ARCHIVE Table
+CREATE TABLE roomallocation_archive (
+    AllocationDate DATE DEFAULT NULL,
+    VacateDate DATE DEFAULT NULL,
+    Student_ID INT NOT NULL,
+    Room_ID INT NOT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Student_ID, Room_ID),
+    KEY Room_ID (Room_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- STUDENTPHONE_ARCHIVE Table
+CREATE TABLE studentphone_archive (
+    Ph_no VARCHAR(15) NOT NULL,
+    Student_ID INT NOT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Ph_no, Student_ID),
+    KEY Student_ID (Student_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- VISITEDBY_ARCHIVE Table
+CREATE TABLE visitedby_archive (
+    Visitor_Name VARCHAR(50) NOT NULL,
+    Student_ID INT NOT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Visitor_Name, Student_ID),
+    KEY Student_ID (Student_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- VISITLOG_ARCHIVE Table
+CREATE TABLE visitlog_archive (
+    Visit_ID BIGINT UNSIGNED NOT NULL,
+    Student_ID INT NOT NULL,
+    Visitor_Name VARCHAR(50) NOT NULL,
+    Ph_no VARCHAR(15) NOT NULL,
+    Relation_to_student VARCHAR(50) DEFAULT NULL,
+    Gate VARCHAR(20) DEFAULT NULL,
+    Client_Ref VARCHAR(64) DEFAULT NULL,
+    CheckIn DATETIME NOT NULL,
+    CheckOut DATETIME DEFAULT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Visit_ID),
+    KEY Student_CheckIn (Student_ID, CheckIn)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- MESSDAILY Table (one snapshot per mess per day, written by `flask mess rollup`)
+CREATE TABLE messdaily (
+    Day DATE NOT NULL,
+    Mess_ID INT NOT NULL,
+    Headcount INT NOT NULL DEFAULT 0,
+    Capacity INT DEFAULT NULL,
+    Revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Day, Mess_ID),
+    KEY Mess_Day (Mess_ID, Day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- MESSMONTHLY Table (messdaily folded per month)
+CREATE TABLE messmonthly (
+    Month DATE NOT NULL,
+    Mess_ID INT NOT NULL,
+    Days INT NOT NULL DEFAULT 0,
+    AvgHeadcount DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    MaxHeadcount INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Month, Mess_ID),
+    KEY Mess_Month (Mess_ID, Month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- TABLECHANGES Table (per-table change version, bumped by the application after each commit)
+CREATE TABLE tablechanges (
+    TableName VARCHAR(64) NOT NULL,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ChangedAt DATETIME(6) NOT NULL,
+    PRIMARY KEY (TableName)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- CACHEVERSIONS Table (scope versions shared by every worker's student portal cache)
+CREATE TABLE cacheversions (
+    Scope VARCHAR(32) NOT NULL,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (Scope)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 3. DML (INSERT SAMPLE DATA)
 
 INSERT INTO warden VALUES
 (101,'Ravi Kumar','9876543210'), (102,'Anjali Mehta','9823014576'), (103,'Vikram Singh','9867452390'), (104,'Sneha Nair','9812345678'), (105,'Arjun Patel','9890054321'), (106,'Priya Sharma','9834567890'), (107,'Rahul Das','9845098765'), (108,'Neha Reddy','9887766554'), (109,'Karan Verma','9876001234'), (110,'Meera Iyer','9822099999');
 
-INSERT INTO mess VALUES
+INSERT INTO mess (Mess_ID, Name, Type, Capacity, Fees, Staff_ID) VALUES
 (1,'Annapurna Mess','Vegetarian',120,2500.00,101), (2,'Gourmet Hub','Non-Vegetarian',100,2800.00,102), (3,'Healthy Bites','Vegetarian',80,2300.00,103), (4,'Spice Delight','Non-Vegetarian',90,2700.00,104), (5,'Green Leaf','Vegetarian',110,2400.00,105), (6,'Royal Feast','Non-Vegetarian',150,3000.00,106), (7,'Campus Tiffins','Vegetarian',75,2200.00,107), (8,'Daily Dine','Mixed',130,2600.00,108), (9,'Savory Spot','Vegetarian',95,2350.00,109), (10,'Flavors Corner','Non-Vegetarian',85,2750.00,110);
 
-INSERT INTO room VALUES
+INSERT INTO room (Room_ID, Room_no, Capacity, Status, Staff_ID) VALUES
 (1,'A101',2,'Occupied',101), (2,'A102',2,'Available',101), (3,'A103',3,'Under Maintenance',102), (4,'B201',2,'Occupied',103), (5,'B202',1,'Available',104), (6,'B203',2,'Occupied',105), (7,'C301',3,'Occupied',106), (8,'C302',2,'Occupied',107), (9,'D401',1,'Under Maintenance',108), (10,'D402',2,'Available',109);
 
 INSERT INTO student VALUES
 (201,'Amit','Sharma','CSE','M','amit.sharma@univ.edu',6,1), (202,'Priya','Menon','ECE','F','priya.menon@univ.edu',2,3), (203,'Rohan','Verma','MECH','M','rohan.verma@univ.edu',7,2), (204,'Sneha','Patil','IT','F','sneha.patil@univ.edu',1,4), (205,'Kiran','Reddy','CIVIL','M','kiran.reddy@univ.edu',3,5), (206,'Neha','Gupta','EEE','F','neha.gupta@univ.edu',7,7), (207,'Rahul','Nair','CSE','M','rahul.nair@univ.edu',8,6), (208,'Divya','Iyer','ECE','F','divya.iyer@univ.edu',9,8), (209,'Vivek','Singh','MECH','M','vivek.singh@univ.edu',1,9), (210,'Anjali','Deshmukh','IT','F','anjali.deshmukh@univ.edu',3,10);
 
-INSERT INTO fees VALUES
+INSERT INTO fees (Payment_ID, Status, FeesAmount, PaymentDate, Type, Student_ID) VALUES
 (301,'Paid',2500.00,'2025-01-15','Mess',201), (302,'Paid',5000.00,'2025-01-16','Hostel',202), (303,'Pending',2300.00,'2025-02-01','Mess',203), (304,'Paid',2700.00,'2025-02-10','Mess',204), (305,'Paid',5200.00,'2025-02-20','Hostel',205), (306,'Overdue',2400.00,'2025-03-01','Mess',206), (307,'Paid',2600.00,'2025-03-05','Mess',207), (308,'Pending',2750.00,'2025-03-15','Mess',208), (309,'Paid',5000.00,'2025-03-25','Hostel',209), (310,'Paid',2350.00,'2025-04-01','Mess',210);
 
 INSERT INTO visitor VALUES
@@ -148,12 +329,55 @@ INSERT INTO visitor VALUES
 INSERT INTO visitedby VALUES
 ('Gopal Sharma',201), ('Sunita Menon',202), ('Ajay Verma',203), ('Kavita Patil',204), ('Neha Deshmukh',204), ('Rajesh Reddy',205), ('Pooja Gupta',206), ('Nikhil Nair',207), ('Preeti Iyer',208), ('Manish Singh',209);
 
+INSERT INTO visitlog (Student_ID, Visitor_Name, Ph_no, Relation_to_student, CheckIn, CheckOut)
+SELECT vb.Student_ID, v.Visitor_Name, v.Ph_no, v.Relation_to_student, v.VisitDate, v.OutDate
+FROM visitedby vb
+JOIN visitor v ON v.Visitor_Name = vb.Visitor_Name
+ORDER BY v.VisitDate;
+
 INSERT INTO studentphone VALUES
 ('8123456789',201),('9876543210',201), ('9000111222',202),('9998887776',202), ('9012301234',205),('7000700070',206), ('9900990099',207),('9517538520',208), ('7654321098',210),('8888877777',210);
 
 INSERT INTO roomallocation VALUES
 ('2024-07-01','2025-06-30',201,2), ('2025-10-10',NULL,201,5), ('2025-08-19',NULL,201,6), ('2024-07-01','2025-06-30',202,2), ('2024-07-01','2025-06-30',203,7), ('2024-07-01','2025-06-30',204,1), ('2024-07-01','2025-06-30',205,3), ('2024-07-01','2025-06-30',206,7), ('2024-07-01','2025-06-30',207,8), ('2024-07-01','2025-06-30',208,9), ('2025-06-30',NULL,209,1), ('2024-07-01','2025-06-30',209,10), ('2025-01-01','2025-06-30',210,3);
 
+-- Seed the occupancy counters from the sample allocations (triggers are not created yet)
+UPDATE room r
+LEFT JOIN (
+    SELECT Room_ID, COUNT(*) AS n
+    FROM roomallocation
+    WHERE VacateDate IS NULL
+    GROUP BY Room_ID
+) a ON a.Room_ID = r.Room_ID
+SET r.Occupancy = COALESCE(a.n, 0);
+
+-- Seed the mess headcounts from the sample students (triggers are not created yet)
+UPDATE mess m
+LEFT JOIN (
+    SELECT Mess_ID, COUNT(*) AS n
+    FROM student
+    WHERE Mess_ID IS NOT NULL
+    GROUP BY Mess_ID
+) s ON s.Mess_ID = m.Mess_ID
+SET m.Headcount = COALESCE(s.n, 0);
+
+-- Seed the fee balances from the sample fees (triggers are not created yet)
+INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount, LastPaymentDate)
+SELECT Student_ID,
+       COALESCE(SUM(CASE WHEN Status = 'Pending' THEN FeesAmount END), 0),
+       COALESCE(SUM(CASE WHEN Status = 'Overdue' THEN FeesAmount END), 0),
+       MAX(CASE WHEN Status = 'Paid' THEN PaymentDate END)
+FROM fees
+WHERE Student_ID IS NOT NULL
+GROUP BY Student_ID;
+
+INSERT INTO feetotals (Totals_ID, PendingAmount, OverdueAmount)
+SELECT 1, COALESCE(SUM(PendingAmount), 0), COALESCE(SUM(OverdueAmount), 0)
+FROM feebalance;
+
+INSERT INTO tablechanges (TableName, Version, ChangedAt) VALUES
+('student', 1, UTC_TIMESTAMP(6)), ('room', 1, UTC_TIMESTAMP(6)), ('mess', 1, UTC_TIMESTAMP(6)), ('warden', 1, UTC_TIMESTAMP(6)), ('fees', 1, UTC_TIMESTAMP(6));
+
 -- 4. DATABASE LOGIC (TRIGGER, FUNCTION, PROCEDURE)
 
 DELIMITER ;;
@@ -164,16 +388,14 @@ BEFORE INSERT ON roomallocation
 FOR EACH ROW
 BEGIN
     DECLARE current_occupancy INT DEFAULT 0;
-    DECLARE room_capacity INT DEFAULT 0;
+    DECLARE room_capacity INT DEFAULT NULL;
 
-    SELECT COUNT(*) INTO current_occupancy
-    FROM RoomAllocation
+    -- Read the maintained counter (and lock the room row so concurrent
+    -- allocations to the same room are serialized)
+    SELECT Capacity, Occupancy INTO room_capacity, current_occupancy
+    FROM room
     WHERE Room_ID = NEW.Room_ID
-      AND VacateDate IS NULL;
-
-    SELECT Capacity INTO room_capacity
-    FROM ROOM
-    WHERE Room_ID = NEW.Room_ID;
+    FOR UPDATE;
 
     IF room_capacity IS NULL THEN
         SIGNAL SQLSTATE '45000'
@@ -186,16 +408,115 @@ BEGIN
     END IF;
 END ;;
 
+-- TRIGGERS: keep room.Occupancy in step with active (VacateDate IS NULL) allocations
+CREATE TRIGGER after_room_allocation_insert
+AFTER INSERT ON roomallocation
+FOR EACH ROW
+BEGIN
+    IF NEW.VacateDate IS NULL THEN
+        UPDATE room SET Occupancy = Occupancy + 1 WHERE Room_ID = NEW.Room_ID;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_room_allocation_update
+AFTER UPDATE ON roomallocation
+FOR EACH ROW
+BEGIN
+    IF OLD.VacateDate IS NULL AND (NEW.VacateDate IS NOT NULL OR NEW.Room_ID <> OLD.Room_ID) THEN
+        UPDATE room SET Occupancy = GREATEST(Occupancy - 1, 0) WHERE Room_ID = OLD.Room_ID;
+    END IF;
+    IF NEW.VacateDate IS NULL AND (OLD.VacateDate IS NOT NULL OR NEW.Room_ID <> OLD.Room_ID) THEN
+        UPDATE room SET Occupancy = Occupancy + 1 WHERE Room_ID = NEW.Room_ID;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_room_allocation_delete
+AFTER DELETE ON roomallocation
+FOR EACH ROW
+BEGIN
+    IF OLD.VacateDate IS NULL THEN
+        UPDATE room SET Occupancy = GREATEST(Occupancy - 1, 0) WHERE Room_ID = OLD.Room_ID;
+    END IF;
+END ;;
+
+-- PROCEDURE: CheckMessCapacity (locks the mess row so concurrent joins are serialized)
+CREATE PROCEDURE CheckMessCapacity(IN mess_id_in INT)
+BEGIN
+    DECLARE mess_capacity INT DEFAULT NULL;
+    DECLARE mess_headcount INT DEFAULT 0;
+
+    SELECT Capacity, Headcount INTO mess_capacity, mess_headcount
+    FROM mess
+    WHERE Mess_ID = mess_id_in
+    FOR UPDATE;
+
+    IF mess_capacity IS NOT NULL AND mess_headcount >= mess_capacity THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Mess capacity reached. Cannot add more students.';
+    END IF;
+END ;;
+
+CREATE TRIGGER before_student_insert
+BEFORE INSERT ON student
+FOR EACH ROW
+BEGIN
+    IF NEW.Mess_ID IS NOT NULL THEN
+        CALL CheckMessCapacity(NEW.Mess_ID);
+    END IF;
+END ;;
+
+CREATE TRIGGER before_student_update
+BEFORE UPDATE ON student
+FOR EACH ROW
+BEGIN
+    IF NEW.Mess_ID IS NOT NULL AND NOT (NEW.Mess_ID <=> OLD.Mess_ID) THEN
+        CALL CheckMessCapacity(NEW.Mess_ID);
+    END IF;
+END ;;
+
+-- TRIGGERS: keep mess.Headcount in step with student.Mess_ID
+CREATE TRIGGER after_student_insert
+AFTER INSERT ON student
+FOR EACH ROW
+BEGIN
+    IF NEW.Mess_ID IS NOT NULL THEN
+        UPDATE mess SET Headcount = Headcount + 1 WHERE Mess_ID = NEW.Mess_ID;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_student_update
+AFTER UPDATE ON student
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.Mess_ID <=> OLD.Mess_ID) THEN
+        IF OLD.Mess_ID IS NOT NULL THEN
+            UPDATE mess SET Headcount = GREATEST(Headcount - 1, 0) WHERE Mess_ID = OLD.Mess_ID;
+        END IF;
+        IF NEW.Mess_ID IS NOT NULL THEN
+            UPDATE mess SET Headcount = Headcount + 1 WHERE Mess_ID = NEW.Mess_ID;
+        END IF;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_student_delete
+AFTER DELETE ON student
+FOR EACH ROW
+BEGIN
+    IF OLD.Mess_ID IS NOT NULL THEN
+        UPDATE mess SET Headcount = GREATEST(Headcount - 1, 0) WHERE Mess_ID = OLD.Mess_ID;
+    END IF;
+END ;;
+
 -- FUNCTION: CalculatePendingFees
 CREATE FUNCTION CalculatePendingFees(student_id_in INT)
 RETURNS DECIMAL(10,2)
 READS SQL DATA
 BEGIN
     DECLARE total_pending DECIMAL(10, 2);
-    SELECT SUM(FeesAmount) INTO total_pending
-    FROM Fees
-    WHERE Student_ID = student_id_in
-      AND Status IN ('Pending', 'Overdue');
+    -- O(1) read of the running balance instead of summing the fees table
+    SELECT PendingAmount + OverdueAmount INTO total_pending
+    FROM feebalance
+    WHERE Student_ID = student_id_in;
 
     IF total_pending IS NULL THEN
         RETURN 0.00;
@@ -204,6 +525,82 @@ BEGIN
     END IF;
 END ;;
 
+-- PROCEDURE: ApplyFeeDelta (adds or removes one fees row from the running balances)
+CREATE PROCEDURE ApplyFeeDelta(
+    IN student_id_in INT,
+    IN status_in VARCHAR(20),
+    IN amount_in DECIMAL(10,2),
+    IN payment_date_in DATE,
+    IN sign_in INT
+)
+BEGIN
+    DECLARE pending_delta DECIMAL(12,2) DEFAULT 0.00;
+    DECLARE overdue_delta DECIMAL(12,2) DEFAULT 0.00;
+
+    IF student_id_in IS NOT NULL THEN
+        IF status_in = 'Pending' THEN
+            SET pending_delta = sign_in * COALESCE(amount_in, 0);
+        ELSEIF status_in = 'Overdue' THEN
+            SET overdue_delta = sign_in * COALESCE(amount_in, 0);
+        END IF;
+
+        INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount, LastPaymentDate)
+        VALUES (student_id_in, pending_delta, overdue_delta,
+                IF(sign_in > 0 AND status_in = 'Paid', payment_date_in, NULL))
+        ON DUPLICATE KEY UPDATE
+            PendingAmount = PendingAmount + pending_delta,
+            OverdueAmount = OverdueAmount + overdue_delta,
+            LastPaymentDate = IF(sign_in > 0 AND status_in = 'Paid'
+                                 AND (LastPaymentDate IS NULL OR payment_date_in > LastPaymentDate),
+                                 payment_date_in, LastPaymentDate);
+
+        -- A removed payment may have been the latest one
+        IF sign_in < 0 AND status_in = 'Paid' THEN
+            UPDATE feebalance
+            SET LastPaymentDate = (SELECT MAX(PaymentDate) FROM fees
+                                   WHERE Student_ID = student_id_in AND Status = 'Paid')
+            WHERE Student_ID = student_id_in;
+        END IF;
+
+        IF pending_delta <> 0 OR overdue_delta <> 0 THEN
+            UPDATE feetotals
+            SET PendingAmount = PendingAmount + pending_delta,
+                OverdueAmount = OverdueAmount + overdue_delta
+            WHERE Totals_ID = 1;
+        END IF;
+    END IF;
+END ;;
+
+-- TRIGGERS: keep feebalance / feetotals in the same transaction as every fees change.
+-- Set-based writers (the billing run) set @bulk_fee_writes and apply the deltas themselves.
+CREATE TRIGGER after_fees_insert
+AFTER INSERT ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL ApplyFeeDelta(NEW.Student_ID, NEW.Status, NEW.FeesAmount, NEW.PaymentDate, 1);
+    END IF;
+END ;;
+
+CREATE TRIGGER after_fees_update
+AFTER UPDATE ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL ApplyFeeDelta(OLD.Student_ID, OLD.Status, OLD.FeesAmount, OLD.PaymentDate, -1);
+        CALL ApplyFeeDelta(NEW.Student_ID, NEW.Status, NEW.FeesAmount, NEW.PaymentDate, 1);
+    END IF;
+END ;;
+
+CREATE TRIGGER after_fees_delete
+AFTER DELETE ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL ApplyFeeDelta(OLD.Student_ID, OLD.Status, OLD.FeesAmount, OLD.PaymentDate, -1);
+    END IF;
+END ;;
+
 -- PROCEDURE: HandleRoomAllocation
 CREATE PROCEDURE HandleRoomAllocation(
     IN student_id_in INT,
@@ -215,41 +612,42 @@ BEGIN
     DECLARE old_room_occupancy INT DEFAULT 0;
 
     SELECT Room_ID INTO old_room_id_var
-    FROM STUDENT
+    FROM student
     WHERE Student_ID = student_id_in
     LIMIT 1;
 
     START TRANSACTION;
 
     IF old_room_id_var IS NOT NULL AND old_room_id_var <> new_room_id_in THEN
-        UPDATE RoomAllocation
+        UPDATE roomallocation
         SET VacateDate = allocation_date_in
         WHERE Student_ID = student_id_in
           AND VacateDate IS NULL;
 
-        SELECT COUNT(*) INTO old_room_occupancy
-        FROM RoomAllocation
-        WHERE Room_ID = old_room_id_var
-          AND VacateDate IS NULL;
+        -- Counter was already decremented by after_room_allocation_update
+        SELECT Occupancy INTO old_room_occupancy
+        FROM room
+        WHERE Room_ID = old_room_id_var;
 
         IF old_room_occupancy = 0 THEN
-            UPDATE ROOM
+            UPDATE room
             SET Status = 'Available'
             WHERE Room_ID = old_room_id_var;
         END IF;
     END IF;
 
-    INSERT INTO RoomAllocation (AllocationDate, Student_ID, Room_ID)
+    INSERT INTO roomallocation (AllocationDate, Student_ID, Room_ID)
     VALUES (allocation_date_in, student_id_in, new_room_id_in);
 
-    UPDATE STUDENT
+    UPDATE student
     SET Room_ID = new_room_id_in
     WHERE Student_ID = student_id_in;
 
-    UPDATE ROOM
+    UPDATE room
     SET Status = 'Occupied'
     WHERE Room_ID = new_room_id_in;
 
     COMMIT;
 END ;;
+
 DELIMITER ;
\ No newline at end of file
@@ -0,0 +1,218 @@
+import math
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+SLOWEST_KEPT = 5        # statements kept per request for Server-Timing / logging
+LATENCY_WINDOW = 1024   # recent requests per endpoint used for the percentiles
+
+# When set to a list, every statement is appended as (path, query, args); used by `flask db check-plans`
+captured_queries = None
+
+
+class InstrumentedCursor:
+    """Wraps a MySQLdb cursor and times every statement it runs."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, method, query, args):
+        started = time.perf_counter()
+        try:
+            return method(query, args)
+        finally:
+            record_query(query, args, time.perf_counter() - started)
+
+    def execute(self, query, args=None):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(self._cursor.executemany, query, args)
+
+    def callproc(self, procname, args=()):
+        return self._timed(self._cursor.callproc, f'CALL {procname}', args)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are InstrumentedCursors."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, cursorclass=None):
+        return InstrumentedCursor(self._conn.cursor(cursorclass))
+
+
+def _redact(args):
+    # Never log parameter values (names, phone numbers, emails...), only their shape
+    if args is None:
+        return 'none'
+    if isinstance(args, (list, tuple)) and args and isinstance(args[0], (list, tuple)):
+        return f'{len(args)} rows x {len(args[0])} redacted'
+    try:
+        return f'{len(args)} redacted'
+    except TypeError:
+        return '1 redacted'
+
+
+def _compact(query):
+    return ' '.join(str(query).split())
+
+
+def record_query(query, args, elapsed):
+    if captured_queries is not None:
+        captured_queries.append((request.full_path if has_request_context() else None, query, args))
+
+    if not has_app_context():
+        return
+
+    stats = g.setdefault('_query_stats', {'count': 0, 'time': 0.0, 'slowest': []})
+    stats['count'] += 1
+    stats['time'] += elapsed
+
+    slowest = stats['slowest']
+    if len(slowest) < SLOWEST_KEPT or elapsed > slowest[-1][0]:
+        slowest.append((elapsed, _compact(query)))
+        slowest.sort(key=lambda item: item[0], reverse=True)
+        del slowest[SLOWEST_KEPT:]
+
+    threshold = current_app.config.get('SLOW_QUERY_MS')
+    if threshold is not None and elapsed * 1000 >= threshold:
+        current_app.logger.warning('Slow query (%.1f ms) on %s: %s [params: %s]',
+                                   elapsed * 1000, request.endpoint if has_request_context() else '-',
+                                   _compact(query), _redact(args))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class EndpointMetrics:
+    """Rolling per-endpoint latency, DB time and query counts for this worker."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, latency, db_time, queries, status):
+        with self._lock:
+            m = self._endpoints.get(endpoint)
+            if m is None:
+                m = self._endpoints[endpoint] = {
+                    'requests': 0, 'errors': 0, 'queries': 0, 'db_time': 0.0,
+                    'latency': deque(maxlen=self.window), 'db': deque(maxlen=self.window),
+                }
+            m['requests'] += 1
+            m['errors'] += status >= 500
+            m['queries'] += queries
+            m['db_time'] += db_time
+            m['latency'].append(latency)
+            m['db'].append(db_time)
+
+    def snapshot(self):
+        with self._lock:
+            items = [(name, dict(m, latency=sorted(m['latency']), db=sorted(m['db'])))
+                     for name, m in self._endpoints.items()]
+
+        result = {}
+        for name, m in items:
+            result[name] = {
+                'requests': m['requests'],
+                'errors': m['errors'],
+                'queries_total': m['queries'],
+                'queries_per_request': round(m['queries'] / m['requests'], 2),
+                'db_seconds_total': round(m['db_time'], 6),
+                'latency_seconds': {q: round(_percentile(m['latency'], pct), 6)
+                                    for q, pct in (('p50', 50), ('p95', 95), ('p99', 99))},
+                'db_seconds': {q: round(_percentile(m['db'], pct), 6)
+                               for q, pct in (('p50', 50), ('p95', 95), ('p99', 99))},
+            }
+        return result
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(snapshot, pool_stats=None):
+    lines = [
+        '# HELP hostel_request_latency_seconds Request latency per endpoint (rolling window).',
+        '# TYPE hostel_request_latency_seconds summary',
+    ]
+    for endpoint, m in sorted(snapshot.items()):
+        label = f'endpoint="{_escape_label(endpoint)}"'
+        for q, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+            lines.append(f'hostel_request_latency_seconds{{{label},quantile="{quantile}"}} {m["latency_seconds"][q]}')
+        lines.append(f'hostel_request_latency_seconds_count{{{label}}} {m["requests"]}')
+
+    lines += ['# HELP hostel_db_seconds DB time per request per endpoint (rolling window).',
+              '# TYPE hostel_db_seconds summary']
+    for endpoint, m in sorted(snapshot.items()):
+        label = f'endpoint="{_escape_label(endpoint)}"'
+        for q, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+            lines.append(f'hostel_db_seconds{{{label},quantile="{quantile}"}} {m["db_seconds"][q]}')
+        lines.append(f'hostel_db_seconds_sum{{{label}}} {m["db_seconds_total"]}')
+        lines.append(f'hostel_db_seconds_count{{{label}}} {m["requests"]}')
+
+    lines += ['# HELP hostel_db_queries_total Statements executed per endpoint.',
+              '# TYPE hostel_db_queries_total counter']
+    for endpoint, m in sorted(snapshot.items()):
+        lines.append(f'hostel_db_queries_total{{endpoint="{_escape_label(endpoint)}"}} {m["queries_total"]}')
+
+    lines += ['# HELP hostel_request_errors_total 5xx responses per endpoint.',
+              '# TYPE hostel_request_errors_total counter']
+    for endpoint, m in sorted(snapshot.items()):
+        lines.append(f'hostel_request_errors_total{{endpoint="{_escape_label(endpoint)}"}} {m["errors"]}')
+
+    if pool_stats:
+        lines += ['# HELP hostel_db_pool Connection pool state for this worker.',
+                  '# TYPE hostel_db_pool gauge']
+        for key in ('size', 'in_use', 'idle', 'max_size', 'waits', 'timeouts'):
+            lines.append(f'hostel_db_pool{{stat="{key}"}} {pool_stats[key]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def init_instrumentation(app):
+    app.config.setdefault('SLOW_QUERY_MS', 200)
+
+    @app.before_request
+    def _start_timer():
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return response
+
+        latency = time.perf_counter() - started
+        stats = g.get('_query_stats') or {'count': 0, 'time': 0.0, 'slowest': []}
+        endpoint_metrics.observe(request.endpoint or 'unmatched', latency, stats['time'],
+                                 stats['count'], response.status_code)
+
+        # Streamed responses keep querying after this point; only the setup is counted
+        timing = [f'db;dur={stats["time"] * 1000:.1f};desc="{stats["count"]} queries"',
+                  f'app;dur={latency * 1000:.1f}']
+        for i, (elapsed, _) in enumerate(stats['slowest'][:3], 1):
+            timing.append(f'q{i};dur={elapsed * 1000:.1f}')
+        response.headers.add('Server-Timing', ', '.join(timing))
+        return response
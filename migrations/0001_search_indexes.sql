@@ -0,0 +1,3 @@
+-- Indexes behind the admin student search (models/students.py)
+ALTER TABLE room ADD KEY Room_no (Room_no);
+ALTER TABLE student ADD FULLTEXT KEY ft_student_search (FirstName, LastName, Department, Email) WITH PARSER ngram;
@@ -0,0 +1,133 @@
+-- Running per-student fee balances maintained by fees triggers
+CREATE TABLE IF NOT EXISTS feebalance (
+    Student_ID INT NOT NULL,
+    PendingAmount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    OverdueAmount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    LastPaymentDate DATE DEFAULT NULL,
+    PRIMARY KEY (Student_ID),
+    CONSTRAINT feebalance_ibfk_1 FOREIGN KEY (Student_ID) 
+        REFERENCES student (Student_ID) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS feetotals (
+    Totals_ID TINYINT NOT NULL,
+    PendingAmount DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    OverdueAmount DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Totals_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS after_fees_insert;
+DROP TRIGGER IF EXISTS after_fees_update;
+DROP TRIGGER IF EXISTS after_fees_delete;
+DROP PROCEDURE IF EXISTS ApplyFeeDelta;
+DROP FUNCTION IF EXISTS CalculatePendingFees;
+
+INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount, LastPaymentDate)
+SELECT s.Student_ID,
+       COALESCE(SUM(CASE WHEN f.Status = 'Pending' THEN f.FeesAmount END), 0),
+       COALESCE(SUM(CASE WHEN f.Status = 'Overdue' THEN f.FeesAmount END), 0),
+       MAX(CASE WHEN f.Status = 'Paid' THEN f.PaymentDate END)
+FROM student s
+LEFT JOIN fees f ON f.Student_ID = s.Student_ID
+GROUP BY s.Student_ID
+ON DUPLICATE KEY UPDATE
+    PendingAmount = VALUES(PendingAmount),
+    OverdueAmount = VALUES(OverdueAmount),
+    LastPaymentDate = VALUES(LastPaymentDate);
+
+INSERT INTO feetotals (Totals_ID, PendingAmount, OverdueAmount)
+SELECT 1, COALESCE(SUM(PendingAmount), 0), COALESCE(SUM(OverdueAmount), 0)
+FROM feebalance
+ON DUPLICATE KEY UPDATE
+    PendingAmount = VALUES(PendingAmount),
+    OverdueAmount = VALUES(OverdueAmount);
+
+DELIMITER ;;
+
+-- FUNCTION: CalculatePendingFees
+CREATE FUNCTION CalculatePendingFees(student_id_in INT)
+RETURNS DECIMAL(10,2)
+READS SQL DATA
+BEGIN
+    DECLARE total_pending DECIMAL(10, 2);
+    -- O(1) read of the running balance instead of summing the fees table
+    SELECT PendingAmount + OverdueAmount INTO total_pending
+    FROM feebalance
+    WHERE Student_ID = student_id_in;
+
+    IF total_pending IS NULL THEN
+        RETURN 0.00;
+    ELSE
+        RETURN total_pending;
+    END IF;
+END ;;
+
+-- PROCEDURE: ApplyFeeDelta (adds or removes one fees row from the running balances)
+CREATE PROCEDURE ApplyFeeDelta(
+    IN student_id_in INT,
+    IN status_in VARCHAR(20),
+    IN amount_in DECIMAL(10,2),
+    IN payment_date_in DATE,
+    IN sign_in INT
+)
+BEGIN
+    DECLARE pending_delta DECIMAL(12,2) DEFAULT 0.00;
+    DECLARE overdue_delta DECIMAL(12,2) DEFAULT 0.00;
+
+    IF student_id_in IS NOT NULL THEN
+        IF status_in = 'Pending' THEN
+            SET pending_delta = sign_in * COALESCE(amount_in, 0);
+        ELSEIF status_in = 'Overdue' THEN
+            SET overdue_delta = sign_in * COALESCE(amount_in, 0);
+        END IF;
+
+        INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount, LastPaymentDate)
+        VALUES (student_id_in, pending_delta, overdue_delta,
+                IF(sign_in > 0 AND status_in = 'Paid', payment_date_in, NULL))
+        ON DUPLICATE KEY UPDATE
+            PendingAmount = PendingAmount + pending_delta,
+            OverdueAmount = OverdueAmount + overdue_delta,
+            LastPaymentDate = IF(sign_in > 0 AND status_in = 'Paid'
+                                 AND (LastPaymentDate IS NULL OR payment_date_in > LastPaymentDate),
+                                 payment_date_in, LastPaymentDate);
+
+        -- A removed payment may have been the latest one
+        IF sign_in < 0 AND status_in = 'Paid' THEN
+            UPDATE feebalance
+            SET LastPaymentDate = (SELECT MAX(PaymentDate) FROM fees
+                                   WHERE Student_ID = student_id_in AND Status = 'Paid')
+            WHERE Student_ID = student_id_in;
+        END IF;
+
+        IF pending_delta <> 0 OR overdue_delta <> 0 THEN
+            UPDATE feetotals
+            SET PendingAmount = PendingAmount + pending_delta,
+                OverdueAmount = OverdueAmount + overdue_delta
+            WHERE Totals_ID = 1;
+        END IF;
+    END IF;
+END ;;
+
+-- TRIGGERS: keep feebalance / feetotals in the same transaction as every fees change
+CREATE TRIGGER after_fees_insert
+AFTER INSERT ON fees
+FOR EACH ROW
+BEGIN
+    CALL ApplyFeeDelta(NEW.Student_ID, NEW.Status, NEW.FeesAmount, NEW.PaymentDate, 1);
+END ;;
+
+CREATE TRIGGER after_fees_update
+AFTER UPDATE ON fees
+FOR EACH ROW
+BEGIN
+    CALL ApplyFeeDelta(OLD.Student_ID, OLD.Status, OLD.FeesAmount, OLD.PaymentDate, -1);
+    CALL ApplyFeeDelta(NEW.Student_ID, NEW.Status, NEW.FeesAmount, NEW.PaymentDate, 1);
+END ;;
+
+CREATE TRIGGER after_fees_delete
+AFTER DELETE ON fees
+FOR EACH ROW
+BEGIN
+    CALL ApplyFeeDelta(OLD.Student_ID, OLD.Status, OLD.FeesAmount, OLD.PaymentDate, -1);
+END ;;
+DELIMITER ;
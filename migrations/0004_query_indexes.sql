@@ -0,0 +1,16 @@
+-- Indexes for the queries the blueprints actually run (checked by `flask db check-plans`)
+
+-- Active allocations per room (occupancy reconcile, exports, history)
+ALTER TABLE roomallocation ADD KEY Room_Vacate (Room_ID, VacateDate);
+
+-- Student fee history ordered by date, and per-student status filters
+ALTER TABLE fees ADD KEY Student_Status (Student_ID, Status);
+ALTER TABLE fees ADD KEY Student_PaymentDate (Student_ID, PaymentDate);
+
+-- admin.fees: status filter ordered by date, and the unfiltered date ordering / exports
+ALTER TABLE fees ADD KEY Status_PaymentDate (Status, PaymentDate);
+ALTER TABLE fees ADD KEY PaymentDate (PaymentDate);
+
+-- student.visitors: visitedby -> visitor join, newest visits first
+ALTER TABLE visitedby ADD KEY Student_Visitor (Student_ID, Visitor_Name);
+ALTER TABLE visitor ADD KEY VisitDate (VisitDate);
@@ -0,0 +1,28 @@
+-- Append-only gate log: one row per visit, never overwritten (visitor/visitedby keep the contact directory)
+CREATE TABLE IF NOT EXISTS visitlog (
+    Visit_ID BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    Student_ID INT NOT NULL,
+    Visitor_Name VARCHAR(50) NOT NULL,
+    Ph_no VARCHAR(15) NOT NULL,
+    Relation_to_student VARCHAR(50) DEFAULT NULL,
+    Gate VARCHAR(20) DEFAULT NULL,
+    Client_Ref VARCHAR(64) DEFAULT NULL,
+    CheckIn DATETIME NOT NULL,
+    CheckOut DATETIME DEFAULT NULL,
+    PRIMARY KEY (Visit_ID),
+    UNIQUE KEY Gate_ClientRef (Gate, Client_Ref),
+    KEY Student_CheckIn (Student_ID, CheckIn),
+    KEY CheckIn (CheckIn),
+    KEY Inside (CheckOut, CheckIn),
+    CONSTRAINT visitlog_ibfk_1 FOREIGN KEY (Student_ID) 
+        REFERENCES student (Student_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Carry over the visits recorded so far (only into an empty log, so re-running is harmless)
+INSERT INTO visitlog (Student_ID, Visitor_Name, Ph_no, Relation_to_student, CheckIn, CheckOut)
+SELECT vb.Student_ID, v.Visitor_Name, v.Ph_no, v.Relation_to_student,
+       COALESCE(v.VisitDate, CURRENT_DATE), COALESCE(v.OutDate, v.VisitDate, CURRENT_DATE)
+FROM visitedby vb
+JOIN visitor v ON v.Visitor_Name = vb.Visitor_Name
+WHERE NOT EXISTS (SELECT 1 FROM visitlog)
+ORDER BY v.VisitDate;
@@ -0,0 +1,114 @@
+-- TABLECHANGES Table (per-table change version, bumped by triggers)
+CREATE TABLE IF NOT EXISTS tablechanges (
+    TableName VARCHAR(64) NOT NULL,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ChangedAt DATETIME(6) NOT NULL,
+    PRIMARY KEY (TableName)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO tablechanges (TableName, Version, ChangedAt) VALUES
+('student', 1, UTC_TIMESTAMP(6)), ('room', 1, UTC_TIMESTAMP(6)), ('mess', 1, UTC_TIMESTAMP(6)), ('warden', 1, UTC_TIMESTAMP(6)), ('fees', 1, UTC_TIMESTAMP(6));
+
+DROP PROCEDURE IF EXISTS BumpTableVersion;
+DROP TRIGGER IF EXISTS student_changed_insert;
+DROP TRIGGER IF EXISTS student_changed_update;
+DROP TRIGGER IF EXISTS student_changed_delete;
+DROP TRIGGER IF EXISTS room_changed_insert;
+DROP TRIGGER IF EXISTS room_changed_update;
+DROP TRIGGER IF EXISTS room_changed_delete;
+DROP TRIGGER IF EXISTS mess_changed_insert;
+DROP TRIGGER IF EXISTS mess_changed_update;
+DROP TRIGGER IF EXISTS mess_changed_delete;
+DROP TRIGGER IF EXISTS warden_changed_insert;
+DROP TRIGGER IF EXISTS warden_changed_update;
+DROP TRIGGER IF EXISTS warden_changed_delete;
+DROP TRIGGER IF EXISTS fees_changed_insert;
+DROP TRIGGER IF EXISTS fees_changed_update;
+DROP TRIGGER IF EXISTS fees_changed_delete;
+
+DELIMITER ;;
+
+-- Change versions polled by the admin JSON endpoints (ETag / Last-Modified)
+CREATE PROCEDURE BumpTableVersion(IN table_name_in VARCHAR(64))
+BEGIN
+    INSERT INTO tablechanges (TableName, Version, ChangedAt)
+    VALUES (table_name_in, 1, UTC_TIMESTAMP(6))
+    ON DUPLICATE KEY UPDATE Version = Version + 1, ChangedAt = UTC_TIMESTAMP(6);
+END ;;
+
+CREATE TRIGGER student_changed_insert
+AFTER INSERT ON student
+FOR EACH ROW
+    CALL BumpTableVersion('student') ;;
+
+CREATE TRIGGER student_changed_update
+AFTER UPDATE ON student
+FOR EACH ROW
+    CALL BumpTableVersion('student') ;;
+
+CREATE TRIGGER student_changed_delete
+AFTER DELETE ON student
+FOR EACH ROW
+    CALL BumpTableVersion('student') ;;
+
+CREATE TRIGGER room_changed_insert
+AFTER INSERT ON room
+FOR EACH ROW
+    CALL BumpTableVersion('room') ;;
+
+CREATE TRIGGER room_changed_update
+AFTER UPDATE ON room
+FOR EACH ROW
+    CALL BumpTableVersion('room') ;;
+
+CREATE TRIGGER room_changed_delete
+AFTER DELETE ON room
+FOR EACH ROW
+    CALL BumpTableVersion('room') ;;
+
+CREATE TRIGGER mess_changed_insert
+AFTER INSERT ON mess
+FOR EACH ROW
+    CALL BumpTableVersion('mess') ;;
+
+CREATE TRIGGER mess_changed_update
+AFTER UPDATE ON mess
+FOR EACH ROW
+    CALL BumpTableVersion('mess') ;;
+
+CREATE TRIGGER mess_changed_delete
+AFTER DELETE ON mess
+FOR EACH ROW
+    CALL BumpTableVersion('mess') ;;
+
+CREATE TRIGGER warden_changed_insert
+AFTER INSERT ON warden
+FOR EACH ROW
+    CALL BumpTableVersion('warden') ;;
+
+CREATE TRIGGER warden_changed_update
+AFTER UPDATE ON warden
+FOR EACH ROW
+    CALL BumpTableVersion('warden') ;;
+
+CREATE TRIGGER warden_changed_delete
+AFTER DELETE ON warden
+FOR EACH ROW
+    CALL BumpTableVersion('warden') ;;
+
+CREATE TRIGGER fees_changed_insert
+AFTER INSERT ON fees
+FOR EACH ROW
+    CALL BumpTableVersion('fees') ;;
+
+CREATE TRIGGER fees_changed_update
+AFTER UPDATE ON fees
+FOR EACH ROW
+    CALL BumpTableVersion('fees') ;;
+
+CREATE TRIGGER fees_changed_delete
+AFTER DELETE ON fees
+FOR EACH ROW
+    CALL BumpTableVersion('fees') ;;
+
+DELIMITER ;
@@ -0,0 +1,81 @@
+-- Monthly billing run: period marker on generated charges and a per-period run log
+ALTER TABLE fees ADD COLUMN BillingPeriod DATE DEFAULT NULL;
+ALTER TABLE fees ADD UNIQUE KEY Student_Type_Period (Student_ID, Type, BillingPeriod);
+
+CREATE TABLE IF NOT EXISTS billingrun (
+    Period DATE NOT NULL,
+    Runs INT NOT NULL DEFAULT 0,
+    MessCharges INT NOT NULL DEFAULT 0,
+    HostelCharges INT NOT NULL DEFAULT 0,
+    OverdueFlipped INT NOT NULL DEFAULT 0,
+    DurationMs INT DEFAULT NULL,
+    LastRunAt DATETIME DEFAULT NULL,
+    PRIMARY KEY (Period)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- fees triggers skip rows written by set-based runs (@bulk_fee_writes), which apply the balances themselves
+DROP TRIGGER IF EXISTS after_fees_insert;
+DROP TRIGGER IF EXISTS after_fees_update;
+DROP TRIGGER IF EXISTS after_fees_delete;
+DROP TRIGGER IF EXISTS fees_changed_insert;
+DROP TRIGGER IF EXISTS fees_changed_update;
+DROP TRIGGER IF EXISTS fees_changed_delete;
+
+DELIMITER ;;
+
+CREATE TRIGGER after_fees_insert
+AFTER INSERT ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL ApplyFeeDelta(NEW.Student_ID, NEW.Status, NEW.FeesAmount, NEW.PaymentDate, 1);
+    END IF;
+END ;;
+
+CREATE TRIGGER after_fees_update
+AFTER UPDATE ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL ApplyFeeDelta(OLD.Student_ID, OLD.Status, OLD.FeesAmount, OLD.PaymentDate, -1);
+        CALL ApplyFeeDelta(NEW.Student_ID, NEW.Status, NEW.FeesAmount, NEW.PaymentDate, 1);
+    END IF;
+END ;;
+
+CREATE TRIGGER after_fees_delete
+AFTER DELETE ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL ApplyFeeDelta(OLD.Student_ID, OLD.Status, OLD.FeesAmount, OLD.PaymentDate, -1);
+    END IF;
+END ;;
+
+CREATE TRIGGER fees_changed_insert
+AFTER INSERT ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL BumpTableVersion('fees');
+    END IF;
+END ;;
+
+CREATE TRIGGER fees_changed_update
+AFTER UPDATE ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL BumpTableVersion('fees');
+    END IF;
+END ;;
+
+CREATE TRIGGER fees_changed_delete
+AFTER DELETE ON fees
+FOR EACH ROW
+BEGIN
+    IF @bulk_fee_writes IS NULL THEN
+        CALL BumpTableVersion('fees');
+    END IF;
+END ;;
+
+DELIMITER ;
@@ -0,0 +1,75 @@
+-- Archive tables: same columns as the live ones plus ArchivedAt, no foreign keys
+
+-- STUDENT_ARCHIVE Table (graduated/inactive students moved out by `flask admin archive-students`)
+CREATE TABLE IF NOT EXISTS student_archive (
+    Student_ID INT NOT NULL,
+    FirstName VARCHAR(50) DEFAULT NULL,
+    LastName VARCHAR(50) DEFAULT NULL,
+    Department VARCHAR(50) DEFAULT NULL,
+    Sex CHAR(1) DEFAULT NULL,
+    Email VARCHAR(100) DEFAULT NULL,
+    Mess_ID INT DEFAULT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Student_ID),
+    KEY ArchivedAt (ArchivedAt),
+    FULLTEXT KEY ft_student_archive_search (FirstName, LastName, Department, Email) WITH PARSER ngram
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- FEES_ARCHIVE Table
+CREATE TABLE IF NOT EXISTS fees_archive (
+    Payment_ID INT NOT NULL,
+    Status VARCHAR(20) DEFAULT NULL,
+    FeesAmount DECIMAL(10,2) DEFAULT NULL,
+    PaymentDate DATE DEFAULT NULL,
+    Type VARCHAR(20) DEFAULT NULL,
+    Student_ID INT DEFAULT NULL,
+    BillingPeriod DATE DEFAULT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Payment_ID),
+    KEY Student_PaymentDate (Student_ID, PaymentDate)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ROOMALLOCATION_ARCHIVE Table
+CREATE TABLE IF NOT EXISTS roomallocation_archive (
+    AllocationDate DATE DEFAULT NULL,
+    VacateDate DATE DEFAULT NULL,
+    Student_ID INT NOT NULL,
+    Room_ID INT NOT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Student_ID, Room_ID),
+    KEY Room_ID (Room_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- STUDENTPHONE_ARCHIVE Table
+CREATE TABLE IF NOT EXISTS studentphone_archive (
+    Ph_no VARCHAR(15) NOT NULL,
+    Student_ID INT NOT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Ph_no, Student_ID),
+    KEY Student_ID (Student_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- VISITEDBY_ARCHIVE Table
+CREATE TABLE IF NOT EXISTS visitedby_archive (
+    Visitor_Name VARCHAR(50) NOT NULL,
+    Student_ID INT NOT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Visitor_Name, Student_ID),
+    KEY Student_ID (Student_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- VISITLOG_ARCHIVE Table
+CREATE TABLE IF NOT EXISTS visitlog_archive (
+    Visit_ID BIGINT UNSIGNED NOT NULL,
+    Student_ID INT NOT NULL,
+    Visitor_Name VARCHAR(50) NOT NULL,
+    Ph_no VARCHAR(15) NOT NULL,
+    Relation_to_student VARCHAR(50) DEFAULT NULL,
+    Gate VARCHAR(20) DEFAULT NULL,
+    Client_Ref VARCHAR(64) DEFAULT NULL,
+    CheckIn DATETIME NOT NULL,
+    CheckOut DATETIME DEFAULT NULL,
+    ArchivedAt DATETIME NOT NULL,
+    PRIMARY KEY (Visit_ID),
+    KEY Student_CheckIn (Student_ID, CheckIn)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,113 @@
+-- Materialized mess headcount maintained by student triggers, plus daily/monthly rollups
+ALTER TABLE mess ADD COLUMN Headcount INT NOT NULL DEFAULT 0;
+
+UPDATE mess m
+LEFT JOIN (
+    SELECT Mess_ID, COUNT(*) AS n
+    FROM student
+    WHERE Mess_ID IS NOT NULL
+    GROUP BY Mess_ID
+) s ON s.Mess_ID = m.Mess_ID
+SET m.Headcount = COALESCE(s.n, 0);
+
+-- MESSDAILY Table (one snapshot per mess per day, written by `flask mess rollup`)
+CREATE TABLE IF NOT EXISTS messdaily (
+    Day DATE NOT NULL,
+    Mess_ID INT NOT NULL,
+    Headcount INT NOT NULL DEFAULT 0,
+    Capacity INT DEFAULT NULL,
+    Revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Day, Mess_ID),
+    KEY Mess_Day (Mess_ID, Day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- MESSMONTHLY Table (messdaily folded per month)
+CREATE TABLE IF NOT EXISTS messmonthly (
+    Month DATE NOT NULL,
+    Mess_ID INT NOT NULL,
+    Days INT NOT NULL DEFAULT 0,
+    AvgHeadcount DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    MaxHeadcount INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Month, Mess_ID),
+    KEY Mess_Month (Mess_ID, Month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS before_student_insert;
+DROP TRIGGER IF EXISTS before_student_update;
+DROP TRIGGER IF EXISTS after_student_insert;
+DROP TRIGGER IF EXISTS after_student_update;
+DROP TRIGGER IF EXISTS after_student_delete;
+DROP PROCEDURE IF EXISTS CheckMessCapacity;
+
+DELIMITER ;;
+
+-- PROCEDURE: CheckMessCapacity (locks the mess row so concurrent joins are serialized)
+CREATE PROCEDURE CheckMessCapacity(IN mess_id_in INT)
+BEGIN
+    DECLARE mess_capacity INT DEFAULT NULL;
+    DECLARE mess_headcount INT DEFAULT 0;
+
+    SELECT Capacity, Headcount INTO mess_capacity, mess_headcount
+    FROM mess
+    WHERE Mess_ID = mess_id_in
+    FOR UPDATE;
+
+    IF mess_capacity IS NOT NULL AND mess_headcount >= mess_capacity THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Mess capacity reached. Cannot add more students.';
+    END IF;
+END ;;
+
+CREATE TRIGGER before_student_insert
+BEFORE INSERT ON student
+FOR EACH ROW
+BEGIN
+    IF NEW.Mess_ID IS NOT NULL THEN
+        CALL CheckMessCapacity(NEW.Mess_ID);
+    END IF;
+END ;;
+
+CREATE TRIGGER before_student_update
+BEFORE UPDATE ON student
+FOR EACH ROW
+BEGIN
+    IF NEW.Mess_ID IS NOT NULL AND NOT (NEW.Mess_ID <=> OLD.Mess_ID) THEN
+        CALL CheckMessCapacity(NEW.Mess_ID);
+    END IF;
+END ;;
+
+-- TRIGGERS: keep mess.Headcount in step with student.Mess_ID
+CREATE TRIGGER after_student_insert
+AFTER INSERT ON student
+FOR EACH ROW
+BEGIN
+    IF NEW.Mess_ID IS NOT NULL THEN
+        UPDATE mess SET Headcount = Headcount + 1 WHERE Mess_ID = NEW.Mess_ID;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_student_update
+AFTER UPDATE ON student
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.Mess_ID <=> OLD.Mess_ID) THEN
+        IF OLD.Mess_ID IS NOT NULL THEN
+            UPDATE mess SET Headcount = GREATEST(Headcount - 1, 0) WHERE Mess_ID = OLD.Mess_ID;
+        END IF;
+        IF NEW.Mess_ID IS NOT NULL THEN
+            UPDATE mess SET Headcount = Headcount + 1 WHERE Mess_ID = NEW.Mess_ID;
+        END IF;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_student_delete
+AFTER DELETE ON student
+FOR EACH ROW
+BEGIN
+    IF OLD.Mess_ID IS NOT NULL THEN
+        UPDATE mess SET Headcount = GREATEST(Headcount - 1, 0) WHERE Mess_ID = OLD.Mess_ID;
+    END IF;
+END ;;
+
+DELIMITER ;
@@ -0,0 +1,6 @@
+-- CACHEVERSIONS Table (scope versions shared by every worker's student portal cache)
+CREATE TABLE IF NOT EXISTS cacheversions (
+    Scope VARCHAR(32) NOT NULL,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (Scope)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,19 @@
+-- tablechanges is now bumped by the application once per committed transaction
+-- (models.changes.tables_changed); the per-row triggers held its rows locked for
+-- the whole of every writer's transaction
+DROP TRIGGER IF EXISTS student_changed_insert;
+DROP TRIGGER IF EXISTS student_changed_update;
+DROP TRIGGER IF EXISTS student_changed_delete;
+DROP TRIGGER IF EXISTS room_changed_insert;
+DROP TRIGGER IF EXISTS room_changed_update;
+DROP TRIGGER IF EXISTS room_changed_delete;
+DROP TRIGGER IF EXISTS mess_changed_insert;
+DROP TRIGGER IF EXISTS mess_changed_update;
+DROP TRIGGER IF EXISTS mess_changed_delete;
+DROP TRIGGER IF EXISTS warden_changed_insert;
+DROP TRIGGER IF EXISTS warden_changed_update;
+DROP TRIGGER IF EXISTS warden_changed_delete;
+DROP TRIGGER IF EXISTS fees_changed_insert;
+DROP TRIGGER IF EXISTS fees_changed_update;
+DROP TRIGGER IF EXISTS fees_changed_delete;
+DROP PROCEDURE IF EXISTS BumpTableVersion;
@@ -0,0 +1,6 @@
+-- Check-outs are matched on Client_Ref at any gate, and "inside" skips portal
+-- pre-registrations (Gate IS NULL) using Gate from the index
+ALTER TABLE visitlog
+    DROP INDEX Inside,
+    ADD KEY Inside (CheckOut, CheckIn, Gate),
+    ADD KEY ClientRef_Open (Client_Ref, CheckOut);
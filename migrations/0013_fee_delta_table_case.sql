@@ -0,0 +1,53 @@
+-- ApplyFeeDelta referred to `Fees`; with lower_case_table_names=0 (the Linux default)
+-- that table does not exist and every fees trigger calling it failed
+DROP PROCEDURE IF EXISTS ApplyFeeDelta;
+
+DELIMITER ;;
+
+-- PROCEDURE: ApplyFeeDelta (adds or removes one fees row from the running balances)
+CREATE PROCEDURE ApplyFeeDelta(
+    IN student_id_in INT,
+    IN status_in VARCHAR(20),
+    IN amount_in DECIMAL(10,2),
+    IN payment_date_in DATE,
+    IN sign_in INT
+)
+BEGIN
+    DECLARE pending_delta DECIMAL(12,2) DEFAULT 0.00;
+    DECLARE overdue_delta DECIMAL(12,2) DEFAULT 0.00;
+
+    IF student_id_in IS NOT NULL THEN
+        IF status_in = 'Pending' THEN
+            SET pending_delta = sign_in * COALESCE(amount_in, 0);
+        ELSEIF status_in = 'Overdue' THEN
+            SET overdue_delta = sign_in * COALESCE(amount_in, 0);
+        END IF;
+
+        INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount, LastPaymentDate)
+        VALUES (student_id_in, pending_delta, overdue_delta,
+                IF(sign_in > 0 AND status_in = 'Paid', payment_date_in, NULL))
+        ON DUPLICATE KEY UPDATE
+            PendingAmount = PendingAmount + pending_delta,
+            OverdueAmount = OverdueAmount + overdue_delta,
+            LastPaymentDate = IF(sign_in > 0 AND status_in = 'Paid'
+                                 AND (LastPaymentDate IS NULL OR payment_date_in > LastPaymentDate),
+                                 payment_date_in, LastPaymentDate);
+
+        -- A removed payment may have been the latest one
+        IF sign_in < 0 AND status_in = 'Paid' THEN
+            UPDATE feebalance
+            SET LastPaymentDate = (SELECT MAX(PaymentDate) FROM fees
+                                   WHERE Student_ID = student_id_in AND Status = 'Paid')
+            WHERE Student_ID = student_id_in;
+        END IF;
+
+        IF pending_delta <> 0 OR overdue_delta <> 0 THEN
+            UPDATE feetotals
+            SET PendingAmount = PendingAmount + pending_delta,
+                OverdueAmount = OverdueAmount + overdue_delta
+            WHERE Totals_ID = 1;
+        END IF;
+    END IF;
+END ;;
+
+DELIMITER ;
@@ -0,0 +1,2 @@
+-- Keyset pages of the admin fees list filtered by status walk (Status, Payment_ID)
+ALTER TABLE fees ADD KEY Status_Payment (Status, Payment_ID);
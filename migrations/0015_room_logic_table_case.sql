@@ -0,0 +1,118 @@
+-- The room triggers and HandleRoomAllocation referred to `ROOM`, `STUDENT` and
+-- `RoomAllocation`; with lower_case_table_names=0 (the Linux default) those tables
+-- do not exist and every allocation failed
+DROP TRIGGER IF EXISTS before_room_allocation_insert;
+DROP TRIGGER IF EXISTS after_room_allocation_insert;
+DROP TRIGGER IF EXISTS after_room_allocation_update;
+DROP TRIGGER IF EXISTS after_room_allocation_delete;
+DROP PROCEDURE IF EXISTS HandleRoomAllocation;
+
+DELIMITER ;;
+
+-- TRIGGER: before_room_allocation_insert (Capacity Check)
+CREATE TRIGGER before_room_allocation_insert
+BEFORE INSERT ON roomallocation
+FOR EACH ROW
+BEGIN
+    DECLARE current_occupancy INT DEFAULT 0;
+    DECLARE room_capacity INT DEFAULT NULL;
+
+    -- Read the maintained counter (and lock the room row so concurrent
+    -- allocations to the same room are serialized)
+    SELECT Capacity, Occupancy INTO room_capacity, current_occupancy
+    FROM room
+    WHERE Room_ID = NEW.Room_ID
+    FOR UPDATE;
+
+    IF room_capacity IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Room does not exist.';
+    END IF;
+
+    IF current_occupancy >= room_capacity THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Room capacity reached. Cannot allocate more students.';
+    END IF;
+END ;;
+
+-- TRIGGERS: keep room.Occupancy in step with active (VacateDate IS NULL) allocations
+CREATE TRIGGER after_room_allocation_insert
+AFTER INSERT ON roomallocation
+FOR EACH ROW
+BEGIN
+    IF NEW.VacateDate IS NULL THEN
+        UPDATE room SET Occupancy = Occupancy + 1 WHERE Room_ID = NEW.Room_ID;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_room_allocation_update
+AFTER UPDATE ON roomallocation
+FOR EACH ROW
+BEGIN
+    IF OLD.VacateDate IS NULL AND (NEW.VacateDate IS NOT NULL OR NEW.Room_ID <> OLD.Room_ID) THEN
+        UPDATE room SET Occupancy = GREATEST(Occupancy - 1, 0) WHERE Room_ID = OLD.Room_ID;
+    END IF;
+    IF NEW.VacateDate IS NULL AND (OLD.VacateDate IS NOT NULL OR NEW.Room_ID <> OLD.Room_ID) THEN
+        UPDATE room SET Occupancy = Occupancy + 1 WHERE Room_ID = NEW.Room_ID;
+    END IF;
+END ;;
+
+CREATE TRIGGER after_room_allocation_delete
+AFTER DELETE ON roomallocation
+FOR EACH ROW
+BEGIN
+    IF OLD.VacateDate IS NULL THEN
+        UPDATE room SET Occupancy = GREATEST(Occupancy - 1, 0) WHERE Room_ID = OLD.Room_ID;
+    END IF;
+END ;;
+
+-- PROCEDURE: HandleRoomAllocation
+CREATE PROCEDURE HandleRoomAllocation(
+    IN student_id_in INT,
+    IN new_room_id_in INT,
+    IN allocation_date_in DATE
+)
+BEGIN
+    DECLARE old_room_id_var INT DEFAULT NULL;
+    DECLARE old_room_occupancy INT DEFAULT 0;
+
+    SELECT Room_ID INTO old_room_id_var
+    FROM student
+    WHERE Student_ID = student_id_in
+    LIMIT 1;
+
+    START TRANSACTION;
+
+    IF old_room_id_var IS NOT NULL AND old_room_id_var <> new_room_id_in THEN
+        UPDATE roomallocation
+        SET VacateDate = allocation_date_in
+        WHERE Student_ID = student_id_in
+          AND VacateDate IS NULL;
+
+        -- Counter was already decremented by after_room_allocation_update
+        SELECT Occupancy INTO old_room_occupancy
+        FROM room
+        WHERE Room_ID = old_room_id_var;
+
+        IF old_room_occupancy = 0 THEN
+            UPDATE room
+            SET Status = 'Available'
+            WHERE Room_ID = old_room_id_var;
+        END IF;
+    END IF;
+
+    INSERT INTO roomallocation (AllocationDate, Student_ID, Room_ID)
+    VALUES (allocation_date_in, student_id_in, new_room_id_in);
+
+    UPDATE student
+    SET Room_ID = new_room_id_in
+    WHERE Student_ID = student_id_in;
+
+    UPDATE room
+    SET Status = 'Occupied'
+    WHERE Room_ID = new_room_id_in;
+
+    COMMIT;
+END ;;
+
+DELIMITER ;
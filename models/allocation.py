@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from datetime import date
+
+import MySQLdb
+
+from database_connection import mysql
+from models.changes import tables_changed
+
+ALLOCATION_CHUNK_SIZE = 500
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def plan_allocations(student_ids=None, staff_id=None):
+    """Work out a bed for each student without touching the database.
+
+    ``student_ids=None`` means every student without a room. Free beds come
+    from the room.Occupancy counters; students are spread across wardens in
+    turn and, within a warden, partially filled rooms are topped up first.
+    Returns ``(plan, outcomes)`` where plan is a list of (student_id, room_id)
+    and outcomes holds the students that could not be placed.
+    """
+    cur = mysql.connection.cursor()
+
+    if student_ids is None:
+        cur.execute("SELECT Student_ID, Room_ID FROM student WHERE Room_ID IS NULL ORDER BY Student_ID")
+    elif student_ids:
+        cur.execute(f"SELECT Student_ID, Room_ID FROM student WHERE Student_ID IN ({_placeholders(student_ids)})",
+                    tuple(student_ids))
+    students = cur.fetchall() if student_ids is None or student_ids else ()
+
+    outcomes = []
+    found = {row['Student_ID'] for row in students}
+    for student_id in (student_ids or ()):
+        if student_id not in found:
+            outcomes.append({'student_id': student_id, 'status': 'skipped', 'reason': 'student not found'})
+
+    pending = []
+    for row in students:
+        if row['Room_ID'] is not None:
+            outcomes.append({'student_id': row['Student_ID'], 'status': 'skipped',
+                             'reason': 'already allocated', 'room_id': row['Room_ID']})
+        else:
+            pending.append(row['Student_ID'])
+
+    # Rooms a student lived in before can't be reused (roomallocation PK is Student_ID, Room_ID)
+    history = {}
+    if pending:
+        cur.execute(f"SELECT Student_ID, Room_ID FROM roomallocation WHERE Student_ID IN ({_placeholders(pending)})",
+                    tuple(pending))
+        for row in cur.fetchall():
+            history.setdefault(row['Student_ID'], set()).add(row['Room_ID'])
+
+    query = """
+        SELECT Room_ID, Staff_ID, Capacity - Occupancy as FreeBeds
+        FROM room
+        WHERE Capacity > Occupancy AND (Status IS NULL OR Status <> 'Under Maintenance')
+    """
+    params = ()
+    if staff_id is not None:
+        query += " AND Staff_ID = %s"
+        params = (staff_id,)
+    query += " ORDER BY Staff_ID, Occupancy DESC, Room_ID"
+    cur.execute(query, params)
+
+    # Free beds per warden -> per room
+    wardens = OrderedDict()
+    for row in cur.fetchall():
+        wardens.setdefault(row['Staff_ID'], OrderedDict())[row['Room_ID']] = row['FreeBeds']
+    cur.close()
+
+    plan = []
+    turn = list(wardens)
+    position = 0
+    for student_id in pending:
+        past_rooms = history.get(student_id, ())
+        room_id = None
+        for step in range(len(turn)):
+            rooms = wardens[turn[(position + step) % len(turn)]]
+            room_id = next((rid for rid, free in rooms.items() if free > 0 and rid not in past_rooms), None)
+            if room_id is not None:
+                rooms[room_id] -= 1
+                if not rooms[room_id]:
+                    del rooms[room_id]
+                position = (position + step + 1) % len(turn)
+                break
+        if room_id is None:
+            outcomes.append({'student_id': student_id, 'status': 'failed', 'reason': 'no free bed'})
+        else:
+            plan.append((student_id, room_id))
+
+    return plan, outcomes
+
+
+def apply_allocation_plan(plan, allocation_date=None, chunk_size=ALLOCATION_CHUNK_SIZE):
+    """Write a plan in a handful of set-based transactions (one per chunk).
+
+    The plan was made without locks, so each chunk first locks its students
+    and drops any that were given a room in the meantime, then locks the rooms
+    and re-checks their free beds, so a concurrent allocation can neither
+    place a student twice nor push a room past its capacity. Anything that no
+    longer fits is reported instead of inserted. A chunk that fails is rolled
+    back and reported; chunks already committed stay in the outcomes.
+    """
+    allocation_date = allocation_date or date.today()
+    outcomes = []
+    cur = mysql.connection.cursor()
+
+    try:
+        for start in range(0, len(plan), chunk_size):
+            chunk = plan[start:start + chunk_size]
+            try:
+                outcomes += _apply_chunk(cur, chunk, allocation_date)
+            except MySQLdb.Error as e:
+                mysql.connection.rollback()
+                reason = f'database error: {e.args[1] if len(e.args) > 1 else e}'
+                outcomes += [{'student_id': student_id, 'status': 'failed', 'room_id': room_id, 'reason': reason}
+                             for student_id, room_id in chunk]
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return outcomes
+
+
+def _apply_chunk(cur, chunk, allocation_date):
+    outcomes = []
+
+    # Students first, then rooms, always in ID order so concurrent batches can't deadlock
+    student_ids = sorted(student_id for student_id, _ in chunk)
+    cur.execute(f"""
+        SELECT Student_ID FROM student
+        WHERE Student_ID IN ({_placeholders(student_ids)}) AND Room_ID IS NULL
+        ORDER BY Student_ID
+        FOR UPDATE
+    """, tuple(student_ids))
+    unassigned = {row['Student_ID'] for row in cur.fetchall()}
+
+    todo = []
+    for student_id, room_id in chunk:
+        if student_id in unassigned:
+            todo.append((student_id, room_id))
+        else:
+            outcomes.append({'student_id': student_id, 'status': 'failed', 'room_id': room_id,
+                             'reason': 'allocated or removed during allocation'})
+
+    rows, rooms = [], {}
+    if todo:
+        room_ids = sorted({room_id for _, room_id in todo})
+        cur.execute(f"""
+            SELECT Room_ID, Room_no, Capacity - Occupancy as FreeBeds
+            FROM room WHERE Room_ID IN ({_placeholders(room_ids)})
+            ORDER BY Room_ID
+            FOR UPDATE
+        """, tuple(room_ids))
+        rooms = {row['Room_ID']: row for row in cur.fetchall()}
+        free = {room_id: row['FreeBeds'] for room_id, row in rooms.items()}
+
+        for student_id, room_id in todo:
+            if free.get(room_id, 0) > 0:
+                free[room_id] -= 1
+                rows.append((allocation_date, student_id, room_id))
+            else:
+                outcomes.append({'student_id': student_id, 'status': 'failed', 'room_id': room_id,
+                                 'reason': 'room filled up during allocation'})
+
+    if rows:
+        placed_ids = [student_id for _, student_id, _ in rows]
+        cur.executemany("""
+            INSERT INTO roomallocation (AllocationDate, Student_ID, Room_ID)
+            VALUES (%s, %s, %s)
+        """, rows)
+        cur.execute(f"""
+            UPDATE student s
+            JOIN roomallocation ra ON ra.Student_ID = s.Student_ID AND ra.VacateDate IS NULL
+            SET s.Room_ID = ra.Room_ID
+            WHERE s.Student_ID IN ({_placeholders(placed_ids)})
+        """, tuple(placed_ids))
+        cur.execute(f"""
+            UPDATE room SET Status = 'Occupied'
+            WHERE Room_ID IN ({_placeholders(room_ids)}) AND Occupancy > 0
+        """, tuple(room_ids))
+
+    mysql.connection.commit()
+    if rows:
+        # Room.Occupancy moves with the roomallocation inserts (trigger)
+        tables_changed('student', 'room')
+
+    for _, student_id, room_id in rows:
+        outcomes.append({'student_id': student_id, 'status': 'allocated', 'room_id': room_id,
+                         'room_no': rooms[room_id]['Room_no']})
+    return outcomes
+
+
+def allocate_batch(student_ids=None, staff_id=None, allocation_date=None, chunk_size=ALLOCATION_CHUNK_SIZE):
+    plan, outcomes = plan_allocations(student_ids, staff_id)
+    outcomes += apply_allocation_plan(plan, allocation_date, chunk_size)
+    return outcomes
@@ -0,0 +1,183 @@
+import time
+from datetime import date, timedelta
+
+import MySQLdb
+
+from database_connection import mysql
+from models.changes import tables_changed
+from models.students import SEARCH_LIMIT
+
+ARCHIVE_CHUNK_SIZE = 200
+ARCHIVE_AFTER_DAYS = 365
+
+# Child tables first (foreign keys); feebalance rows go with the student via ON DELETE CASCADE
+_ARCHIVED_TABLES = [
+    ('visitlog', 'Visit_ID, Student_ID, Visitor_Name, Ph_no, Relation_to_student, Gate, Client_Ref, CheckIn, CheckOut'),
+    ('visitedby', 'Visitor_Name, Student_ID'),
+    ('studentphone', 'Ph_no, Student_ID'),
+    ('roomallocation', 'AllocationDate, VacateDate, Student_ID, Room_ID'),
+    ('fees', 'Payment_ID, Status, FeesAmount, PaymentDate, Type, Student_ID, BillingPeriod'),
+    ('student', 'Student_ID, FirstName, LastName, Department, Sex, Email, Mess_ID'),
+]
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _archivable(vacated_before, student_ids=None, after=0, limit=ARCHIVE_CHUNK_SIZE, for_update=False):
+    """SQL + params for the next chunk of students that can be archived.
+
+    Without ``student_ids``: former residents whose every allocation ended
+    before ``vacated_before``. Always: no current room and nothing owed.
+    """
+    clauses = ['s.Student_ID > %s', 's.Room_ID IS NULL',
+               'COALESCE(fb.PendingAmount, 0) = 0', 'COALESCE(fb.OverdueAmount, 0) = 0']
+    params = [after]
+    if student_ids:
+        clauses.append(f's.Student_ID IN ({_placeholders(student_ids)})')
+        params.extend(student_ids)
+    else:
+        clauses.append('EXISTS (SELECT 1 FROM roomallocation ra WHERE ra.Student_ID = s.Student_ID)')
+        clauses.append("""NOT EXISTS (SELECT 1 FROM roomallocation ra WHERE ra.Student_ID = s.Student_ID
+                                      AND (ra.VacateDate IS NULL OR ra.VacateDate >= %s))""")
+        params.append(vacated_before)
+    sql = f"""
+        SELECT s.Student_ID FROM student s
+        LEFT JOIN feebalance fb ON fb.Student_ID = s.Student_ID
+        WHERE {' AND '.join(clauses)}
+        ORDER BY s.Student_ID
+        LIMIT %s
+    """
+    if for_update:
+        sql += ' FOR UPDATE'
+    return sql, tuple(params) + (limit,)
+
+
+def find_archivable(vacated_before=None, student_ids=None, limit=1000):
+    vacated_before = vacated_before or date.today() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    cur = mysql.connection.cursor()
+    cur.execute(*_archivable(vacated_before, student_ids, limit=limit))
+    ids = [row['Student_ID'] for row in cur.fetchall()]
+    cur.close()
+    return ids
+
+
+def archive_students(vacated_before=None, student_ids=None, chunk_size=ARCHIVE_CHUNK_SIZE, pause=0.0,
+                     on_chunk=None):
+    """Move archivable students and their dependent rows into the *_archive tables.
+
+    One transaction per chunk of ``chunk_size`` students, so row locks are
+    held for a single chunk only; ``pause`` seconds between chunks lets
+    replicas and other writers catch up. The chunk is re-selected FOR UPDATE
+    inside its transaction, so a student who got a room or a new charge in
+    the meantime is left alone. Returns the archived IDs.
+    """
+    vacated_before = vacated_before or date.today() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    archived, after = [], 0
+    cur = mysql.connection.cursor()
+    try:
+        # Paid fees rows leave with the student; their balance rows go by cascade, so the
+        # per-row balance triggers have nothing to do
+        cur.execute("SET @bulk_fee_writes = 1")
+        while True:
+            cur.execute(*_archivable(vacated_before, student_ids, after, chunk_size, for_update=True))
+            ids = [row['Student_ID'] for row in cur.fetchall()]
+            if not ids:
+                mysql.connection.rollback()
+                break
+
+            started = time.perf_counter()
+            try:
+                for table, columns in _ARCHIVED_TABLES:
+                    cur.execute(f"""
+                        REPLACE INTO {table}_archive ({columns}, ArchivedAt)
+                        SELECT {columns}, NOW() FROM {table} WHERE Student_ID IN ({_placeholders(ids)})
+                    """, tuple(ids))
+                for table, _ in _ARCHIVED_TABLES:
+                    cur.execute(f"DELETE FROM {table} WHERE Student_ID IN ({_placeholders(ids)})", tuple(ids))
+                mysql.connection.commit()
+            except MySQLdb.Error:
+                mysql.connection.rollback()
+                raise
+            # Student deletes also move mess.Headcount (trigger)
+            tables_changed('student', 'fees', 'mess')
+
+            archived.extend(ids)
+            after = ids[-1]
+            if on_chunk:
+                on_chunk(ids, time.perf_counter() - started)
+            if len(ids) < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        try:
+            cur.execute("SET @bulk_fee_writes = NULL")
+        except MySQLdb.Error:
+            mysql.discard_connection()
+        cur.close()
+    return archived
+
+
+def search_archive(term, limit=SEARCH_LIMIT):
+    # Same matching as the live search: n-gram FULLTEXT on names/email, or an exact ID
+    term = (term or '').strip()
+    if not term:
+        return []
+    cur = mysql.connection.cursor()
+    if term.isdigit():
+        cur.execute("""
+            SELECT Student_ID, FirstName, LastName, Department, Email, ArchivedAt
+            FROM student_archive WHERE Student_ID = %s
+        """, (int(term),))
+    else:
+        cur.execute("""
+            SELECT Student_ID, FirstName, LastName, Department, Email, ArchivedAt
+            FROM student_archive
+            WHERE MATCH (FirstName, LastName, Department, Email) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY ArchivedAt DESC
+            LIMIT %s
+        """, ('"' + term.replace('"', ' ') + '"', limit))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def recent_archive(limit=SEARCH_LIMIT):
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT Student_ID, FirstName, LastName, Department, Email, ArchivedAt
+        FROM student_archive ORDER BY ArchivedAt DESC LIMIT %s
+    """, (limit,))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def archived_student(student_id):
+    """An archived student with their fees, allocations, phones and visits, or None."""
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT * FROM student_archive WHERE Student_ID = %s", (student_id,))
+    student = cur.fetchone()
+    if student is None:
+        cur.close()
+        return None
+
+    cur.execute("SELECT * FROM fees_archive WHERE Student_ID = %s ORDER BY PaymentDate DESC", (student_id,))
+    fees = cur.fetchall()
+    cur.execute("""
+        SELECT ra.*, r.Room_no FROM roomallocation_archive ra
+        LEFT JOIN room r ON r.Room_ID = ra.Room_ID
+        WHERE ra.Student_ID = %s ORDER BY ra.AllocationDate DESC
+    """, (student_id,))
+    allocations = cur.fetchall()
+    cur.execute("SELECT Ph_no FROM studentphone_archive WHERE Student_ID = %s", (student_id,))
+    phones = [row['Ph_no'] for row in cur.fetchall()]
+    cur.execute("""
+        SELECT Visitor_Name, Ph_no, Relation_to_student, CheckIn, CheckOut FROM visitlog_archive
+        WHERE Student_ID = %s ORDER BY CheckIn DESC
+    """, (student_id,))
+    visits = cur.fetchall()
+    cur.close()
+    return {'student': student, 'fees': fees, 'allocations': allocations, 'phones': phones, 'visits': visits}
@@ -0,0 +1,155 @@
+import time
+from datetime import date, datetime, timedelta
+
+import MySQLdb
+
+from database_connection import mysql
+from models.changes import tables_changed
+
+DEFAULT_HOSTEL_FEE = 5000.00
+DEFAULT_DUE_DAYS = 10
+
+# Both fee types in one INSERT ... SELECT; the anti-joins on Student_Type_Period make a
+# re-run of the same period insert only what is missing (e.g. students added since).
+# A hostel fee of 0 switches the hostel half off.
+_CHARGES = """
+    INSERT INTO fees (Status, FeesAmount, PaymentDate, Type, Student_ID, BillingPeriod)
+    SELECT 'Pending', m.Fees, %s, 'Mess', s.Student_ID, %s
+    FROM student s
+    JOIN mess m ON m.Mess_ID = s.Mess_ID
+    LEFT JOIN fees f ON f.Student_ID = s.Student_ID AND f.Type = 'Mess' AND f.BillingPeriod = %s
+    WHERE f.Payment_ID IS NULL
+    UNION ALL
+    SELECT 'Pending', %s, %s, 'Hostel', s.Student_ID, %s
+    FROM student s
+    LEFT JOIN fees f ON f.Student_ID = s.Student_ID AND f.Type = 'Hostel' AND f.BillingPeriod = %s
+    WHERE %s > 0 AND s.Room_ID IS NOT NULL AND f.Payment_ID IS NULL
+"""
+
+
+def billing_period(value=None):
+    """First day of the month for a date, 'YYYY-MM' / 'YYYY-MM-DD' string or None (this month)."""
+    if value is None:
+        value = date.today()
+    elif isinstance(value, str):
+        value = datetime.strptime(value[:7], '%Y-%m').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def run_billing(period=None, hostel_fee=DEFAULT_HOSTEL_FEE, due_days=DEFAULT_DUE_DAYS,
+                as_of=None, flip_overdue=True):
+    """Create a month's Pending mess/hostel charges and flip past-due rows to Overdue.
+
+    Everything is a handful of set-based statements in one transaction (one
+    INSERT ... SELECT creates all the charges). The
+    per-row fees triggers are switched off for it (@bulk_fee_writes) and
+    feebalance / feetotals are updated with one grouped statement each
+    instead; the fees version is bumped once after the commit. Safe to
+    re-run for the same period.
+    """
+    period = billing_period(period)
+    due_date = period + timedelta(days=due_days)
+    as_of = as_of or date.today()
+
+    report = {'period': period.isoformat(), 'due_date': due_date.isoformat(), 'mess_charges': 0,
+              'hostel_charges': 0, 'charged_amount': 0.0, 'overdue_flipped': 0, 'overdue_amount': 0.0,
+              'timings_ms': {}}
+    started = phase_started = time.perf_counter()
+
+    def phase(name):
+        nonlocal phase_started
+        now = time.perf_counter()
+        report['timings_ms'][name] = round((now - phase_started) * 1000, 1)
+        phase_started = now
+
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute("SET @bulk_fee_writes = 1")
+
+        # Row lock on the period serialises concurrent runs for the same month
+        cur.execute("INSERT INTO billingrun (Period) VALUES (%s) ON DUPLICATE KEY UPDATE Period = Period", (period,))
+        cur.execute("SELECT Period FROM billingrun WHERE Period = %s FOR UPDATE", (period,))
+        cur.execute("SELECT COALESCE(MAX(Payment_ID), 0) as last_id FROM fees")
+        last_id = cur.fetchone()['last_id']
+        phase('lock')
+
+        cur.execute(_CHARGES, (due_date, period, period,
+                               hostel_fee or 0, due_date, period, period, hostel_fee or 0))
+        inserted = cur.rowcount
+        phase('charges')
+
+        if inserted:
+            # New rows (both types) are a primary key range past last_id
+            cur.execute("""
+                SELECT Type, COUNT(*) as charges, SUM(FeesAmount) as amount FROM fees
+                WHERE Payment_ID > %s AND BillingPeriod = %s
+                GROUP BY Type
+            """, (last_id, period))
+            by_type = {row['Type']: row for row in cur.fetchall()}
+            report['mess_charges'] = by_type['Mess']['charges'] if 'Mess' in by_type else 0
+            report['hostel_charges'] = by_type['Hostel']['charges'] if 'Hostel' in by_type else 0
+            charged = sum(row['amount'] for row in by_type.values())
+
+            cur.execute("""
+                INSERT INTO feebalance (Student_ID, PendingAmount)
+                SELECT Student_ID, SUM(FeesAmount) FROM fees
+                WHERE Payment_ID > %s AND BillingPeriod = %s
+                GROUP BY Student_ID
+                ON DUPLICATE KEY UPDATE PendingAmount = feebalance.PendingAmount + VALUES(PendingAmount)
+            """, (last_id, period))
+            cur.execute("UPDATE feetotals SET PendingAmount = PendingAmount + %s WHERE Totals_ID = 1", (charged,))
+            report['charged_amount'] = float(charged)
+        phase('charge_balances')
+
+        if flip_overdue:
+            cur.execute("""
+                SELECT COALESCE(SUM(FeesAmount), 0) as amount FROM fees
+                WHERE Status = 'Pending' AND PaymentDate < %s AND Student_ID IS NOT NULL
+                FOR UPDATE
+            """, (as_of,))
+            overdue = cur.fetchone()['amount']
+            cur.execute("""
+                INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount)
+                SELECT Student_ID, -SUM(FeesAmount), SUM(FeesAmount) FROM fees
+                WHERE Status = 'Pending' AND PaymentDate < %s AND Student_ID IS NOT NULL
+                GROUP BY Student_ID
+                ON DUPLICATE KEY UPDATE
+                    PendingAmount = feebalance.PendingAmount + VALUES(PendingAmount),
+                    OverdueAmount = feebalance.OverdueAmount + VALUES(OverdueAmount)
+            """, (as_of,))
+            cur.execute("UPDATE fees SET Status = 'Overdue' WHERE Status = 'Pending' AND PaymentDate < %s", (as_of,))
+            report['overdue_flipped'] = cur.rowcount
+            cur.execute("""
+                UPDATE feetotals
+                SET PendingAmount = PendingAmount - %s, OverdueAmount = OverdueAmount + %s
+                WHERE Totals_ID = 1
+            """, (overdue, overdue))
+            report['overdue_amount'] = float(overdue)
+        phase('overdue')
+
+        report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        cur.execute("""
+            UPDATE billingrun
+            SET Runs = Runs + 1, MessCharges = %s, HostelCharges = %s, OverdueFlipped = %s,
+                DurationMs = %s, LastRunAt = NOW()
+            WHERE Period = %s
+        """, (report['mess_charges'], report['hostel_charges'], report['overdue_flipped'],
+              int(report['total_ms']), period))
+        mysql.connection.commit()
+        phase('commit')
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        try:
+            # Pooled connection: never hand the trigger bypass to the next request
+            cur.execute("SET @bulk_fee_writes = NULL")
+        except MySQLdb.Error:
+            mysql.discard_connection()
+        cur.close()
+
+    tables_changed('fees')
+    report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return report
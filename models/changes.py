@@ -0,0 +1,107 @@
+import hashlib
+from contextlib import contextmanager
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, request, jsonify, make_response
+
+from database_connection import mysql
+
+# Tables whose writers bump tablechanges (see tables_changed below)
+TRACKED_TABLES = ('student', 'room', 'mess', 'warden', 'fees')
+
+
+def table_versions(tables):
+    """{table: (version, changed_at)} from tablechanges, a primary key lookup per table."""
+    cur = mysql.connection.cursor()
+    cur.execute(f"""
+        SELECT TableName, Version, ChangedAt FROM tablechanges
+        WHERE TableName IN ({', '.join(['%s'] * len(tables))})
+    """, tuple(tables))
+    versions = {row['TableName']: (row['Version'], row['ChangedAt']) for row in cur.fetchall()}
+    cur.close()
+    return {table: versions.get(table, (0, None)) for table in tables}
+
+
+def tables_changed(*tables):
+    """Bump the change versions of the tables a just-committed transaction wrote.
+
+    Call after the commit, listing every tracked table the transaction
+    touched, trigger-maintained counters included (room.Occupancy via
+    roomallocation, mess.Headcount via student). The upsert is committed on
+    its own, so the tablechanges rows are locked for this one statement
+    rather than for the whole of the writer's transaction.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute("INSERT INTO tablechanges (TableName, Version, ChangedAt) VALUES "
+                    + ', '.join(['(%s, 1, UTC_TIMESTAMP(6))'] * len(tables))
+                    + " ON DUPLICATE KEY UPDATE Version = Version + 1, ChangedAt = UTC_TIMESTAMP(6)",
+                    tuple(tables))
+        mysql.connection.commit()
+    finally:
+        cur.close()
+
+
+@contextmanager
+def after_commit(action):
+    """Guard the version bumps, cache invalidations and live pushes that follow a write.
+
+    By the time they run the write is committed, so a failure among them is
+    logged and the request carries on reporting success; the caches it
+    skipped still expire on their TTLs.
+    """
+    try:
+        yield
+    except Exception:
+        current_app.logger.exception('refresh after %s failed', action)
+
+
+def version_key(versions):
+    # Compact, order-independent key for caches keyed on these versions
+    return '.'.join(f'{table}{versions[table][0]}' for table in sorted(versions))
+
+
+def conditional_json(*tables):
+    """Serve a view's JSON with an ETag / Last-Modified built from table versions.
+
+    When the client's validators still match, answers 304 after the single
+    tablechanges lookup without calling the view. The wrapped view receives
+    the versions as ``versions=`` and returns a JSON-serialisable object.
+    """
+    unknown = set(tables) - set(TRACKED_TABLES)
+    if unknown:
+        raise ValueError(f"no change versions for {', '.join(sorted(unknown))}")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            versions = table_versions(tables)
+            # The query string selects different data (pages, filters), so it is part of the tag
+            etag = hashlib.sha1(
+                f'{request.endpoint}|{request.query_string.decode()}|{version_key(versions)}'.encode()
+            ).hexdigest()[:20]
+            changed = [changed_at for _, changed_at in versions.values() if changed_at is not None]
+            last_modified = max(changed).replace(microsecond=0, tzinfo=timezone.utc) if changed else None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(last_modified and since and last_modified <= since)
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = jsonify(view(*args, versions=versions, **kwargs))
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Clients may keep the body but must revalidate before using it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapped
+    return decorator
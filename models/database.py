@@ -4,26 +4,47 @@ from flask import current_app
 
 # ADDED: Import the globally shared MySQL object
 from database_connection import mysql
+from models.cache import TTLCache
+
+
+# Principals for the Flask-Login user_loader, keyed by "student_<id>" / "admin_<id>".
+# Saves the lookup across the bursts of requests one page makes; the TTL is a few
+# seconds so a deleted account stops working on every worker almost at once.
+user_cache = TTLCache(ttl=5, maxsize=5000)
 
 
 class User:
+    __slots__ = ('id', 'user_type', 'name', 'email')
+
+    # Every loaded User is a real, active account
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
     def __init__(self, user_id, user_type, name, email=None):
         self.id = f"{user_type}_{user_id}" # Flask-Login expects a string ID
         self.user_type = user_type
         self.name = name
         self.email = email
-        self.is_authenticated = True
-        self.is_active = True
-        self.is_anonymous = False
 
     def get_id(self):
         return self.id
 
+    @staticmethod
+    def invalidate(user_type, user_id):
+        # Call after deleting a student/warden or changing their name or email.
+        # Only this worker's cache is cleared; the others expire within USER_CACHE_TTL.
+        user_cache.invalidate(f"{user_type}_{user_id}")
+
     @staticmethod
     def get(user_id_full):
         if not user_id_full:
             return None
         
+        cached = user_cache.get(user_id_full)
+        if cached is not None:
+            return cached
+        
         try:
             user_type, uid_str = user_id_full.split('_')
             # Assuming DB ID is INT
@@ -36,19 +57,24 @@ class User:
         cur = mysql.connection.cursor(None) 
         
         user_data = None
+        user = None
         
         if user_type == 'student':
             cur.execute("SELECT Student_ID, FirstName, LastName, Email FROM student WHERE Student_ID = %s", (uid,))
             user_data = cur.fetchone()
             if user_data:
-                return User(user_data['Student_ID'], 'student', 
+                user = User(user_data['Student_ID'], 'student', 
                             f"{user_data['FirstName']} {user_data['LastName']}", 
                             user_data['Email'])
         elif user_type == 'admin':
             cur.execute("SELECT Staff_ID, Name FROM warden WHERE Staff_ID = %s", (uid,))
             user_data = cur.fetchone()
             if user_data:
-                return User(user_data['Staff_ID'], 'admin', user_data['Name'])
+                user = User(user_data['Staff_ID'], 'admin', user_data['Name'])
         
+        # Close the cursor before the pooled connection goes back at teardown
         cur.close()
-        return None
\ No newline at end of file
+        
+        if user is not None:
+            user_cache.set(user_id_full, user, current_app.config.get('USER_CACHE_TTL'))
+        return user
\ No newline at end of file
@@ -0,0 +1,131 @@
+import csv
+import json
+
+import MySQLdb.cursors
+
+from database_connection import mysql
+
+EXPORT_FETCH_SIZE = 1000
+
+# kind -> (base query, CSV columns, ORDER BY)
+EXPORTS = {
+    'fees': ("""
+        SELECT f.Payment_ID, f.Student_ID, s.FirstName, s.LastName, f.Type,
+               f.FeesAmount, f.Status, f.PaymentDate
+        FROM fees f
+        JOIN student s ON f.Student_ID = s.Student_ID
+    """, ['Payment_ID', 'Student_ID', 'FirstName', 'LastName', 'Type', 'FeesAmount', 'Status', 'PaymentDate'],
+        " ORDER BY f.Payment_ID"),
+    'students': ("""
+        SELECT s.Student_ID, s.FirstName, s.LastName, s.Department, s.Sex, s.Email,
+               s.Room_ID, r.Room_no, s.Mess_ID, m.Name as MessName
+        FROM student s
+        LEFT JOIN room r ON s.Room_ID = r.Room_ID
+        LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
+    """, ['Student_ID', 'FirstName', 'LastName', 'Department', 'Sex', 'Email', 'Room_ID', 'Room_no',
+          'Mess_ID', 'MessName'],
+        " ORDER BY s.Student_ID"),
+    'allocations': ("""
+        SELECT ra.Student_ID, s.FirstName, s.LastName, ra.Room_ID, r.Room_no,
+               ra.AllocationDate, ra.VacateDate
+        FROM roomallocation ra
+        JOIN student s ON ra.Student_ID = s.Student_ID
+        JOIN room r ON ra.Room_ID = r.Room_ID
+    """, ['Student_ID', 'FirstName', 'LastName', 'Room_ID', 'Room_no', 'AllocationDate', 'VacateDate'],
+        " ORDER BY ra.AllocationDate, ra.Student_ID"),
+}
+
+
+def _filters(kind, status=None, date_from=None, date_to=None, department=None):
+    where, params = [], []
+    if kind == 'fees':
+        if status:
+            where.append("f.Status = %s")
+            params.append(status)
+        if date_from:
+            where.append("f.PaymentDate >= %s")
+            params.append(date_from)
+        if date_to:
+            where.append("f.PaymentDate <= %s")
+            params.append(date_to)
+    elif kind == 'students':
+        if department:
+            where.append("s.Department = %s")
+            params.append(department)
+        if status == 'allocated':
+            where.append("s.Room_ID IS NOT NULL")
+        elif status == 'unallocated':
+            where.append("s.Room_ID IS NULL")
+    elif kind == 'allocations':
+        if status == 'active':
+            where.append("ra.VacateDate IS NULL")
+        elif status == 'vacated':
+            where.append("ra.VacateDate IS NOT NULL")
+        if date_from:
+            where.append("ra.AllocationDate >= %s")
+            params.append(date_from)
+        if date_to:
+            where.append("ra.AllocationDate <= %s")
+            params.append(date_to)
+    return where, params
+
+
+def stream_rows(kind, **filters):
+    """Yield rows of an export one at a time from an unbuffered server-side cursor.
+
+    The result set is never materialised in Python, so memory stays flat no
+    matter how many rows the export covers.
+    """
+    query, _, order_by = EXPORTS[kind]
+    where, params = _filters(kind, **filters)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+
+    cur = mysql.connection.cursor(MySQLdb.cursors.SSDictCursor)
+    finished = False
+    try:
+        cur.execute(query + order_by, tuple(params))
+        while True:
+            rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+        finished = True
+    finally:
+        if finished:
+            cur.close()
+        else:
+            # Closing an SSCursor drains the rest of the result set; drop the
+            # connection instead when the client went away mid-export
+            mysql.discard_connection()
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def as_csv(kind, rows):
+    columns = EXPORTS[kind][1]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow([row[col] for col in columns]))
+        if len(batch) >= EXPORT_FETCH_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def as_jsonl(rows):
+    batch = []
+    for row in rows:
+        batch.append(json.dumps(row, default=str) + '\n')
+        if len(batch) >= EXPORT_FETCH_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
@@ -0,0 +1,78 @@
+from database_connection import mysql
+from models.students import DEFAULT_PAGE_SIZE, keyset_bounds, build_keyset_page
+
+
+def rebuild_fee_balances():
+    # Recompute feebalance/feetotals from the fees table (backfill or repair)
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute("""
+            INSERT INTO feebalance (Student_ID, PendingAmount, OverdueAmount, LastPaymentDate)
+            SELECT s.Student_ID,
+                   COALESCE(SUM(CASE WHEN f.Status = 'Pending' THEN f.FeesAmount END), 0),
+                   COALESCE(SUM(CASE WHEN f.Status = 'Overdue' THEN f.FeesAmount END), 0),
+                   MAX(CASE WHEN f.Status = 'Paid' THEN f.PaymentDate END)
+            FROM student s
+            LEFT JOIN fees f ON f.Student_ID = s.Student_ID
+            GROUP BY s.Student_ID
+            ON DUPLICATE KEY UPDATE
+                PendingAmount = VALUES(PendingAmount),
+                OverdueAmount = VALUES(OverdueAmount),
+                LastPaymentDate = VALUES(LastPaymentDate)
+        """)
+        students = cur.rowcount
+        cur.execute("""
+            INSERT INTO feetotals (Totals_ID, PendingAmount, OverdueAmount)
+            SELECT 1, COALESCE(SUM(PendingAmount), 0), COALESCE(SUM(OverdueAmount), 0)
+            FROM feebalance
+            ON DUPLICATE KEY UPDATE
+                PendingAmount = VALUES(PendingAmount),
+                OverdueAmount = VALUES(OverdueAmount)
+        """)
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+    return students
+
+
+def fetch_fee_page(status=None, after=None, before=None, per_page=DEFAULT_PAGE_SIZE, order='desc'):
+    """Keyset-paginate fees (with the student's name) on Payment_ID.
+
+    Same cursors as fetch_student_page: ``after`` / ``before`` are the
+    Payment_IDs at the edges of the current page and only ``per_page + 1``
+    rows are read, through the primary key or the (Status, Payment_ID)
+    index. Complete lists are for the export endpoint, not this page.
+    """
+    where, params, scan_desc = keyset_bounds('f.Payment_ID', after, before, order)
+    if status:
+        where.append("f.Status = %s")
+        params.append(status)
+
+    query = """
+        SELECT f.*, s.FirstName, s.LastName
+        FROM fees f
+        JOIN student s ON f.Student_ID = s.Student_ID
+    """
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY f.Payment_ID " + ("DESC" if scan_desc else "ASC") + " LIMIT %s"
+    params.append(per_page + 1)
+
+    cur = mysql.connection.cursor()
+    cur.execute(query, tuple(params))
+    rows = cur.fetchall()
+    cur.close()
+
+    fees, next_cursor, prev_cursor = build_keyset_page(rows, 'Payment_ID', after, before, per_page)
+    return {
+        'fees': fees,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'per_page': per_page,
+        'order': order,
+        'search': '',
+        'keep': {'status': status} if status else {},
+    }
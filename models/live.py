@@ -0,0 +1,291 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+from database_connection import mysql
+from models.changes import table_versions
+
+SUBSCRIBER_QUEUE_SIZE = 256   # messages buffered per browser before it is dropped
+REPLAY_BUFFER = 512           # recent messages kept for Last-Event-ID resumes
+HEARTBEAT_SECONDS = 15
+MAX_SUBSCRIBERS = 2           # open streams per threaded worker (the gevent live server sets its own)
+BUSY_RETRY_SECONDS = 10       # when full, browsers are told to reconnect after about this long
+LIVE_TABLES = ('room', 'mess', 'student', 'fees')
+
+
+def _sse(message_id, event, data):
+    return f'id: {message_id}\nevent: {event}\ndata: {json.dumps(data, default=str, separators=(",", ":"))}\n\n'
+
+
+class Broadcaster:
+    """Fans small JSON deltas out to Server-Sent Event subscribers in this process.
+
+    Each message is serialised once in ``publish`` and the same string is put
+    on every subscriber's queue, so the cost of a change does not depend on
+    how many dashboards are open. The last known state (room occupancy, mess
+    headcounts, totals) lives here too; deltas are computed by diffing fresh
+    rows against it, and new subscribers start from a snapshot of it.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE, replay=REPLAY_BUFFER):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._recent = deque(maxlen=replay)   # (sequence number, formatted message)
+        self._next_id = 1
+        self._pid = self._token = None
+        self._lock = threading.Lock()
+        self.state = None
+        self.versions = None
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _event_id(self, seq):
+        # Sequence numbers only mean something in the process that issued them, and a
+        # reconnect may land on another worker: the per-process token tells them apart.
+        # Made lazily because the broadcaster is created in the gunicorn master.
+        if self._pid != os.getpid():
+            self._pid, self._token = os.getpid(), os.urandom(4).hex()
+        return f'{self._token}-{seq}'
+
+    def _resume_from(self, last_event_id):
+        token, _, seq = (last_event_id or '').partition('-')
+        if self._pid != os.getpid() or token != self._token or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if self._recent and self._recent[0][0] <= seq + 1 <= self._next_id:
+            return seq
+        return None
+
+    def publish(self, event, data):
+        with self._lock:
+            seq = self._next_id
+            self._next_id += 1
+            message = _sse(self._event_id(seq), event, data)
+            self._recent.append((seq, message))
+            subscribers = list(self._subscribers)
+            self.published += 1
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Too slow to keep up: cut it off, the browser reconnects and gets a snapshot
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        with self._lock:
+            self._remove(subscriber)
+            self.dropped += 1
+        with subscriber.mutex:
+            subscriber.queue.clear()
+        subscriber.put_nowait(None)
+
+    def subscribe(self, last_event_id=None, state=None, versions=None, limit=None):
+        """Register a subscriber; returns ``(queue, first_messages)``.
+
+        ``state`` seeds the known state when nobody was listening before.
+        ``last_event_id`` only resumes from the replay buffer when this process
+        issued it; anything else starts from a snapshot.
+        Returns ``(None, None)`` when ``limit`` subscribers are already open.
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if limit and len(self._subscribers) >= limit:
+                self.rejected += 1
+                return None, None
+            if self.state is None and state is not None:
+                self.state, self.versions = state, versions
+            resume = self._resume_from(last_event_id)
+            if resume is not None:
+                first = [message for seq, message in self._recent if seq > resume]
+            else:
+                first = [_sse(self._event_id(self._next_id - 1), 'snapshot', self.state or {})]
+            self._subscribers.add(subscriber)
+        return subscriber, first
+
+    def _remove(self, subscriber):
+        self._subscribers.discard(subscriber)
+        if not self._subscribers:
+            # Nobody is listening, so nothing keeps the state current any more
+            self.state = self.versions = None
+            self._recent.clear()
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._remove(subscriber)
+
+    def stream(self, subscriber, first, heartbeat=HEARTBEAT_SECONDS):
+        try:
+            yield 'retry: 3000\n\n'
+            for message in first:
+                yield message
+            while True:
+                try:
+                    message = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def apply(self, rooms=None, mess=None, totals=None, versions=None):
+        """Diff fresh rows against the known state and publish what changed."""
+        with self._lock:
+            if self.state is None:
+                return
+            state = self.state
+            if versions is not None:
+                self.versions = versions
+
+            room_delta = {}
+            for room_id, room in (rooms or {}).items():
+                if state['rooms'].get(room_id) != room:
+                    state['rooms'][room_id] = room_delta[room_id] = room
+
+            mess_delta = {}
+            if mess is not None:
+                for mess_id in set(state['mess']) | set(mess):
+                    if state['mess'].get(mess_id, 0) != mess.get(mess_id, 0):
+                        mess_delta[mess_id] = mess.get(mess_id, 0)
+                state['mess'] = dict(mess)
+
+            totals_changed = totals is not None and totals != state['totals']
+            if totals_changed:
+                state['totals'] = totals
+
+        if room_delta:
+            self.publish('rooms', room_delta)
+        if mess_delta:
+            self.publish('mess', mess_delta)
+        if totals_changed:
+            self.publish('totals', totals)
+
+    def stats(self):
+        return {'subscribers': self.subscriber_count, 'published': self.published,
+                'dropped': self.dropped, 'rejected': self.rejected, 'last_id': self._next_id - 1}
+
+
+broadcaster = Broadcaster()
+
+
+def _load_rooms(cur, room_ids=None):
+    query = "SELECT Room_ID, Room_no, Capacity, Occupancy, Status FROM room"
+    if room_ids:
+        query += f" WHERE Room_ID IN ({', '.join(['%s'] * len(room_ids))})"
+    cur.execute(query, tuple(room_ids or ()))
+    return {row['Room_ID']: {'room_no': row['Room_no'], 'capacity': row['Capacity'],
+                             'occupancy': row['Occupancy'], 'status': row['Status']}
+            for row in cur.fetchall()}
+
+
+def _load_mess(cur):
+    cur.execute("SELECT Mess_ID, Headcount FROM mess")
+    return {row['Mess_ID']: row['Headcount'] for row in cur.fetchall()}
+
+
+def _load_totals(cur):
+    cur.execute("""
+        SELECT (SELECT COUNT(*) FROM student) as students,
+               COALESCE(SUM(PendingAmount + OverdueAmount), 0) as pending_fees
+        FROM feetotals
+    """)
+    row = cur.fetchone()
+    return {'students': row['students'], 'pending_fees': float(row['pending_fees'])}
+
+
+def _load_all():
+    cur = mysql.connection.cursor()
+    try:
+        return _load_rooms(cur), _load_mess(cur), _load_totals(cur)
+    finally:
+        cur.close()
+
+
+def publish_changes(*room_ids):
+    """Push deltas after a commit that touched students, allocations or fees.
+
+    Only the given rooms are re-read (plus the small mess/totals queries),
+    and nothing at all is queried while no dashboard is listening.
+    """
+    if not broadcaster.subscriber_count:
+        return
+    room_ids = [room_id for room_id in room_ids if room_id is not None]
+    cur = mysql.connection.cursor()
+    try:
+        rooms = _load_rooms(cur, room_ids) if room_ids else None
+        mess, totals = _load_mess(cur), _load_totals(cur)
+    finally:
+        cur.close()
+    broadcaster.apply(rooms=rooms, mess=mess, totals=totals, versions=table_versions(LIVE_TABLES))
+
+
+def _busy(retry_seconds):
+    # A 200 that ends right away: EventSource reconnects after `retry`, most likely to
+    # another worker; jitter keeps a crowd of rejected tabs from coming back in step
+    retry_ms = int(retry_seconds * 1000 * random.uniform(0.5, 1.5))
+    yield f'retry: {retry_ms}\nevent: busy\ndata: {{}}\n\n'
+
+
+def subscribe(app, last_event_id=None):
+    """Generator of SSE text for one browser; call from the request, iterate outside it.
+
+    At most LIVE_MAX_SUBSCRIBERS are served per worker (a few on the threaded
+    server, where each stream holds a thread; hundreds on the gevent live
+    server); the rest get a retry hint.
+    """
+    limit = app.config.get('LIVE_MAX_SUBSCRIBERS', MAX_SUBSCRIBERS)
+    _ensure_watcher(app)
+    state = versions = None
+    if broadcaster.state is None:
+        versions = table_versions(LIVE_TABLES)
+        rooms, mess, totals = _load_all()
+        state = {'rooms': rooms, 'mess': mess, 'totals': totals}
+    subscriber, first = broadcaster.subscribe(last_event_id, state, versions, limit)
+    if subscriber is None:
+        return _busy(app.config.get('LIVE_BUSY_RETRY_SECONDS', BUSY_RETRY_SECONDS))
+    return broadcaster.stream(subscriber, first, app.config.get('LIVE_HEARTBEAT_SECONDS', HEARTBEAT_SECONDS))
+
+
+_watcher_pid = None
+_watcher_lock = threading.Lock()
+
+
+def _ensure_watcher(app):
+    # Writes made by other worker processes reach this one's subscribers via
+    # a single tablechanges poll per process (not per subscriber)
+    global _watcher_pid
+    if _watcher_pid == os.getpid():
+        return
+    with _watcher_lock:
+        if _watcher_pid == os.getpid():
+            return
+        _watcher_pid = os.getpid()
+        threading.Thread(target=_watch, args=(app,), name='live-watcher', daemon=True).start()
+
+
+def _watch(app):
+    interval = app.config.get('LIVE_POLL_SECONDS', 2)
+    while True:
+        time.sleep(interval)
+        if not broadcaster.subscriber_count:
+            continue
+        try:
+            with app.app_context():
+                versions = table_versions(LIVE_TABLES)
+                if versions != broadcaster.versions:
+                    rooms, mess, totals = _load_all()
+                    broadcaster.apply(rooms=rooms, mess=mess, totals=totals, versions=versions)
+        except Exception:
+            app.logger.exception('live update poll failed')
@@ -0,0 +1,148 @@
+from datetime import date
+
+from database_connection import mysql
+from models.changes import tables_changed
+
+ROLLUP_DAYS_LIMIT = 366
+
+# Messes whose maintained counter disagrees with the student table
+_DRIFT_QUERY = """
+    SELECT m.Mess_ID, m.Name, m.Headcount, COALESCE(s.Students, 0) as Students
+    FROM mess m
+    LEFT JOIN (
+        SELECT Mess_ID, COUNT(*) as Students
+        FROM student
+        WHERE Mess_ID IS NOT NULL
+        GROUP BY Mess_ID
+    ) s ON s.Mess_ID = m.Mess_ID
+    WHERE m.Headcount <> COALESCE(s.Students, 0)
+"""
+
+# Today's counters, with the day's share of the monthly fee as revenue
+_DAILY_ROLLUP = """
+    INSERT INTO messdaily (Day, Mess_ID, Headcount, Capacity, Revenue)
+    SELECT %s, Mess_ID, Headcount, Capacity, ROUND(Headcount * COALESCE(Fees, 0) / DAY(LAST_DAY(%s)), 2)
+    FROM mess
+    ON DUPLICATE KEY UPDATE Headcount = VALUES(Headcount), Capacity = VALUES(Capacity), Revenue = VALUES(Revenue)
+"""
+_MONTHLY_ROLLUP = """
+    INSERT INTO messmonthly (Month, Mess_ID, Days, AvgHeadcount, MaxHeadcount, Revenue)
+    SELECT %s, Mess_ID, COUNT(*), AVG(Headcount), MAX(Headcount), SUM(Revenue)
+    FROM messdaily
+    WHERE Day BETWEEN %s AND LAST_DAY(%s)
+    GROUP BY Mess_ID
+    ON DUPLICATE KEY UPDATE Days = VALUES(Days), AvgHeadcount = VALUES(AvgHeadcount),
+                            MaxHeadcount = VALUES(MaxHeadcount), Revenue = VALUES(Revenue)
+"""
+
+
+def find_headcount_drift():
+    cur = mysql.connection.cursor()
+    cur.execute(_DRIFT_QUERY)
+    drift = cur.fetchall()
+    cur.close()
+    return drift
+
+
+def repair_headcount():
+    # Same shape as repair_occupancy: lock, recount in one statement, commit
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute(_DRIFT_QUERY + " FOR UPDATE")
+        drift = cur.fetchall()
+        if drift:
+            cur.execute("""
+                UPDATE mess m
+                LEFT JOIN (
+                    SELECT Mess_ID, COUNT(*) as Students
+                    FROM student
+                    WHERE Mess_ID IS NOT NULL
+                    GROUP BY Mess_ID
+                ) s ON s.Mess_ID = m.Mess_ID
+                SET m.Headcount = COALESCE(s.Students, 0)
+                WHERE m.Headcount <> COALESCE(s.Students, 0)
+            """)
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+    if drift:
+        tables_changed('mess')
+    return drift
+
+
+def headcounts(mess_id=None):
+    # Primary key reads of the counters, no COUNT over student
+    query = """
+        SELECT Mess_ID, Name, Type, Fees, Capacity, Headcount,
+               IF(Capacity IS NULL, NULL, GREATEST(Capacity - Headcount, 0)) as Available
+        FROM mess
+    """
+    params = ()
+    if mess_id is not None:
+        query += " WHERE Mess_ID = %s"
+        params = (mess_id,)
+    cur = mysql.connection.cursor()
+    cur.execute(query + " ORDER BY Name", params)
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def roll_up(day=None):
+    """Snapshot every mess's headcount into messdaily and refold that month into messmonthly.
+
+    The snapshot is of the counters as they are now, so run it once a day
+    (re-running the same day overwrites that day's row).
+    """
+    day = day or date.today()
+    month = day.replace(day=1)
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute(_DAILY_ROLLUP, (day, day))
+        cur.execute(_MONTHLY_ROLLUP, (month, month, month))
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+    return {'day': day.isoformat(), 'month': month.isoformat()}
+
+
+def daily_rollups(date_from, date_to, mess_id=None):
+    clauses, params = ['d.Day BETWEEN %s AND %s'], [date_from, date_to]
+    if mess_id is not None:
+        clauses.append('d.Mess_ID = %s')
+        params.append(mess_id)
+    cur = mysql.connection.cursor()
+    cur.execute(f"""
+        SELECT d.Day, d.Mess_ID, m.Name, d.Headcount, d.Capacity, d.Revenue
+        FROM messdaily d
+        LEFT JOIN mess m ON m.Mess_ID = d.Mess_ID
+        WHERE {' AND '.join(clauses)}
+        ORDER BY d.Day, d.Mess_ID
+    """, tuple(params))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def monthly_rollups(month_from, month_to, mess_id=None):
+    clauses, params = ['r.Month BETWEEN %s AND %s'], [month_from, month_to]
+    if mess_id is not None:
+        clauses.append('r.Mess_ID = %s')
+        params.append(mess_id)
+    cur = mysql.connection.cursor()
+    cur.execute(f"""
+        SELECT r.Month, r.Mess_ID, m.Name, r.Days, r.AvgHeadcount, r.MaxHeadcount, r.Revenue
+        FROM messmonthly r
+        LEFT JOIN mess m ON m.Mess_ID = r.Mess_ID
+        WHERE {' AND '.join(clauses)}
+        ORDER BY r.Month, r.Mess_ID
+    """, tuple(params))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
@@ -0,0 +1,142 @@
+import os
+import re
+
+import click
+import MySQLdb
+from flask.cli import AppGroup
+
+from database_connection import mysql
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# "Already exists" errors: re-running a migration against a schema that has
+# the change (e.g. one built from hostel_db_setup.sql) is a no-op
+_ALREADY_APPLIED = {
+    1022,  # duplicate key
+    1050,  # table exists
+    1060,  # duplicate column
+    1061,  # duplicate key name
+    1304,  # procedure/function exists
+    1359,  # trigger exists
+    1826,  # duplicate foreign key constraint
+}
+
+db_cli = AppGroup('db', help='Schema migrations and query plan checks.')
+
+
+def discover_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    # Understands the mysql client's DELIMITER directive used around triggers/procedures
+    statements, buffer, delimiter = [], [], ';'
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(buffer).rstrip()[:-len(delimiter)].strip()
+            buffer = []
+            if any(l.strip() and not l.strip().startswith('--') for l in statement.splitlines()):
+                statements.append(statement)
+    return statements
+
+
+def _ensure_version_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            Version INT NOT NULL,
+            Name VARCHAR(100) NOT NULL,
+            AppliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (Version)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def applied_versions():
+    cur = mysql.connection.cursor()
+    _ensure_version_table(cur)
+    cur.execute("SELECT Version FROM schema_migrations")
+    versions = {row['Version'] for row in cur.fetchall()}
+    cur.close()
+    return versions
+
+
+def upgrade(target=None, echo=click.echo):
+    """Apply pending migrations in order, recording each in schema_migrations."""
+    cur = mysql.connection.cursor()
+    # Only one process migrates at a time (e.g. several workers starting together)
+    cur.execute("SELECT GET_LOCK('hostel_db_migrations', 60) as locked")
+    if not cur.fetchone()['locked']:
+        raise click.ClickException('Another process is running migrations.')
+
+    applied = []
+    try:
+        done = applied_versions()
+        for version, name, path in discover_migrations():
+            if version in done or (target is not None and version > target):
+                continue
+            with open(path, encoding='utf-8') as f:
+                statements = split_statements(f.read())
+
+            echo(f'Applying {version:04d}_{name} ({len(statements)} statements)')
+            for statement in statements:
+                try:
+                    cur.execute(statement)
+                    while cur.nextset():
+                        pass
+                except MySQLdb.Error as e:
+                    if e.args and e.args[0] in _ALREADY_APPLIED:
+                        echo(f'  already present, skipped: {e.args[1]}')
+                        continue
+                    mysql.connection.rollback()
+                    raise click.ClickException(f'{version:04d}_{name} failed: {e}')
+
+            cur.execute("INSERT INTO schema_migrations (Version, Name) VALUES (%s, %s)", (version, name))
+            mysql.connection.commit()
+            applied.append(version)
+    finally:
+        cur.execute("SELECT RELEASE_LOCK('hostel_db_migrations')")
+        cur.fetchall()
+        cur.close()
+    return applied
+
+
+@db_cli.command('upgrade')
+@click.option('--to', 'target', type=int, help='Stop after this migration version.')
+def upgrade_command(target):
+    """Apply pending schema migrations."""
+    applied = upgrade(target)
+    click.echo(f'Applied {len(applied)} migration(s).' if applied else 'Schema is up to date.')
+
+
+@db_cli.command('status')
+def status_command():
+    """List migrations and whether they have been applied."""
+    done = applied_versions()
+    for version, name, _ in discover_migrations():
+        click.echo(f"{'applied' if version in done else 'pending':<8} {version:04d}_{name}")
+
+
+@db_cli.command('check-plans')
+@click.option('--min-rows', default=1000, show_default=True,
+              help='Flag full scans whose estimated row count reaches this.')
+def check_plans_command(min_rows):
+    """EXPLAIN every query the blueprints issue and fail on large full table scans."""
+    from models.query_plans import check_query_plans
+
+    checked, violations = check_query_plans(min_rows)
+    for path, query, plan in violations:
+        click.echo(f"FULL SCAN of {plan['table']} (~{plan['rows']} rows) from {path}:\n  {query}\n", err=True)
+    click.echo(f'Checked {checked} distinct statements, {len(violations)} full scan(s) over {min_rows} rows.')
+    if violations:
+        raise SystemExit(1)
@@ -0,0 +1,148 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from database_connection import mysql
+
+
+GLOBAL_SCOPE = ('global',)
+
+
+def _scope_key(scope):
+    return ':'.join(str(part) for part in scope)
+
+
+def _load_versions(scopes):
+    # {scope: version} from cacheversions, one primary key lookup for all of them
+    keys = {_scope_key(scope): scope for scope in scopes}
+    cur = mysql.connection.cursor()
+    cur.execute(f"SELECT Scope, Version FROM cacheversions WHERE Scope IN ({', '.join(['%s'] * len(keys))})",
+                tuple(keys))
+    found = {row['Scope']: row['Version'] for row in cur.fetchall()}
+    cur.close()
+    return {scope: found.get(key, 0) for key, scope in keys.items()}
+
+
+def _bump_versions(scopes):
+    keys = sorted({_scope_key(scope) for scope in scopes})
+    if not keys:
+        return
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute("INSERT INTO cacheversions (Scope, Version) VALUES "
+                    + ', '.join(['(%s, 1)'] * len(keys))
+                    + " ON DUPLICATE KEY UPDATE Version = Version + 1", tuple(keys))
+        # Its own short transaction: the rows are not locked while the caller works
+        mysql.connection.commit()
+    finally:
+        cur.close()
+
+
+class VersionedCache:
+    """Per-worker cache of student portal query results.
+
+    Every entry remembers the version of each scope it was built from
+    (``('student', id)``, ``('room', id)``, ``GLOBAL_SCOPE``). Writers call
+    ``bump()`` for the scopes they touched, which makes every dependent entry
+    stale at once without having to know the cache keys. Versions live in the
+    ``cacheversions`` table, so a bump made by any worker (or a CLI command)
+    is seen by all of them; a hit costs that one primary key lookup instead
+    of the page's queries. Size is capped by an estimate of the pickled
+    bytes, evicting least recently used entries.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=120):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, {scope: version}, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bump(self, *scopes):
+        # Call after committing the writes, so no reader can rebuild from the old rows
+        _bump_versions(scopes)
+
+    def _drop(self, key):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, deps, value = entry
+            # The version lookup is a query: done outside the lock
+            if expires_at >= time.monotonic() and _load_versions(deps) == deps:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                return value
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._drop(key)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, deps):
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, deps, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, scopes=()):
+        """Return the cached value for ``key`` or build it with ``loader()``.
+
+        ``loader`` returns ``(value, extra_scopes)``; ``scopes`` known up
+        front are versioned before loading so a concurrent bump is not lost.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        deps = _load_versions((GLOBAL_SCOPE,) + tuple(scopes))
+        value, extra_scopes = loader()
+        extra_scopes = [scope for scope in extra_scopes if scope not in deps]
+        if extra_scopes:
+            deps.update(_load_versions(extra_scopes))
+        self.set(key, value, deps)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+portal_cache = VersionedCache()
+
+
+def configure_portal_cache(app):
+    portal_cache.max_bytes = app.config.get('PORTAL_CACHE_MAX_BYTES', portal_cache.max_bytes)
+    portal_cache.ttl = app.config.get('PORTAL_CACHE_TTL', portal_cache.ttl)
+
+
+def student_changed(*student_ids):
+    # Student row, allocation, mess, fees or visitors changed
+    portal_cache.bump(*(('student', int(sid)) for sid in student_ids))
+
+
+def room_changed(*room_ids):
+    # Residents of a room changed (roommate lists)
+    portal_cache.bump(*(('room', int(rid)) for rid in room_ids if rid is not None))
+
+
+def everything_changed():
+    portal_cache.bump(GLOBAL_SCOPE)
@@ -0,0 +1,71 @@
+import MySQLdb.cursors
+from flask import current_app
+
+import instrumentation
+from database_connection import mysql
+
+# Parameterised pages on top of every argument-free GET route in the portals
+EXTRA_PATHS = [
+    '/admin/students?search=sharma',
+    '/admin/students?search=20',
+    '/admin/fees?status=Pending',
+    '/admin/api/students?per_page=50',
+    '/admin/api/students/search?q=am',
+    '/mess/api/headcount',
+    '/mess/api/rollups/daily',
+    '/mess/api/rollups/monthly',
+]
+# admin.live is an endless event stream
+SKIPPED_ENDPOINTS = {'admin.metrics', 'admin.pool_stats', 'admin.cache_stats', 'admin.live'}
+
+
+def _portal_paths(app, prefix):
+    paths = []
+    for rule in app.url_map.iter_rules():
+        if (rule.endpoint.startswith(prefix) and 'GET' in rule.methods and not rule.arguments
+                and rule.endpoint not in SKIPPED_ENDPOINTS):
+            paths.append(rule.rule)
+    return sorted(paths)
+
+
+def _capture(app):
+    """Log in as a sample student and warden and record every statement the pages run."""
+    with app.app_context():
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT MIN(Student_ID) as sid FROM student")
+        student_id = cur.fetchone()['sid']
+        cur.execute("SELECT MIN(Staff_ID) as wid FROM warden")
+        staff_id = cur.fetchone()['wid']
+        cur.close()
+
+    instrumentation.captured_queries = []
+    try:
+        for user_type, user_id, prefix in (('student', student_id, 'student.'), ('admin', staff_id, 'admin.')):
+            client = app.test_client()
+            client.post('/auth/login', data={'user_type': user_type, 'user_id': user_id, 'password': str(user_id)})
+            paths = _portal_paths(app, prefix) + (EXTRA_PATHS if user_type == 'admin' else [])
+            for path in paths:
+                client.get(path).get_data()
+        return [entry for entry in instrumentation.captured_queries if entry[0] is not None]
+    finally:
+        instrumentation.captured_queries = None
+
+
+def check_query_plans(min_rows=1000):
+    app = current_app._get_current_object()
+    captured = _capture(app)
+
+    seen, violations = set(), []
+    cur = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
+    for path, query, args in captured:
+        statement = ' '.join(str(query).split())
+        if statement in seen or not statement.upper().startswith('SELECT'):
+            continue
+        seen.add(statement)
+
+        cur.execute('EXPLAIN ' + str(query), args)
+        for plan in cur.fetchall():
+            if plan.get('type') == 'ALL' and (plan.get('rows') or 0) >= min_rows:
+                violations.append((path, statement, plan))
+    cur.close()
+    return len(seen), violations
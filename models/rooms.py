@@ -0,0 +1,52 @@
+from database_connection import mysql
+from models.changes import tables_changed
+
+# Rooms whose maintained counter disagrees with the active allocations
+_DRIFT_QUERY = """
+    SELECT r.Room_ID, r.Room_no, r.Occupancy, COALESCE(a.Active, 0) as Active
+    FROM room r
+    LEFT JOIN (
+        SELECT Room_ID, COUNT(*) as Active
+        FROM roomallocation
+        WHERE VacateDate IS NULL
+        GROUP BY Room_ID
+    ) a ON a.Room_ID = r.Room_ID
+    WHERE r.Occupancy <> COALESCE(a.Active, 0)
+"""
+
+
+def find_occupancy_drift():
+    cur = mysql.connection.cursor()
+    cur.execute(_DRIFT_QUERY)
+    drift = cur.fetchall()
+    cur.close()
+    return drift
+
+
+def repair_occupancy():
+    # Recount in one statement; the locking read keeps new allocations out until commit
+    cur = mysql.connection.cursor()
+    try:
+        cur.execute(_DRIFT_QUERY + " FOR UPDATE")
+        drift = cur.fetchall()
+        if drift:
+            cur.execute("""
+                UPDATE room r
+                LEFT JOIN (
+                    SELECT Room_ID, COUNT(*) as Active
+                    FROM roomallocation
+                    WHERE VacateDate IS NULL
+                    GROUP BY Room_ID
+                ) a ON a.Room_ID = r.Room_ID
+                SET r.Occupancy = COALESCE(a.Active, 0)
+                WHERE r.Occupancy <> COALESCE(a.Active, 0)
+            """)
+        mysql.connection.commit()
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+    if drift:
+        tables_changed('room')
+    return drift
@@ -0,0 +1,49 @@
+from flask import current_app
+
+from database_connection import mysql
+from models.cache import TTLCache
+
+# Headline numbers shown on the admin dashboard tiles
+_stats_cache = TTLCache(ttl=30, maxsize=16)
+
+
+# One round trip instead of four separate COUNT/SUM queries
+DASHBOARD_STATS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM student) AS total_students,
+        r.total_rooms,
+        r.occupied_rooms,
+        (SELECT COALESCE(SUM(PendingAmount + OverdueAmount), 0) FROM feetotals) AS pending_fees
+    FROM (SELECT COUNT(*) AS total_rooms,
+                 COALESCE(SUM(Status = 'Occupied'), 0) AS occupied_rooms
+          FROM room) r
+"""
+
+
+def _load_dashboard_stats():
+    cur = mysql.connection.cursor()
+    cur.execute(DASHBOARD_STATS_QUERY)
+    stats = cur.fetchone()
+    cur.close()
+    return stats
+
+
+def get_dashboard_stats(version=None):
+    # With a table version key (models/changes.py) the entry is exact, not just TTL-bounded
+    ttl = current_app.config.get('DASHBOARD_STATS_TTL', 30)
+    key = ('dashboard', version) if version else 'dashboard'
+    return _stats_cache.get_or_set(key, _load_dashboard_stats, ttl)
+
+
+def cached_dashboard_stats():
+    # None on a miss; the caller loads DASHBOARD_STATS_QUERY itself and hands it to remember_dashboard_stats
+    return _stats_cache.get('dashboard')
+
+
+def remember_dashboard_stats(stats):
+    _stats_cache.set('dashboard', stats, current_app.config.get('DASHBOARD_STATS_TTL', 30))
+
+
+def invalidate_dashboard_stats():
+    # Call after committing anything that changes students, rooms or fees
+    _stats_cache.invalidate('dashboard')
@@ -0,0 +1,168 @@
+import csv
+
+import MySQLdb
+
+from database_connection import mysql
+from models.changes import tables_changed
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# CSV header -> field; accepts the add-student form names and the DB column names
+_COLUMN_ALIASES = {
+    'student_id': 'student_id', 'first_name': 'first_name', 'firstname': 'first_name',
+    'last_name': 'last_name', 'lastname': 'last_name', 'department': 'department',
+    'sex': 'sex', 'gender': 'sex', 'email': 'email', 'phone': 'phone', 'ph_no': 'phone',
+    'mess_id': 'mess_id',
+}
+_REQUIRED = ('student_id', 'first_name', 'last_name', 'department', 'sex', 'email')
+
+_STUDENT_INSERT = """
+    INSERT INTO student (Student_ID, FirstName, LastName, Department, Sex, Email, Mess_ID)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+_PHONE_INSERT = "INSERT INTO studentphone (Ph_no, Student_ID) VALUES (%s, %s)"
+
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []  # (line number, message), capped at MAX_REPORTED_ERRORS
+        self.stopped_at = None  # first line not imported when the file became unreadable (encoding, quoting)
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {'total': self.total, 'inserted': self.inserted, 'failed': self.failed,
+                'stopped_at': self.stopped_at,
+                'errors': [{'line': line, 'error': message} for line, message in self.errors]}
+
+
+def _normalize(raw):
+    row = {}
+    for key, value in raw.items():
+        field = _COLUMN_ALIASES.get((key or '').strip().lower())
+        if field:
+            row[field] = (value or '').strip()
+    return row
+
+
+def _validate(row, mess_ids, default_mess_id):
+    missing = [field for field in _REQUIRED if not row.get(field)]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    try:
+        student_id = int(row['student_id'])
+    except ValueError:
+        return None, f"invalid student_id {row['student_id']!r}"
+    sex = row['sex'].upper()[:1]
+    if sex not in ('M', 'F'):
+        return None, f"invalid sex {row['sex']!r}"
+    if '@' not in row['email']:
+        return None, f"invalid email {row['email']!r}"
+
+    mess_id = row.get('mess_id') or default_mess_id
+    if mess_id is not None and mess_id != '':
+        try:
+            mess_id = int(mess_id)
+        except ValueError:
+            return None, f"invalid mess_id {mess_id!r}"
+        if mess_id not in mess_ids:
+            return None, f"mess {mess_id} does not exist"
+    else:
+        mess_id = None
+
+    student = (student_id, row['first_name'], row['last_name'], row['department'],
+               sex, row['email'], mess_id)
+    return (student, row.get('phone') or None), None
+
+
+def _flush(cur, chunk, report):
+    """Insert one validated chunk; fall back to row-by-row to isolate bad rows."""
+    if not chunk:
+        return
+
+    # Skip IDs that already exist so one duplicate doesn't sink the whole batch
+    ids = [student[0] for _, (student, _) in chunk]
+    placeholders = ', '.join(['%s'] * len(ids))
+    cur.execute(f"SELECT Student_ID FROM student WHERE Student_ID IN ({placeholders})", tuple(ids))
+    existing = {row['Student_ID'] for row in cur.fetchall()}
+
+    rows, seen = [], set()
+    for line, (student, phone) in chunk:
+        if student[0] in existing or student[0] in seen:
+            report.error(line, f'Student_ID {student[0]} already exists')
+            continue
+        seen.add(student[0])
+        rows.append((line, student, phone))
+
+    try:
+        cur.executemany(_STUDENT_INSERT, [student for _, student, _ in rows])
+        phones = [(phone, student[0]) for _, student, phone in rows if phone]
+        if phones:
+            cur.executemany(_PHONE_INSERT, phones)
+        mysql.connection.commit()
+        report.inserted += len(rows)
+        # New students also move mess.Headcount (trigger)
+        tables_changed('student', 'mess')
+        return
+    except MySQLdb.Error:
+        mysql.connection.rollback()
+
+    inserted = report.inserted
+    for line, student, phone in rows:
+        try:
+            cur.execute(_STUDENT_INSERT, student)
+            if phone:
+                cur.execute(_PHONE_INSERT, (phone, student[0]))
+            mysql.connection.commit()
+            report.inserted += 1
+        except MySQLdb.Error as e:
+            mysql.connection.rollback()
+            report.error(line, e.args[1] if len(e.args) > 1 else str(e))
+    if report.inserted > inserted:
+        tables_changed('student', 'mess')
+
+
+def import_students(lines, chunk_size=IMPORT_CHUNK_SIZE, default_mess_id=None):
+    """Stream students from CSV text lines into the database.
+
+    Rows are validated as they are read and written in chunks of
+    ``chunk_size`` with one commit per chunk, so memory use does not depend
+    on the size of the file. Bad rows are reported, not fatal. A file that
+    stops being readable part way (bad UTF-8, broken quoting) ends the import
+    there: the rows before it are kept and the report says where it stopped.
+    """
+    report = ImportReport()
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT Mess_ID FROM mess")
+    mess_ids = {row['Mess_ID'] for row in cur.fetchall()}
+
+    reader = csv.DictReader(lines)
+    chunk = []
+    try:
+        try:
+            for raw in reader:
+                report.total += 1
+                parsed, error = _validate(_normalize(raw), mess_ids, default_mess_id)
+                if error:
+                    report.error(reader.line_num, error)
+                    continue
+                chunk.append((reader.line_num, parsed))
+                if len(chunk) >= chunk_size:
+                    _flush(cur, chunk, report)
+                    chunk = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Decoding reads ahead a block at a time, so the bad byte may be a few lines further on
+            report.stopped_at = reader.line_num + 1
+            report.error(report.stopped_at, f'file unreadable from here, import stopped: {e}')
+        _flush(cur, chunk, report)
+    finally:
+        cur.close()
+
+    return report
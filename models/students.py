@@ -0,0 +1,202 @@
+from database_connection import mysql
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SEARCH_LIMIT = 20
+
+MAX_STUDENT_ID = 2147483647  # Student_ID is a signed INT
+
+
+def _id_prefix_ranges(term):
+    # "20" -> [20, 20], [200, 209], [2000, 2099], ... so an ID prefix becomes PK range scans
+    if not term.isdigit() or len(term) > len(str(MAX_STUDENT_ID)) or (term.startswith('0') and term != '0'):
+        return []
+    ranges = []
+    base = int(term)
+    for extra in range(len(str(MAX_STUDENT_ID)) - len(term) + 1):
+        low = base * 10 ** extra
+        high = (base + 1) * 10 ** extra - 1
+        if low > MAX_STUDENT_ID:
+            break
+        ranges.append((low, min(high, MAX_STUDENT_ID)))
+    return ranges
+
+
+def _search_hits(term):
+    """Build a UNION of index-backed lookups returning (Student_ID, score) rows.
+
+    Each branch can use an index: the ngram FULLTEXT key on student for
+    name/department/email, the Room_no key for room number prefixes, and the
+    primary key for Student_ID prefixes.
+    """
+    branches, params = [], []
+
+    # Quoted as a phrase so boolean-mode operators in the term are taken literally
+    phrase = term.replace('"', ' ').strip()
+    if phrase:
+        branches.append("""
+            SELECT Student_ID,
+                   MATCH(FirstName, LastName, Department, Email) AGAINST (%s IN BOOLEAN MODE) as score
+            FROM student
+            WHERE MATCH(FirstName, LastName, Department, Email) AGAINST (%s IN BOOLEAN MODE)
+        """)
+        params += [f'"{phrase}"', f'"{phrase}"']
+
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    branches.append("""
+        SELECT s.Student_ID, 50 as score
+        FROM room r
+        JOIN student s ON s.Room_ID = r.Room_ID
+        WHERE r.Room_no LIKE %s
+    """)
+    params.append(escaped + '%')
+
+    ranges = _id_prefix_ranges(term)
+    if ranges:
+        branches.append("""
+            SELECT Student_ID, IF(Student_ID = %s, 1000, 100) as score
+            FROM student
+            WHERE """ + " OR ".join(["Student_ID BETWEEN %s AND %s"] * len(ranges)))
+        params.append(int(term))
+        for low, high in ranges:
+            params += [low, high]
+
+    sql = """
+        SELECT Student_ID, MAX(score) as score
+        FROM (""" + " UNION ALL ".join(branches) + """) hits
+        GROUP BY Student_ID
+    """
+    return sql, params
+
+
+def search_students(term, limit=SEARCH_LIMIT):
+    # Ranked typeahead search over name, department, email, room number and ID prefix
+    term = (term or '').strip()
+    if not term:
+        return []
+
+    hits_sql, params = _search_hits(term)
+    cur = mysql.connection.cursor()
+    cur.execute(f"""
+        SELECT s.*, r.Room_no, m.Name as MessName, hit.score as SearchScore
+        FROM ({hits_sql}) hit
+        JOIN student s ON s.Student_ID = hit.Student_ID
+        LEFT JOIN room r ON s.Room_ID = r.Room_ID
+        LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
+        ORDER BY hit.score DESC, s.Student_ID
+        LIMIT %s
+    """, tuple(params) + (limit,))
+    results = cur.fetchall()
+    cur.close()
+    return results
+
+
+def parse_page_args(args):
+    # Read ?after=/?before=/?per_page=/?order=/?search= from a request's query string
+    def _int(name):
+        value = args.get(name, type=int)
+        return value if value is not None and value >= 0 else None
+
+    per_page = args.get('per_page', DEFAULT_PAGE_SIZE, type=int)
+    return {
+        'after': _int('after'),
+        'before': _int('before'),
+        'per_page': max(1, min(per_page, MAX_PAGE_SIZE)),
+        'order': 'asc' if args.get('order') == 'asc' else 'desc',
+        'search': args.get('search', '').strip(),
+    }
+
+
+def keyset_bounds(column, after=None, before=None, order='desc'):
+    # WHERE conditions and params for the page after/before a cursor on `column`, and
+    # whether to scan it descending (walking backwards scans the other way round)
+    descending = order != 'asc'
+    if after is not None:
+        return [f"{column} < %s" if descending else f"{column} > %s"], [after], descending
+    if before is not None:
+        return [f"{column} > %s" if descending else f"{column} < %s"], [before], not descending
+    return [], [], descending
+
+
+def build_keyset_page(rows, key, after=None, before=None, per_page=DEFAULT_PAGE_SIZE):
+    """Turn the ``per_page + 1`` rows of a keyset query into a page.
+
+    Returns ``(rows, next_cursor, prev_cursor)`` with the rows in display
+    order; the cursors are the ``key`` values at the edges of the page, or
+    None where there is nothing further that way.
+    """
+    backwards = before is not None and after is None
+    rows = list(rows)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = rows[-1][key]
+        if after is not None or (backwards and has_more):
+            prev_cursor = rows[0][key]
+    return rows, next_cursor, prev_cursor
+
+
+def fetch_student_page(after=None, before=None, per_page=DEFAULT_PAGE_SIZE, order='desc',
+                       search='', with_fees=False):
+    """Keyset-paginate the student list on Student_ID.
+
+    ``after`` continues past the last row of the current page, ``before`` walks
+    back from the first one. Only ``per_page + 1`` rows are ever read, so the
+    cost of a page does not grow with the size of the table.
+    """
+    query, params = student_page_query(after, before, per_page, order, search, with_fees)
+    cur = mysql.connection.cursor()
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    cur.close()
+    return build_student_page(rows, after, before, per_page, order, search)
+
+
+def student_page_query(after=None, before=None, per_page=DEFAULT_PAGE_SIZE, order='desc',
+                       search='', with_fees=False):
+    # The SQL half of fetch_student_page, for handlers that batch it with other queries
+    joins, params = '', []
+    if search:
+        # Restrict to the indexed search hits rather than a leading-wildcard LIKE
+        hits_sql, params = _search_hits(search)
+        joins = f" JOIN ({hits_sql}) hit ON hit.Student_ID = s.Student_ID"
+
+    where, bound_params, scan_desc = keyset_bounds('s.Student_ID', after, before, order)
+    params = list(params) + bound_params
+
+    if with_fees:
+        # Running balance maintained by the fees triggers, one PK lookup per row
+        columns = ", COALESCE(fb.PendingAmount + fb.OverdueAmount, 0) as PendingFees"
+        joins = " LEFT JOIN feebalance fb ON fb.Student_ID = s.Student_ID" + joins
+    else:
+        columns = ""
+
+    query = """
+        SELECT s.*, r.Room_no, m.Name as MessName""" + columns + """
+        FROM student s
+        LEFT JOIN room r ON s.Room_ID = r.Room_ID
+        LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
+    """ + joins
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY s.Student_ID " + ("DESC" if scan_desc else "ASC") + " LIMIT %s"
+    params.append(per_page + 1)
+    return query, tuple(params)
+
+
+def build_student_page(rows, after=None, before=None, per_page=DEFAULT_PAGE_SIZE, order='desc', search=''):
+    # The rows of student_page_query -> the page dict (rows in display order plus cursors)
+    students, next_cursor, prev_cursor = build_keyset_page(rows, 'Student_ID', after, before, per_page)
+    return {
+        'students': students,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'per_page': per_page,
+        'order': order,
+        'search': search,
+    }
@@ -0,0 +1,231 @@
+from datetime import datetime
+
+import MySQLdb
+
+from database_connection import mysql
+
+MAX_BATCH_SIZE = 1000
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+INSIDE_LIMIT = 1000
+
+_CHECK_IN = """
+    INSERT IGNORE INTO visitlog (Student_ID, Visitor_Name, Ph_no, Relation_to_student, Gate, Client_Ref, CheckIn)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+# A visit's check-out is filled in once; everything else about the row is immutable.
+# Visitors may leave by any gate, so the ref is matched across gates (ClientRef_Open
+# index); the phone, when the kiosk sends it, tells apart refs reused by two gates,
+# and otherwise a visit from this gate, then the latest one, wins.
+_CHECK_OUT = """
+    UPDATE visitlog SET CheckOut = %s
+    WHERE Client_Ref = %s AND CheckOut IS NULL AND CheckIn <= %s{phone}
+    ORDER BY Gate = %s DESC, CheckIn DESC
+    LIMIT 1
+"""
+
+
+class GateBatchReport:
+    def __init__(self):
+        self.total = 0
+        self.checked_in = 0
+        self.checked_out = 0
+        self.duplicates = 0
+        self.unmatched = 0
+        self.errors = []  # (entry index, message)
+
+    def as_dict(self):
+        return {'total': self.total, 'checked_in': self.checked_in, 'checked_out': self.checked_out,
+                'duplicates': self.duplicates, 'unmatched': self.unmatched,
+                'errors': [{'index': index, 'error': message} for index, message in self.errors]}
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _validate(entry, student_ids):
+    if not isinstance(entry, dict):
+        return None, 'entry must be an object'
+    ref = str(entry.get('ref') or '').strip()
+    if not ref or len(ref) > 64:
+        return None, 'ref is required (max 64 characters)'
+    at = _parse_time(entry.get('at'))
+    if at is None:
+        return None, f"invalid timestamp {entry.get('at')!r}"
+
+    kind = entry.get('type', 'in')
+    phone = str(entry.get('phone') or '').strip()
+    if kind == 'out':
+        return ('out', (at, ref, phone[:15] or None)), None
+    if kind != 'in':
+        return None, f'unknown type {kind!r}'
+
+    name = str(entry.get('visitor_name') or '').strip()
+    if not name or len(name) > 50:
+        return None, 'visitor_name is required (max 50 characters)'
+    if not phone or len(phone) > 15:
+        return None, 'phone is required (max 15 characters)'
+    try:
+        student_id = int(entry.get('student_id'))
+    except (TypeError, ValueError):
+        return None, f"invalid student_id {entry.get('student_id')!r}"
+    if student_id not in student_ids:
+        return None, f'student {student_id} does not exist'
+
+    relation = str(entry.get('relation') or '').strip()[:50] or None
+    return ('in', (student_id, name, phone, relation, ref, at)), None
+
+
+def ingest_gate_batch(gate, entries):
+    """Record a kiosk's buffered gate events in one transaction.
+
+    Each entry is ``{"ref", "type": "in"|"out", "at", ...}``; ``ref`` is the
+    kiosk's id for the visit (the one on the visitor's pass), so a retried
+    batch is a no-op (check-ins are INSERT IGNOREd on (Gate, Client_Ref) and
+    check-outs only fill an empty CheckOut). A check-out closes the open
+    visit with that ref whichever gate it came in by; an optional ``phone``
+    narrows it to that visitor. Check-ins are applied before check-outs, so a
+    visit that both started and ended while the kiosk was offline lands in
+    the same batch.
+    """
+    report = GateBatchReport()
+    report.total = len(entries)
+
+    cur = mysql.connection.cursor()
+
+    requested = set()
+    for entry in entries:
+        if isinstance(entry, dict):
+            try:
+                requested.add(int(entry.get('student_id')))
+            except (TypeError, ValueError):
+                pass
+    student_ids = set()
+    if requested:
+        cur.execute(f"SELECT Student_ID FROM student WHERE Student_ID IN ({', '.join(['%s'] * len(requested))})",
+                    tuple(requested))
+        student_ids = {row['Student_ID'] for row in cur.fetchall()}
+
+    check_ins, check_outs = [], []
+    for index, entry in enumerate(entries):
+        parsed, error = _validate(entry, student_ids)
+        if error:
+            report.errors.append((index, error))
+            continue
+        kind, values = parsed
+        if kind == 'in':
+            student_id, name, phone, relation, ref, at = values
+            check_ins.append((student_id, name, phone, relation, gate, ref, at))
+        else:
+            at, ref, phone = values
+            check_outs.append((at, ref, phone))
+
+    try:
+        if check_ins:
+            # executemany turns this into one multi-row INSERT
+            cur.executemany(_CHECK_IN, check_ins)
+            report.checked_in = cur.rowcount
+            report.duplicates = len(check_ins) - cur.rowcount
+        for at, ref, phone in check_outs:
+            if phone:
+                cur.execute(_CHECK_OUT.format(phone=' AND Ph_no = %s'), (at, ref, at, phone, gate))
+            else:
+                cur.execute(_CHECK_OUT.format(phone=''), (at, ref, at, gate))
+            if cur.rowcount:
+                report.checked_out += 1
+            else:
+                report.unmatched += 1
+        mysql.connection.commit()
+    except MySQLdb.Error:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return report
+
+
+def visitors_inside(limit=INSIDE_LIMIT):
+    # Open visits that came through a gate: portal pre-registrations (no Gate) have
+    # no CheckOut either but nobody is inside until a kiosk checks them in.
+    # Served by the (CheckOut, CheckIn, Gate) index, Gate checked without a row lookup
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT v.Visit_ID, v.Student_ID, s.FirstName, s.LastName, r.Room_no,
+               v.Visitor_Name, v.Ph_no, v.Relation_to_student, v.Gate, v.CheckIn
+        FROM visitlog v
+        JOIN student s ON s.Student_ID = v.Student_ID
+        LEFT JOIN room r ON r.Room_ID = s.Room_ID
+        WHERE v.CheckOut IS NULL AND v.Gate IS NOT NULL
+        ORDER BY v.CheckIn
+        LIMIT %s
+    """, (limit,))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def encode_cursor(visit):
+    return f"{visit['CheckIn'].isoformat()}_{visit['Visit_ID']}"
+
+
+def decode_cursor(value):
+    try:
+        at, visit_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(at), int(visit_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def student_visit_history(student_id, before=None, date_from=None, date_to=None, per_page=HISTORY_PAGE_SIZE):
+    """Newest-first keyset page of one student's visits.
+
+    ``before`` is the ``next_cursor`` of the previous page; ``date_from`` /
+    ``date_to`` bound CheckIn and all of it is a range scan on
+    (Student_ID, CheckIn).
+    """
+    clauses, params = ['Student_ID = %s'], [student_id]
+    if date_from:
+        clauses.append('CheckIn >= %s')
+        params.append(date_from)
+    if date_to:
+        clauses.append('CheckIn < %s + INTERVAL 1 DAY')
+        params.append(date_to)
+    position = decode_cursor(before) if before else None
+    if position:
+        clauses.append('(CheckIn < %s OR (CheckIn = %s AND Visit_ID < %s))')
+        params.extend([position[0], position[0], position[1]])
+
+    cur = mysql.connection.cursor()
+    cur.execute(f"""
+        SELECT Visit_ID, Visitor_Name, Ph_no, Relation_to_student, Gate, CheckIn, CheckOut
+        FROM visitlog
+        WHERE {' AND '.join(clauses)}
+        ORDER BY CheckIn DESC, Visit_ID DESC
+        LIMIT %s
+    """, tuple(params) + (per_page + 1,))
+    visits = list(cur.fetchall())
+    cur.close()
+
+    next_cursor = None
+    if len(visits) > per_page:
+        visits = visits[:per_page]
+        next_cursor = encode_cursor(visits[-1])
+    return {'visits': visits, 'next_cursor': next_cursor, 'per_page': per_page}
+
+
+def log_visit(student_id, name, phone, relation, check_in, check_out=None):
+    # Visits registered from the student portal (no kiosk, so no Gate/Client_Ref); without
+    # a check-out they are only expected, never counted as inside
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        INSERT INTO visitlog (Student_ID, Visitor_Name, Ph_no, Relation_to_student, CheckIn, CheckOut)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, (student_id, name, phone, relation, check_in, check_out))
+    cur.close()
@@ -0,0 +1,56 @@
+import os
+
+from flask import Response, current_app, get_flashed_messages, stream_with_context
+from jinja2 import FileSystemBytecodeCache
+
+STREAM_CHUNK_SIZE = 16 * 1024   # characters of HTML per chunk sent to the client
+
+
+def init_templates(app):
+    """Give the Jinja environment an on-disk bytecode cache.
+
+    Compiled templates are keyed by name and source checksum, so every worker
+    (and the next restart) loads them instead of compiling again, and an
+    edited template simply gets a new entry. Must run before ``app.jinja_env``
+    is first used.
+    """
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+
+def _coalesce(chunks, size):
+    # Jinja yields many tiny fragments; batch them so each write (and each
+    # compressor flush) carries a useful amount of HTML
+    buffered, length = [], 0
+    try:
+        for chunk in chunks:
+            buffered.append(chunk)
+            length += len(chunk)
+            if length >= size:
+                yield ''.join(buffered)
+                buffered, length = [], 0
+        if buffered:
+            yield ''.join(buffered)
+    finally:
+        chunks.close()
+
+
+def stream_page(template_name, **context):
+    """Like render_template, but sends the page while it renders.
+
+    The admin lists pass one keyset page of rows, so the first bytes go out
+    before the template reaches the end of a long table. The request context,
+    and with it the pooled connection, stays open until the last chunk is sent.
+    """
+    app = current_app._get_current_object()
+    # The session cookie goes out with the headers, before the template runs:
+    # take the flashed messages now so they are not shown again on the next page
+    get_flashed_messages()
+    template = app.jinja_env.get_or_select_template(template_name)
+    app.update_template_context(context)
+    chunks = _coalesce(template.generate(**context), app.config.get('STREAM_CHUNK_SIZE', STREAM_CHUNK_SIZE))
+    # X-Accel-Buffering: a buffering proxy in front would otherwise hold the page back until it is complete
+    return Response(stream_with_context(chunks), mimetype='text/html', headers={'X-Accel-Buffering': 'no'})
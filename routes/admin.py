@@ -1,7 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Response, stream_with_context, abort
 from flask import current_app
 from database_connection import mysql
+from instrumentation import endpoint_metrics, render_prometheus
+from models.database import User, user_cache
+from models.portal_cache import portal_cache, student_changed, room_changed
+from models.stats import (get_dashboard_stats, invalidate_dashboard_stats, cached_dashboard_stats,
+                          remember_dashboard_stats, DASHBOARD_STATS_QUERY)
+from models.students import (fetch_student_page, student_page_query, build_student_page,
+                             parse_page_args, search_students, SEARCH_LIMIT, MAX_PAGE_SIZE)
+from models.student_import import import_students, IMPORT_CHUNK_SIZE
+from models.allocation import allocate_batch
+from models.exports import EXPORTS, stream_rows, as_csv, as_jsonl
+from models.fees import fetch_fee_page
+from rendering import stream_page
+from models.changes import conditional_json, version_key, tables_changed, after_commit
+from models.live import broadcaster, publish_changes, subscribe as subscribe_live
+from routes.fees import billing_run
+from models.archive import (archive_students, find_archivable, search_archive, recent_archive,
+                            archived_student, ARCHIVE_CHUNK_SIZE, ARCHIVE_AFTER_DAYS)
 from datetime import date
+import io
+import click
 import MySQLdb
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -16,66 +36,59 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@bp.route('/dashboard')
-@admin_required
-def dashboard():
+# ALL rooms for the allocation dropdown
+_ROOM_OPTIONS = """
+    SELECT Room_ID, Room_no, Capacity, Status, Occupancy as CurrentOccupancy
+    FROM room
+    ORDER BY Room_no
+"""
+_MESS_OPTIONS = "SELECT Mess_ID, Name, Type, Fees FROM mess ORDER BY Name"
+
+def _allocation_options():
     cur = mysql.connection.cursor()
     
-    # Get statistics
-    cur.execute("SELECT COUNT(*) as total FROM student")
-    total_students = cur.fetchone()['total']
-    
-    cur.execute("SELECT COUNT(*) as total FROM room WHERE Status = 'Occupied'")
-    occupied_rooms = cur.fetchone()['total']
-    
-    cur.execute("SELECT COUNT(*) as total FROM room")
-    total_rooms = cur.fetchone()['total']
-    
-    cur.execute("SELECT SUM(FeesAmount) as total FROM fees WHERE Status IN ('Pending', 'Overdue')")
-    pending_fees = cur.fetchone()['total'] or 0
-    
-    # Get ALL students with their details including pending fees
-    cur.execute("""
-        SELECT s.Student_ID, s.FirstName, s.LastName, s.Department, s.Sex, s.Email,
-               s.Room_ID, r.Room_no, s.Mess_ID, m.Name as MessName,
-               COALESCE(
-                   (SELECT SUM(f.FeesAmount) 
-                    FROM fees f 
-                    WHERE f.Student_ID = s.Student_ID 
-                    AND f.Status IN ('Pending', 'Overdue')), 
-                   0
-               ) as PendingFees
-        FROM student s
-        LEFT JOIN room r ON s.Room_ID = r.Room_ID
-        LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
-        ORDER BY s.Student_ID DESC
-    """)
-    all_students = cur.fetchall()
-    
-    # Get ALL rooms for allocation dropdown
-    cur.execute("""
-        SELECT Room_ID, Room_no, Capacity, Status,
-               (SELECT COUNT(*) FROM roomallocation ra 
-                WHERE ra.Room_ID = r.Room_ID AND ra.VacateDate IS NULL) as CurrentOccupancy
-        FROM room r
-        ORDER BY Room_no
-    """)
+    cur.execute(_ROOM_OPTIONS)
     available_rooms = cur.fetchall()
     
     # Get available mess options
-    cur.execute("SELECT Mess_ID, Name, Type, Fees FROM mess ORDER BY Name")
+    cur.execute(_MESS_OPTIONS)
     available_mess = cur.fetchall()
     
     cur.close()
-    
-    return render_template('admin/dashboard.html',
-                           total_students=total_students,
-                           occupied_rooms=occupied_rooms,
-                           total_rooms=total_rooms,
-                           pending_fees=pending_fees,
-                           all_students=all_students,
-                           available_rooms=available_rooms,
-                           available_mess=available_mess)
+    return available_rooms, available_mess
+
+@bp.route('/dashboard')
+@admin_required
+def dashboard():
+    # One keyset page of students (with their pending fees) instead of the whole table
+    page_args = parse_page_args(request.args)
+    page_sql, page_params = student_page_query(with_fees=True, **page_args)
+    queries = [(page_sql, page_params), (_ROOM_OPTIONS,), (_MESS_OPTIONS,)]
+    
+    # Headline numbers come from a short-lived cache (see models/stats.py); on a miss
+    # they are loaded alongside the rest
+    stats = cached_dashboard_stats()
+    if stats is None:
+        queries.append((DASHBOARD_STATS_QUERY, (), 'one'))
+    
+    # None of these depend on each other, so they run at the same time on pooled connections
+    results = mysql.fetch_concurrently(*queries)
+    page_rows, available_rooms, available_mess = results[:3]
+    if stats is None:
+        stats = results[3]
+        remember_dashboard_stats(stats)
+    page = build_student_page(page_rows, **page_args)
+    
+    # Streamed: the header and stat cards go out while the student rows and their modals render
+    return stream_page('admin/dashboard.html',
+                       total_students=stats['total_students'],
+                       occupied_rooms=stats['occupied_rooms'],
+                       total_rooms=stats['total_rooms'],
+                       pending_fees=stats['pending_fees'],
+                       all_students=page['students'],
+                       page=page,
+                       available_rooms=available_rooms,
+                       available_mess=available_mess)
 
 @bp.route('/add_student', methods=['POST'])
 @admin_required
@@ -106,36 +119,153 @@ def add_student():
             """, (phone, student_id))
         
         mysql.connection.commit()
-        flash(f'✅ Student {first_name} {last_name} added successfully! You can now allocate a room.', 'success')
     except Exception as e:
         mysql.connection.rollback()
         flash(f'❌ Error adding student: {str(e)}', 'danger')
+        return redirect(url_for('admin.dashboard'))
     finally:
         cur.close()
     
+    with after_commit('adding a student'):
+        tables_changed('student', 'mess')
+        invalidate_dashboard_stats()
+        publish_changes()
+    flash(f'✅ Student {first_name} {last_name} added successfully! You can now allocate a room.', 'success')
     return redirect(url_for('admin.dashboard'))
 
+@bp.route('/import_students', methods=['POST'])
+@admin_required
+def import_students_csv():
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('❌ Please choose a CSV file to import.', 'danger')
+        return redirect(url_for('admin.students'))
+    
+    # Werkzeug spools large uploads to disk; read it line by line from there
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    report = import_students(lines, default_mess_id=request.form.get('mess_id') or None)
+    with after_commit('a student import'):
+        invalidate_dashboard_stats()
+        publish_changes()
+    
+    if request.args.get('format') == 'json':
+        return jsonify(report.as_dict())
+    
+    flash(f'✅ Imported {report.inserted} of {report.total} students.', 'success')
+    if report.stopped_at:
+        flash(f'❌ Import stopped at line {report.stopped_at}: the file could not be read from there on '
+              f'(encoding or quoting). Rows before it were imported.', 'danger')
+    if report.failed:
+        shown = '; '.join(f'line {line}: {message}' for line, message in report.errors[:5])
+        flash(f'⚠️ {report.failed} row(s) skipped — {shown}', 'warning')
+    return redirect(url_for('admin.students'))
+
+@bp.cli.command('import-students')
+@click.argument('csv_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True, help='Rows per INSERT batch and commit.')
+@click.option('--default-mess', type=int, help='Mess_ID for rows that do not specify one.')
+def import_students_command(csv_file, chunk_size, default_mess):
+    """Bulk-import students (and phone numbers) from a CSV file."""
+    with open(csv_file, newline='', encoding='utf-8-sig') as lines:
+        report = import_students(lines, chunk_size=chunk_size, default_mess_id=default_mess)
+    
+    for line, message in report.errors:
+        click.echo(f'line {line}: {message}', err=True)
+    click.echo(f'Imported {report.inserted} of {report.total} rows ({report.failed} failed).')
+    if report.stopped_at:
+        click.echo(f'Stopped at line {report.stopped_at}: the rest of the file could not be read '
+                   f'(encoding or quoting).', err=True)
+        raise SystemExit(1)
+
+def _after_archive(student_ids):
+    if not student_ids:
+        return
+    with after_commit('archiving students'):
+        invalidate_dashboard_stats()
+        for student_id in student_ids:
+            User.invalidate('student', student_id)
+        student_changed(*student_ids)
+        publish_changes()
+
+@bp.cli.command('archive-students')
+@click.argument('student_ids', nargs=-1, type=int)
+@click.option('--vacated-before', type=click.DateTime(formats=['%Y-%m-%d']),
+              help=f'Archive former residents whose last allocation ended before this date (default: {ARCHIVE_AFTER_DAYS} days ago).')
+@click.option('--chunk-size', default=ARCHIVE_CHUNK_SIZE, show_default=True, help='Students per transaction.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between chunks.')
+@click.option('--dry-run', is_flag=True, help='Only list who would be archived.')
+def archive_students_command(student_ids, vacated_before, chunk_size, pause, dry_run):
+    """Move graduated/inactive students and their history into the archive tables."""
+    vacated_before = vacated_before.date() if vacated_before else None
+    if dry_run:
+        ids = find_archivable(vacated_before, list(student_ids) or None, limit=100000)
+        click.echo(f"{len(ids)} student(s) would be archived: {' '.join(map(str, ids[:50]))}{' ...' if len(ids) > 50 else ''}")
+        return
+    
+    def progress(ids, seconds):
+        click.echo(f'  archived {len(ids)} (up to {ids[-1]}) in {seconds * 1000:.0f} ms')
+    
+    archived = archive_students(vacated_before, list(student_ids) or None, chunk_size=chunk_size,
+                                pause=pause, on_chunk=progress)
+    _after_archive(archived)
+    click.echo(f'Archived {len(archived)} student(s).')
+
+@bp.route('/archive')
+@admin_required
+def archive():
+    # Read-only view over the archive tables
+    term = request.args.get('q', '').strip()
+    results = search_archive(term) if term else recent_archive()
+    selected = archived_student(request.args.get('id', type=int)) if request.args.get('id') else None
+    return render_template('admin/archive.html', results=results, term=term, selected=selected,
+                           archive_after_days=ARCHIVE_AFTER_DAYS)
+
+@bp.route('/archive_students', methods=['POST'])
+@admin_required
+def archive_students_action():
+    try:
+        archived = archive_students()
+    except MySQLdb.Error as e:
+        flash(f'❌ Archival stopped: {e}', 'danger')
+        return redirect(url_for('admin.archive'))
+    _after_archive(archived)
+    flash(f'✅ Archived {len(archived)} inactive student(s).', 'success')
+    return redirect(url_for('admin.archive'))
+
 @bp.route('/delete_student/<int:student_id>', methods=['POST'])
 @admin_required
 def delete_student(student_id):
     cur = mysql.connection.cursor()
     
     try:
+        cur.execute("SELECT Room_ID FROM student WHERE Student_ID = %s", (student_id,))
+        row = cur.fetchone()
+        old_room_id = row['Room_ID'] if row else None
+        
         # Delete in correct order to respect foreign key constraints
         cur.execute("DELETE FROM visitedby WHERE Student_ID = %s", (student_id,))
+        cur.execute("DELETE FROM visitlog WHERE Student_ID = %s", (student_id,))
         cur.execute("DELETE FROM studentphone WHERE Student_ID = %s", (student_id,))
         cur.execute("DELETE FROM roomallocation WHERE Student_ID = %s", (student_id,))
         cur.execute("DELETE FROM fees WHERE Student_ID = %s", (student_id,))
         cur.execute("DELETE FROM student WHERE Student_ID = %s", (student_id,))
         
         mysql.connection.commit()
-        flash(f'✅ Student ID {student_id} deleted successfully!', 'success')
     except Exception as e:
         mysql.connection.rollback()
         flash(f'❌ Error deleting student: {str(e)}', 'danger')
+        return redirect(url_for('admin.dashboard'))
     finally:
         cur.close()
     
+    with after_commit(f'deleting student {student_id}'):
+        tables_changed('student', 'fees', 'room', 'mess')
+        invalidate_dashboard_stats()
+        User.invalidate('student', student_id)
+        student_changed(student_id)
+        publish_changes(old_room_id)
+        room_changed(old_room_id)
+    flash(f'✅ Student ID {student_id} deleted successfully!', 'success')
     return redirect(url_for('admin.dashboard'))
 
 @bp.route('/allocate_room/<int:student_id>', methods=['POST'])
@@ -147,10 +277,14 @@ def allocate_room(student_id):
     allocation_date = request.form.get('allocation_date') or date.today()
     
     try:
+        # Remember the old room so its residents' cached pages get refreshed
+        cur.execute("SELECT Room_ID FROM student WHERE Student_ID = %s", (student_id,))
+        row = cur.fetchone()
+        old_room_id = row['Room_ID'] if row else None
+        
         # Call the stored procedure that handles room allocation
         cur.callproc('HandleRoomAllocation', (student_id, room_id, allocation_date))
         mysql.connection.commit()
-        flash(f'✅ SUCCESS: Room allocation completed for Student ID {student_id}!', 'success')
     except MySQLdb.Error as e:
         mysql.connection.rollback()
         error_code = e.args[0] if e.args else None
@@ -166,99 +300,215 @@ def allocate_room(student_id):
                 flash(f'🚫 DATABASE TRIGGER FIRED! {error_msg}', 'danger')
         else:
             flash(f'❌ Database Error: {error_msg} (Error Code: {error_code})', 'danger')
+        return redirect(url_for('admin.dashboard'))
     except Exception as e:
         mysql.connection.rollback()
         flash(f'❌ Unexpected Error: {str(e)}', 'danger')
+        return redirect(url_for('admin.dashboard'))
     finally:
         cur.close()
     
+    with after_commit(f'allocating a room to student {student_id}'):
+        tables_changed('student', 'room')
+        invalidate_dashboard_stats()
+        student_changed(student_id)
+        room_changed(old_room_id, room_id)
+        publish_changes(old_room_id, room_id)
+    flash(f'✅ SUCCESS: Room allocation completed for Student ID {student_id}!', 'success')
+    return redirect(url_for('admin.dashboard'))
+
+@bp.route('/allocate_batch', methods=['POST'])
+@admin_required
+def allocate_batch_rooms():
+    # Either an explicit list of IDs ("201, 202 ...") or every student without a room
+    raw_ids = request.form.get('student_ids', '').replace(',', ' ').split()
+    try:
+        student_ids = [int(sid) for sid in raw_ids] or None
+    except ValueError:
+        flash('❌ Student IDs must be numbers.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    
+    outcomes = allocate_batch(student_ids,
+                              staff_id=request.form.get('staff_id', type=int),
+                              allocation_date=request.form.get('allocation_date') or None)
+    placed = [outcome for outcome in outcomes if outcome['status'] == 'allocated']
+    with after_commit('a batch allocation'):
+        invalidate_dashboard_stats()
+        student_changed(*(outcome['student_id'] for outcome in placed))
+        room_changed(*{outcome['room_id'] for outcome in placed})
+        publish_changes(*{outcome['room_id'] for outcome in placed})
+    
+    allocated = len(placed)
+    if request.args.get('format') == 'json':
+        return jsonify({'allocated': allocated, 'outcomes': outcomes})
+    
+    flash(f'✅ Batch allocation placed {allocated} of {len(outcomes)} students.', 'success')
+    if allocated < len(outcomes):
+        flash(f'⚠️ {len(outcomes) - allocated} student(s) were skipped or could not be placed.', 'warning')
     return redirect(url_for('admin.dashboard'))
 
 @bp.route('/students')
 @admin_required
 def students():
-    cur = mysql.connection.cursor()
-    
-    search = request.args.get('search', '')
-    
-    if search:
-        cur.execute("""
-            SELECT s.*, r.Room_no, m.Name as MessName
-            FROM student s
-            LEFT JOIN room r ON s.Room_ID = r.Room_ID
-            LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
-            WHERE s.FirstName LIKE %s OR s.LastName LIKE %s OR s.Department LIKE %s
-        """, (f'%{search}%', f'%{search}%', f'%{search}%'))
-    else:
-        cur.execute("""
-            SELECT s.*, r.Room_no, m.Name as MessName
-            FROM student s
-            LEFT JOIN room r ON s.Room_ID = r.Room_ID
-            LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
-        """)
-    
-    students = cur.fetchall()
-    cur.close()
+    page = fetch_student_page(**parse_page_args(request.args))
     
-    return render_template('admin/students.html', students=students)
+    return stream_page('admin/students.html', students=page['students'], page=page)
 
-@bp.route('/rooms')
+@bp.route('/api/students')
 @admin_required
-def rooms():
+def students_api():
+    # Same keyset pages as the HTML views, for scripts and kiosk screens
+    page = fetch_student_page(with_fees=request.args.get('fees') == '1',
+                              **parse_page_args(request.args))
+    return jsonify(page)
+
+@bp.route('/api/students/search')
+@admin_required
+def search_students_api():
+    # Ranked typeahead results (name, department, email, room number, Student_ID prefix)
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT, type=int), MAX_PAGE_SIZE))
+    return jsonify({'results': search_students(request.args.get('q', ''), limit)})
+
+def _room_rows():
     cur = mysql.connection.cursor()
     
     cur.execute("""
-        SELECT r.*, w.Name as WardenName,
-                (SELECT COUNT(*) FROM roomallocation ra 
-                WHERE ra.Room_ID = r.Room_ID AND ra.VacateDate IS NULL) as CurrentOccupancy
+        SELECT r.*, w.Name as WardenName, r.Occupancy as CurrentOccupancy
         FROM room r
         JOIN warden w ON r.Staff_ID = w.Staff_ID
     """)
     rooms = cur.fetchall()
     
     cur.close()
-    
-    return render_template('admin/rooms.html', rooms=rooms)
+    return rooms
 
-@bp.route('/mess')
+@bp.route('/rooms')
 @admin_required
-def mess():
+def rooms():
+    return render_template('admin/rooms.html', rooms=_room_rows())
+
+def _mess_rows():
     cur = mysql.connection.cursor()
     
     cur.execute("""
-        SELECT m.*, w.Name as WardenName,
-                (SELECT COUNT(*) FROM student s WHERE s.Mess_ID = m.Mess_ID) as CurrentStudents
+        SELECT m.*, w.Name as WardenName, m.Headcount as CurrentStudents
         FROM mess m
         JOIN warden w ON m.Staff_ID = w.Staff_ID
     """)
     mess_list = cur.fetchall()
     
     cur.close()
-    
-    return render_template('admin/mess.html', mess_list=mess_list)
+    return mess_list
+
+@bp.route('/mess')
+@admin_required
+def mess():
+    return render_template('admin/mess.html', mess_list=_mess_rows())
+
+# JSON twins of the dashboard/rooms/mess pages for kiosks and office screens that poll.
+# Unchanged data costs one tablechanges lookup and a 304 (see models/changes.py).
+
+@bp.route('/api/dashboard')
+@admin_required
+@conditional_json('student', 'room', 'mess', 'fees')
+def dashboard_api(versions):
+    available_rooms, available_mess = _allocation_options()
+    return {'stats': get_dashboard_stats(version_key(versions)),
+            'students': fetch_student_page(with_fees=True, **parse_page_args(request.args)),
+            'rooms': available_rooms,
+            'mess': available_mess}
+
+@bp.route('/api/rooms')
+@admin_required
+@conditional_json('room', 'warden')
+def rooms_api(versions):
+    return {'rooms': _room_rows()}
+
+@bp.route('/api/mess')
+@admin_required
+@conditional_json('mess', 'warden')
+def mess_api(versions):
+    return {'mess': _mess_rows()}
 
 @bp.route('/fees')
 @admin_required
 def fees():
-    cur = mysql.connection.cursor()
-    
     status_filter = request.args.get('status', 'all')
     
-    query = """
-        SELECT f.*, s.FirstName, s.LastName, s.Student_ID
-        FROM fees f
-        JOIN student s ON f.Student_ID = s.Student_ID
-    """
-    params = []
-    if status_filter != 'all':
-        query += " WHERE f.Status = %s"
-        params.append(status_filter)
-    
-    query += " ORDER BY f.PaymentDate DESC"
+    # One keyset page at a time, like the student list; "Export CSV" has the full list
+    page_args = parse_page_args(request.args)
+    page_args.pop('search')
+    page = fetch_fee_page(status=None if status_filter == 'all' else status_filter, **page_args)
     
-    cur.execute(query, tuple(params))
+    return stream_page('admin/fees.html', fees=page['fees'], page=page, status_filter=status_filter)
+
+@bp.route('/billing_run', methods=['POST'])
+@admin_required
+def billing_run_action():
+    try:
+        report = billing_run(request.form.get('period') or None)
+    except ValueError:
+        flash('❌ Billing period must be YYYY-MM.', 'danger')
+        return redirect(url_for('admin.fees'))
+    except MySQLdb.Error as e:
+        flash(f'❌ Billing run failed: {e}', 'danger')
+        return redirect(url_for('admin.fees'))
     
-    fees = cur.fetchall()
-    cur.close()
+    if request.args.get('format') == 'json':
+        return jsonify(report)
     
-    return render_template('admin/fees.html', fees=fees, status_filter=status_filter)
\ No newline at end of file
+    flash(f"✅ Billed {report['period'][:7]}: {report['mess_charges']} mess and {report['hostel_charges']} hostel "
+          f"charge(s), {report['overdue_flipped']} fee(s) marked overdue in {report['total_ms']:.0f} ms.", 'success')
+    return redirect(url_for('admin.fees'))
+
+@bp.route('/pool_stats')
+@admin_required
+def pool_stats():
+    # Connection pool usage for this worker process (use it to size MYSQL_POOL_MAX_SIZE)
+    return jsonify({**mysql.pool_stats(), 'replicas': mysql.replica_stats()})
+
+@bp.route('/metrics')
+@admin_required
+def metrics():
+    # Per-endpoint latency / DB time percentiles for this worker; ?format=prometheus for text output
+    snapshot = endpoint_metrics.snapshot()
+    if request.args.get('format') == 'prometheus':
+        return Response(render_prometheus(snapshot, mysql.pool_stats()),
+                        mimetype='text/plain; version=0.0.4')
+    return jsonify({'endpoints': snapshot, 'pool': mysql.pool_stats(), 'live': broadcaster.stats()})
+
+@bp.route('/live')
+@admin_required
+def live():
+    # Server-Sent Events: room occupancy, mess headcount and fee total deltas for open dashboards
+    stream = subscribe_live(current_app._get_current_object(),
+                            request.headers.get('Last-Event-ID'))
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/cache_stats')
+@admin_required
+def cache_stats():
+    # In-process cache hit rates for this worker
+    return jsonify({'student_portal': portal_cache.stats(), 'users': user_cache.stats()})
+
+@bp.route('/export/<kind>')
+@admin_required
+def export(kind):
+    # Full exports for finance: ?format=csv|jsonl&status=&from=YYYY-MM-DD&to=YYYY-MM-DD[&department=]
+    if kind not in EXPORTS:
+        abort(404)
+    
+    fmt = 'jsonl' if request.args.get('format') == 'jsonl' else 'csv'
+    rows = stream_rows(kind,
+                       status=request.args.get('status') or None,
+                       date_from=request.args.get('from') or None,
+                       date_to=request.args.get('to') or None,
+                       department=request.args.get('department') or None)
+    body = as_jsonl(rows) if fmt == 'jsonl' else as_csv(kind, rows)
+    
+    filename = f"{kind}_{date.today().isoformat()}.{fmt}"
+    mimetype = 'application/x-ndjson' if fmt == 'jsonl' else 'text/csv'
+    # stream_with_context keeps the pooled connection checked out until the last row is sent
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
\ No newline at end of file
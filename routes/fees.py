@@ -1,6 +1,44 @@
-from flask import Blueprint
+import click
+from flask import Blueprint, current_app
 from database_connection import mysql # ADDED: Import the globally shared MySQL object
+from models.fees import rebuild_fee_balances
+from models.billing import run_billing
+from models.live import publish_changes
+from models.changes import after_commit
+from models.portal_cache import everything_changed
+from models.stats import invalidate_dashboard_stats
 
 bp = Blueprint('fees', __name__, url_prefix='/fees')
 
-# Additional fee management routes can be added here
\ No newline at end of file
+# Additional fee management routes can be added here
+
+@bp.cli.command('rebuild-balances')
+def rebuild_balances():
+    """Recompute feebalance and feetotals from the fees table."""
+    rebuild_fee_balances()
+    click.echo('Fee balances rebuilt.')
+
+
+def billing_run(period=None, as_of=None, flip_overdue=True):
+    # Shared by the CLI and the admin action
+    config = current_app.config
+    report = run_billing(period, hostel_fee=config['HOSTEL_MONTHLY_FEE'], due_days=config['FEE_DUE_DAYS'],
+                         as_of=as_of, flip_overdue=flip_overdue)
+    with after_commit('a billing run'):
+        invalidate_dashboard_stats()
+        everything_changed()
+        publish_changes()
+    return report
+
+@bp.cli.command('bill')
+@click.option('--period', help='Month to bill as YYYY-MM (default: this month).')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']), help='Pending fees due before this date become Overdue (default today).')
+@click.option('--skip-overdue', is_flag=True, help='Only create the charges.')
+def bill(period, as_of, skip_overdue):
+    """Create the month's Pending mess/hostel fees and flip past-due fees to Overdue."""
+    report = billing_run(period, as_of=as_of.date() if as_of else None, flip_overdue=not skip_overdue)
+    click.echo(f"Period {report['period']} (due {report['due_date']}): "
+               f"{report['mess_charges']} mess + {report['hostel_charges']} hostel charges, "
+               f"{report['overdue_flipped']} fee(s) now overdue.")
+    click.echo('Timings: ' + ', '.join(f'{name} {ms}ms' for name, ms in report['timings_ms'].items())
+               + f" (total {report['total_ms']}ms)")
@@ -0,0 +1,32 @@
+import os
+
+import MySQLdb
+from flask import Blueprint, jsonify, current_app
+from database_connection import mysql
+from warmup import is_warm, warm_worker
+
+bp = Blueprint('health', __name__)
+
+
+@bp.route('/healthz')
+def healthz():
+    # Liveness: the worker answers, nothing else is checked
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+
+@bp.route('/readyz')
+def readyz():
+    # Readiness for the load balancer: warmed up and able to reach the primary
+    if not is_warm() and not warm_worker(current_app._get_current_object()):
+        return jsonify({'status': 'warming', 'pid': os.getpid()}), 503
+    mysql.use_primary()
+    try:
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+    except MySQLdb.Error as e:
+        mysql.discard_connection()
+        current_app.logger.warning('readiness check failed: %s', e)
+        return jsonify({'status': 'unavailable', 'pid': os.getpid()}), 503
+    return jsonify({'status': 'ready', 'pid': os.getpid()})
@@ -1,6 +1,95 @@
-from flask import Blueprint
+import hmac
+from datetime import date, timedelta
+
+import click
+from flask import Blueprint, request, session, jsonify, abort, current_app
 from database_connection import mysql # ADDED: Import the globally shared MySQL object
+from models.billing import billing_period
+from models.mess import (find_headcount_drift, repair_headcount, headcounts, roll_up,
+                         daily_rollups, monthly_rollups, ROLLUP_DAYS_LIMIT)
 
 bp = Blueprint('mess', __name__, url_prefix='/mess')
 
-# Additional mess management routes can be added here
\ No newline at end of file
+
+def _kitchen_mess():
+    # X-Kitchen-Token identifies a mess kitchen; each mess has its own token
+    token = request.headers.get('X-Kitchen-Token', '')
+    if not token:
+        return None
+    for pair in current_app.config.get('MESS_KITCHEN_TOKENS', '').split(','):
+        mess_id, _, secret = pair.strip().partition(':')
+        if mess_id.isdigit() and secret and hmac.compare_digest(secret, token):
+            return int(mess_id)
+    return None
+
+
+def _mess_scope():
+    """Mess_ID the caller may read (None = every mess), or 401."""
+    if 'user_id' in session and session.get('user_type') == 'admin':
+        return request.args.get('mess_id', type=int)
+    mess_id = _kitchen_mess()
+    if mess_id is None:
+        abort(401)
+    return mess_id
+
+
+@bp.route('/api/headcount')
+def headcount():
+    """Current students per mess, read from the maintained counters."""
+    return jsonify({'mess': headcounts(_mess_scope())})
+
+
+@bp.route('/api/rollups/daily')
+def rollups_daily():
+    mess_id = _mess_scope()
+    date_to = request.args.get('to', type=date.fromisoformat) or date.today()
+    date_from = request.args.get('from', type=date.fromisoformat) or date_to - timedelta(days=29)
+    if date_from > date_to:
+        return jsonify({'error': 'from must not be after to'}), 400
+    if (date_to - date_from).days >= ROLLUP_DAYS_LIMIT:
+        return jsonify({'error': f'at most {ROLLUP_DAYS_LIMIT} days per request'}), 400
+    return jsonify({'from': date_from.isoformat(), 'to': date_to.isoformat(),
+                    'days': daily_rollups(date_from, date_to, mess_id)})
+
+
+@bp.route('/api/rollups/monthly')
+def rollups_monthly():
+    mess_id = _mess_scope()
+    try:
+        month_to = billing_period(request.args.get('to'))
+        month_from = (billing_period(request.args.get('from')) if request.args.get('from')
+                      else (month_to - timedelta(days=330)).replace(day=1))
+    except ValueError:
+        return jsonify({'error': 'months are YYYY-MM'}), 400
+    if month_from > month_to:
+        return jsonify({'error': 'from must not be after to'}), 400
+    return jsonify({'from': month_from.isoformat()[:7], 'to': month_to.isoformat()[:7],
+                    'months': monthly_rollups(month_from, month_to, mess_id)})
+
+
+@bp.cli.command('rollup')
+@click.option('--date', 'day', type=click.DateTime(formats=['%Y-%m-%d']), help='Day to record (default today).')
+def rollup(day):
+    """Record today's mess headcounts and revenue into messdaily / messmonthly."""
+    report = roll_up(day.date() if day else None)
+    click.echo(f"Rolled up {report['day']} (month {report['month'][:7]}).")
+
+
+@bp.cli.command('reconcile-headcount')
+@click.option('--repair', is_flag=True, help='Rewrite counters that disagree with the student table.')
+def reconcile_headcount(repair):
+    """Check mess.Headcount against student.Mess_ID."""
+    drift = repair_headcount() if repair else find_headcount_drift()
+
+    if not drift:
+        click.echo('All mess headcounts match the student table.')
+        return
+
+    for row in drift:
+        click.echo(f"Mess {row['Name']} (ID {row['Mess_ID']}): counter={row['Headcount']} actual={row['Students']}")
+
+    if repair:
+        click.echo(f'Repaired {len(drift)} mess(es).')
+    else:
+        click.echo(f'{len(drift)} mess(es) out of sync. Re-run with --repair to fix them.')
+        raise SystemExit(1)
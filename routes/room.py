@@ -1,6 +1,53 @@
+import click
 from flask import Blueprint
 from database_connection import mysql # ADDED: Import the globally shared MySQL object
+from models.rooms import find_occupancy_drift, repair_occupancy
+from models.allocation import allocate_batch, ALLOCATION_CHUNK_SIZE
+from models.portal_cache import student_changed, room_changed
 
 bp = Blueprint('room', __name__, url_prefix='/room')
 
-# Additional room management routes can be added here
\ No newline at end of file
+# Additional room management routes can be added here
+
+@bp.cli.command('reconcile-occupancy')
+@click.option('--repair', is_flag=True, help='Rewrite counters that disagree with roomallocation.')
+def reconcile_occupancy(repair):
+    """Check room.Occupancy against the active rows in roomallocation."""
+    drift = repair_occupancy() if repair else find_occupancy_drift()
+    
+    if not drift:
+        click.echo('All room occupancy counters match roomallocation.')
+        return
+    
+    for row in drift:
+        click.echo(f"Room {row['Room_no']} (ID {row['Room_ID']}): counter={row['Occupancy']} actual={row['Active']}")
+    
+    if repair:
+        click.echo(f'Repaired {len(drift)} room(s).')
+    else:
+        click.echo(f'{len(drift)} room(s) out of sync. Re-run with --repair to fix them.')
+        raise SystemExit(1)
+
+@bp.cli.command('allocate-batch')
+@click.argument('student_ids', nargs=-1, type=int)
+@click.option('--staff-id', type=int, help="Only use this warden's rooms.")
+@click.option('--date', 'allocation_date', type=click.DateTime(formats=['%Y-%m-%d']), help='Allocation date (default today).')
+@click.option('--chunk-size', default=ALLOCATION_CHUNK_SIZE, show_default=True, help='Students per transaction.')
+def allocate_batch_command(student_ids, staff_id, allocation_date, chunk_size):
+    """Allocate rooms to the given students (default: every student without a room)."""
+    outcomes = allocate_batch(list(student_ids) or None, staff_id=staff_id,
+                              allocation_date=allocation_date.date() if allocation_date else None,
+                              chunk_size=chunk_size)
+    # Portal cache versions are shared, so the web workers see these allocations right away
+    placed = [outcome for outcome in outcomes if outcome['status'] == 'allocated']
+    student_changed(*(outcome['student_id'] for outcome in placed))
+    room_changed(*{outcome['room_id'] for outcome in placed})
+    
+    allocated = 0
+    for outcome in outcomes:
+        if outcome['status'] == 'allocated':
+            allocated += 1
+            click.echo(f"{outcome['student_id']}: allocated to {outcome['room_no']}")
+        else:
+            click.echo(f"{outcome['student_id']}: {outcome['status']} ({outcome['reason']})")
+    click.echo(f'{allocated} of {len(outcomes)} students allocated.')
@@ -2,6 +2,13 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask import current_app
 from datetime import datetime
 from database_connection import mysql # ADDED: Import the globally shared MySQL object
+from models.stats import invalidate_dashboard_stats
+from models.portal_cache import portal_cache, student_changed
+from models.visits import log_visit, student_visit_history
+from models.live import publish_changes
+from models.changes import tables_changed, after_commit
+from models.mess import headcounts
+import MySQLdb
 
 bp = Blueprint('student', __name__, url_prefix='/student')
 
@@ -18,135 +25,154 @@ def login_required(f):
 @bp.route('/dashboard')
 @login_required
 def dashboard():
-    # CHANGED: Use the imported 'mysql' object directly
-    cur = mysql.connection.cursor()
     student_id = session['user_id']
     
-    # Get student details
-    cur.execute("""
-        SELECT s.*, r.Room_no, m.Name as MessName, m.Fees as MessFees
-        FROM student s
-        LEFT JOIN room r ON s.Room_ID = r.Room_ID
-        LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
-        WHERE s.Student_ID = %s
-    """, (student_id,))
-    student = cur.fetchone()
-    
-    # Get pending fees
-    cur.execute("SELECT CalculatePendingFees(%s) as pending", (student_id,))
-    pending = cur.fetchone()
-    
-    # Get recent payments
-    cur.execute("""
-        SELECT * FROM fees 
-        WHERE Student_ID = %s 
-        ORDER BY PaymentDate DESC LIMIT 5
-    """, (student_id,))
-    payments = cur.fetchall()
+    def load():
+        # Student details and recent payments, fetched at the same time
+        student, payments = mysql.fetch_concurrently(
+            ("""
+                SELECT s.*, r.Room_no, m.Name as MessName, m.Fees as MessFees,
+                       fb.PendingAmount + fb.OverdueAmount as PendingFees, fb.LastPaymentDate
+                FROM student s
+                LEFT JOIN room r ON s.Room_ID = r.Room_ID
+                LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
+                LEFT JOIN feebalance fb ON fb.Student_ID = s.Student_ID
+                WHERE s.Student_ID = %s
+            """, (student_id,), 'one'),
+            ("""
+                SELECT * FROM fees 
+                WHERE Student_ID = %s 
+                ORDER BY PaymentDate DESC LIMIT 5
+            """, (student_id,)),
+        )
+        return {'student': student, 'payments': payments}, ()
     
-    cur.close()
+    # Served from the per-student cache until this student's data changes
+    data = portal_cache.get_or_load(('dashboard', student_id), load, [('student', student_id)])
+    student = data['student']
     
     return render_template('student/dashboard.html', 
                            student=student, 
-                           pending=pending['pending'] or 0,
-                           payments=payments)
+                           pending=(student['PendingFees'] if student else None) or 0,
+                           payments=data['payments'])
 
 @bp.route('/profile')
 @login_required
 def profile():
-    # CHANGED: Use the imported 'mysql' object directly
-    cur = mysql.connection.cursor()
     student_id = session['user_id']
     
-    cur.execute("""
-        SELECT s.*, r.Room_no, m.Name as MessName
-        FROM student s
-        LEFT JOIN room r ON s.Room_ID = r.Room_ID
-        LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
-        WHERE s.Student_ID = %s
-    """, (student_id,))
-    student = cur.fetchone()
+    def load():
+        # CHANGED: Use the imported 'mysql' object directly
+        cur = mysql.connection.cursor()
+        
+        cur.execute("""
+            SELECT s.*, r.Room_no, m.Name as MessName
+            FROM student s
+            LEFT JOIN room r ON s.Room_ID = r.Room_ID
+            LEFT JOIN mess m ON s.Mess_ID = m.Mess_ID
+            WHERE s.Student_ID = %s
+        """, (student_id,))
+        student = cur.fetchone()
+        
+        # Get phone numbers
+        cur.execute("SELECT Ph_no FROM studentphone WHERE Student_ID = %s", (student_id,))
+        phones = cur.fetchall()
+        
+        cur.close()
+        return {'student': student, 'phones': phones}, ()
     
-    # Get phone numbers
-    cur.execute("SELECT Ph_no FROM studentphone WHERE Student_ID = %s", (student_id,))
-    phones = cur.fetchall()
+    data = portal_cache.get_or_load(('profile', student_id), load, [('student', student_id)])
     
-    cur.close()
-    
-    return render_template('student/profile.html', student=student, phones=phones)
+    return render_template('student/profile.html', student=data['student'], phones=data['phones'])
 
 @bp.route('/room')
 @login_required
 def room():
-    # CHANGED: Use the imported 'mysql' object directly
-    cur = mysql.connection.cursor()
     student_id = session['user_id']
     
-    # Get current room details
-    cur.execute("""
-        SELECT r.*, w.Name as WardenName, w.Ph_no as WardenPhone
-        FROM student s
-        JOIN room r ON s.Room_ID = r.Room_ID
-        JOIN warden w ON r.Staff_ID = w.Staff_ID
-        WHERE s.Student_ID = %s
-    """, (student_id,))
-    room = cur.fetchone()
-    
-    room_id = room['Room_ID'] if room else 0
-    
-    # Get roommates
-    cur.execute("""
-        SELECT Student_ID, FirstName, LastName, Department
-        FROM student
-        WHERE Room_ID = %s AND Student_ID != %s
-    """, (room_id, student_id))
-    roommates = cur.fetchall()
-    
-    # Get allocation history
-    cur.execute("""
-        SELECT ra.*, r.Room_no
-        FROM roomallocation ra
-        JOIN room r ON ra.Room_ID = r.Room_ID
-        WHERE ra.Student_ID = %s
-        ORDER BY ra.AllocationDate DESC
-    """, (student_id,))
-    history = cur.fetchall()
+    def load():
+        # Room + warden, roommates and allocation history, fetched at the same time.
+        # Roommates look the room up themselves so they need not wait for the first query.
+        room, roommates, history = mysql.fetch_concurrently(
+            ("""
+                SELECT r.*, w.Name as WardenName, w.Ph_no as WardenPhone
+                FROM student s
+                JOIN room r ON s.Room_ID = r.Room_ID
+                JOIN warden w ON r.Staff_ID = w.Staff_ID
+                WHERE s.Student_ID = %s
+            """, (student_id,), 'one'),
+            ("""
+                SELECT Student_ID, FirstName, LastName, Department
+                FROM student
+                WHERE Room_ID = (SELECT Room_ID FROM student WHERE Student_ID = %s)
+                  AND Student_ID != %s
+            """, (student_id, student_id)),
+            ("""
+                SELECT ra.*, r.Room_no
+                FROM roomallocation ra
+                JOIN room r ON ra.Room_ID = r.Room_ID
+                WHERE ra.Student_ID = %s
+                ORDER BY ra.AllocationDate DESC
+            """, (student_id,)),
+        )
+        
+        room_id = room['Room_ID'] if room else 0
+        # Roommates change whenever anyone moves in or out of this room
+        return {'room': room, 'roommates': roommates, 'history': history}, [('room', room_id)]
     
-    cur.close()
+    data = portal_cache.get_or_load(('room', student_id), load, [('student', student_id)])
     
-    return render_template('student/room.html', room=room, roommates=roommates, history=history)
+    return render_template('student/room.html', room=data['room'], roommates=data['roommates'], history=data['history'])
 
 @bp.route('/mess', methods=['GET', 'POST'])
 @login_required
 def mess():
-    # CHANGED: Use the imported 'mysql' object directly
-    cur = mysql.connection.cursor()
     student_id = session['user_id']
     
     if request.method == 'POST':
         new_mess_id = request.form.get('mess_id')
         
-        cur.execute("UPDATE student SET Mess_ID = %s WHERE Student_ID = %s", 
-                    (new_mess_id, student_id))
-        mysql.connection.commit()
+        cur = mysql.connection.cursor()
+        try:
+            # before_student_update rejects the switch when the new mess is full
+            cur.execute("UPDATE student SET Mess_ID = %s WHERE Student_ID = %s", 
+                        (new_mess_id, student_id))
+            mysql.connection.commit()
+        except MySQLdb.Error as e:
+            mysql.connection.rollback()
+            if e.args and e.args[0] == 1644:
+                flash('That mess is full. Please choose another one.', 'danger')
+            else:
+                flash(f'Could not change mess: {e.args[1] if len(e.args) > 1 else e}', 'danger')
+            return redirect(url_for('student.mess'))
+        finally:
+            cur.close()
+        with after_commit('a mess switch'):
+            tables_changed('student', 'mess')
+            student_changed(student_id)
+            publish_changes()
         flash('Mess updated successfully!', 'success')
         return redirect(url_for('student.mess'))
     
-    # Get all mess options
-    cur.execute("SELECT * FROM mess")
-    all_mess = cur.fetchall()
-    
-    # Get current mess
-    cur.execute("""
-        SELECT m.* FROM mess m
-        JOIN student s ON s.Mess_ID = m.Mess_ID
-        WHERE s.Student_ID = %s
-    """, (student_id,))
-    current_mess = cur.fetchone()
+    def load():
+        # CHANGED: Use the imported 'mysql' object directly
+        cur = mysql.connection.cursor()
+        
+        # Get current mess
+        cur.execute("""
+            SELECT m.* FROM mess m
+            JOIN student s ON s.Mess_ID = m.Mess_ID
+            WHERE s.Student_ID = %s
+        """, (student_id,))
+        current_mess = cur.fetchone()
+        
+        cur.close()
+        return {'current_mess': current_mess}, ()
     
-    cur.close()
+    data = portal_cache.get_or_load(('mess', student_id), load, [('student', student_id)])
     
-    return render_template('student/mess.html', all_mess=all_mess, current_mess=current_mess)
+    # Headcounts change with everyone's switches, so the options are read fresh (counter columns, no COUNT)
+    return render_template('student/mess.html', all_mess=headcounts(), current_mess=data['current_mess'])
 
 @bp.route('/fees', methods=['GET', 'POST'])
 @login_required
@@ -164,6 +190,11 @@ def fees():
             VALUES ('Paid', %s, %s, %s, %s)
         """, (amount, datetime.now().date(), fee_type, student_id))
         mysql.connection.commit()
+        with after_commit('a fee payment'):
+            tables_changed('fees')
+            invalidate_dashboard_stats()
+            student_changed(student_id)
+            publish_changes()
         flash('Payment recorded successfully!', 'success')
         return redirect(url_for('student.fees'))
     
@@ -175,13 +206,16 @@ def fees():
     """, (student_id,))
     all_fees = cur.fetchall()
     
-    # Get pending fees
-    cur.execute("SELECT CalculatePendingFees(%s) as pending", (student_id,))
+    # Get pending fees from the running balance
+    cur.execute("""
+        SELECT PendingAmount + OverdueAmount as pending
+        FROM feebalance WHERE Student_ID = %s
+    """, (student_id,))
     pending = cur.fetchone()
     
     cur.close()
     
-    return render_template('student/fees.html', all_fees=all_fees, pending=pending['pending'] or 0)
+    return render_template('student/fees.html', all_fees=all_fees, pending=(pending['pending'] if pending else None) or 0)
 
 @bp.route('/visitors', methods=['GET', 'POST'])
 @login_required
@@ -212,23 +246,24 @@ def visitors():
                 VALUES (%s, %s)
             """, (name, student_id))
             
+            # Every registration is its own row in the visit log (the visitor row above is just contact details)
+            log_visit(student_id, name, phone, relation, visit_date, out_date)
+            
             mysql.connection.commit()
-            flash('Visitor registered successfully!', 'success')
         except Exception as e:
             mysql.connection.rollback()
             flash(f'Error: {str(e)}', 'danger')
+            return redirect(url_for('student.visitors'))
         
+        with after_commit('a visitor registration'):
+            student_changed(student_id)
+        flash('Visitor registered successfully!', 'success')
         return redirect(url_for('student.visitors'))
     
-    # Get visitor history
-    cur.execute("""
-        SELECT v.* FROM visitor v
-        JOIN visitedby vb ON v.Visitor_Name = vb.Visitor_Name
-        WHERE vb.Student_ID = %s
-        ORDER BY v.VisitDate DESC
-    """, (student_id,))
-    visitors = cur.fetchall()
-    
     cur.close()
     
-    return render_template('student/visitors.html', visitors=visitors)
\ No newline at end of file
+    # Visit history from the append-only log, newest first, one keyset page at a time
+    history = student_visit_history(student_id, before=request.args.get('before'))
+    
+    return render_template('student/visitors.html', visitors=history['visits'],
+                           next_cursor=history['next_cursor'])
\ No newline at end of file
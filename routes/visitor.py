@@ -1,6 +1,69 @@
-from flask import Blueprint
+import hmac
+from datetime import date
+
+from flask import Blueprint, request, session, jsonify, abort, current_app
 from database_connection import mysql # ADDED: Import the globally shared MySQL object
+from models.visits import (ingest_gate_batch, visitors_inside, student_visit_history,
+                           MAX_BATCH_SIZE, HISTORY_PAGE_SIZE, MAX_HISTORY_PAGE_SIZE)
 
 bp = Blueprint('visitor', __name__, url_prefix='/visitor')
 
-# Additional visitor management routes can be added here.
\ No newline at end of file
+
+def _kiosk_gate():
+    # X-Gate-Token identifies the kiosk; each gate has its own token
+    token = request.headers.get('X-Gate-Token', '')
+    if not token:
+        return None
+    for pair in current_app.config.get('GATE_KIOSK_TOKENS', '').split(','):
+        gate, _, secret = pair.strip().partition(':')
+        if gate and secret and hmac.compare_digest(secret, token):
+            return gate
+    return None
+
+
+def _is_admin():
+    return 'user_id' in session and session.get('user_type') == 'admin'
+
+
+@bp.route('/api/gate/batch', methods=['POST'])
+def gate_batch():
+    """Buffered entries from a gate kiosk, posted in one request."""
+    gate = _kiosk_gate()
+    payload = request.get_json(silent=True) or {}
+    if gate is None:
+        if not _is_admin():
+            abort(401)
+        gate = str(payload.get('gate') or '').strip()[:20] or None
+        if gate is None:
+            return jsonify({'error': 'gate is required'}), 400
+
+    entries = payload.get('entries')
+    if not isinstance(entries, list):
+        return jsonify({'error': 'entries must be a list'}), 400
+    if len(entries) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'at most {MAX_BATCH_SIZE} entries per batch'}), 413
+
+    report = ingest_gate_batch(gate, entries)
+    return jsonify(report.as_dict())
+
+
+@bp.route('/api/inside')
+def inside():
+    # Who is inside right now (gate check-ins without a check-out)
+    if not _is_admin() and _kiosk_gate() is None:
+        abort(401)
+    visits = visitors_inside()
+    return jsonify({'count': len(visits), 'visits': visits})
+
+
+@bp.route('/api/students/<int:student_id>/visits')
+def student_visits(student_id):
+    own = session.get('user_type') == 'student' and session.get('user_id') == student_id
+    if not own and not _is_admin():
+        abort(401)
+    per_page = max(1, min(request.args.get('per_page', HISTORY_PAGE_SIZE, type=int), MAX_HISTORY_PAGE_SIZE))
+    return jsonify(student_visit_history(student_id,
+                                         before=request.args.get('before'),
+                                         date_from=request.args.get('from', type=date.fromisoformat),
+                                         date_to=request.args.get('to', type=date.fromisoformat),
+                                         per_page=per_page))
@@ -0,0 +1,31 @@
+// Create floating particles
+const particlesContainer = document.getElementById('particles');
+for (let i = 0; i < 50; i++) {
+    const particle = document.createElement('div');
+    particle.className = 'particle';
+    particle.style.width = Math.random() * 10 + 5 + 'px';
+    particle.style.height = particle.style.width;
+    particle.style.left = Math.random() * 100 + '%';
+    particle.style.animationDuration = Math.random() * 10 + 10 + 's';
+    particle.style.animationDelay = Math.random() * 5 + 's';
+    particlesContainer.appendChild(particle);
+}
+
+// Add input focus animations
+const inputs = document.querySelectorAll('.form-control');
+inputs.forEach(input => {
+    input.addEventListener('focus', function() {
+        this.parentElement.style.transform = 'scale(1.02)';
+    });
+    input.addEventListener('blur', function() {
+        this.parentElement.style.transform = 'scale(1)';
+    });
+});
+
+// Show loading state when form submits (doesn't prevent submission)
+const loginForm = document.querySelector('.login-form');
+loginForm.addEventListener('submit', function() {
+    const btn = this.querySelector('.btn-primary');
+    btn.textContent = 'Logging in...';
+    btn.disabled = true;
+});
@@ -0,0 +1,9 @@
+// Shared by every page (linked from base.html)
+
+// Default the room allocation date to today (admin dashboard and students pages)
+document.addEventListener('DOMContentLoaded', function() {
+    const allocationDateInput = document.getElementById('allocation_date');
+    if (allocationDateInput && !allocationDateInput.value) {
+        allocationDateInput.value = new Date().toISOString().split('T')[0];
+    }
+});
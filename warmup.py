@@ -0,0 +1,43 @@
+import os
+import time
+
+import MySQLdb
+
+from database_connection import mysql
+
+_warmed_pid = None
+
+
+def warm_templates(app):
+    """Compile every template into the Jinja environment's in-memory cache.
+
+    Called in the gunicorn master before forking, so workers inherit the
+    compiled templates instead of each compiling them on first use.
+    """
+    env = app.jinja_env
+    names = env.list_templates(extensions=('html',))
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def warm_worker(app):
+    """Open a worker's connection pools and make sure its templates are compiled."""
+    global _warmed_pid
+    started = time.perf_counter()
+    templates = warm_templates(app)
+    try:
+        with app.app_context():
+            stats = mysql.warm_up()
+    except MySQLdb.Error as e:
+        # Stay unready; /readyz retries on the next probe
+        app.logger.warning('worker %s warm-up could not reach MySQL: %s', os.getpid(), e)
+        return False
+    _warmed_pid = os.getpid()
+    app.logger.info('worker %s warm: %s templates, %s connection(s) in %.0f ms', os.getpid(), templates,
+                    stats['size'], (time.perf_counter() - started) * 1000)
+    return True
+
+
+def is_warm():
+    return _warmed_pid == os.getpid()
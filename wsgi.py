@@ -0,0 +1,7 @@
+# Production entry point: `gunicorn -c gunicorn.conf.py wsgi:app`.
+# With preload_app the master imports this once, so the app is built and its
+# templates compiled before the workers are forked.
+from app import app
+from warmup import warm_templates
+
+warm_templates(app)